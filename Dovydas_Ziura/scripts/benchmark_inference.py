@@ -0,0 +1,103 @@
+# benchmark_inference.py
+# Greedy images/second: the step-by-step predict() path (decode_sequence)
+# vs the fused SavedModel (one graph call per batch) vs TFLite, plus how often they agree.
+import argparse
+import glob
+import pickle
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+from config import MAX_SEQ_LEN, PREDICT_MODEL, PREDICT_BATCH_SIZE
+from dataset import preprocess_image
+from inference_model import FusedGreedyDecoder, build_inference_models, decode_sequence
+from tokenizer import sequence_to_text
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--model', type=str, default=PREDICT_MODEL or "model_gpu.h5", help='Trained .h5 model')
+parser.add_argument('--tokenizer', type=str, default="tokenizer.pkl", help='Tokenizer pickle saved by train.py')
+parser.add_argument('--glob', type=str, default="../dataset/hand_data/*.jpg", help='Images to decode')
+parser.add_argument('--limit', type=int, default=64, help='Max images for the fused paths')
+parser.add_argument('--step-limit', type=int, default=8, help='Max images for the (slow) step-by-step path')
+parser.add_argument('--batch-size', type=int, default=PREDICT_BATCH_SIZE, help='Images per fused SavedModel call')
+parser.add_argument('--saved-model', type=str, default=None, help='Exported SavedModel dir (default: build in-process)')
+parser.add_argument('--tflite', type=str, default=None, help='TFLite model from export_inference.py --tflite')
+parser.add_argument('--threads', type=int, default=None, help='TFLite interpreter threads')
+args = parser.parse_args()
+
+paths = sorted(glob.glob(args.glob))[:args.limit]
+if not paths:
+    raise SystemExit(f"No images match {args.glob}")
+images = np.stack([preprocess_image(p) for p in paths]).astype(np.float32)
+training_model = load_model(args.model, compile=False)
+with open(args.tokenizer, "rb") as f:
+    tokenizer = pickle.load(f)
+print(f"[INFO] {len(paths)} images from {args.glob}")
+
+
+def ids_to_text(ids):
+    return sequence_to_text(tokenizer, [int(i) for i in ids])
+
+
+def timed(name, n, fn):
+    fn_out = fn()  # warm-up / tracing
+    start = time.perf_counter()
+    fn_out = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {n / elapsed:8.2f} img/s  ({elapsed:.2f}s for {n})")
+    return fn_out
+
+
+results = {}
+
+# 1) Current step-by-step path: one predict() per token per image
+encoder_model, decoder_model = build_inference_models(training_model)
+n_step = min(args.step_limit, len(paths))
+results["step-by-step"] = timed("step-by-step (predict)", n_step, lambda: [
+    decode_sequence(img, encoder_model, decoder_model, tokenizer, max_len=MAX_SEQ_LEN - 1)
+    for img in images[:n_step]
+])
+
+# 2) Fused encoder + tf.while_loop greedy decode, one call per batch
+if args.saved_model:
+    fused = tf.saved_model.load(args.saved_model)
+else:
+    fused = FusedGreedyDecoder(training_model, tokenizer)
+
+
+def run_fused():
+    texts = []
+    for i in range(0, len(images), args.batch_size):
+        ids = fused(tf.constant(images[i:i + args.batch_size]))["ids"].numpy()
+        texts.extend(ids_to_text(row) for row in ids)
+    return texts
+
+
+results["fused"] = timed(f"fused (batch {args.batch_size})", len(images), run_fused)
+results["fused-1"] = timed("fused (batch 1)", n_step, lambda: [
+    ids_to_text(fused(tf.constant(images[i:i + 1]))["ids"].numpy()[0]) for i in range(n_step)
+])
+
+# 3) TFLite (CPU float ops go through the XNNPACK delegate)
+if args.tflite:
+    interpreter = tf.lite.Interpreter(model_path=args.tflite, num_threads=args.threads)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]["index"]
+    out = interpreter.get_output_details()[0]["index"]
+
+    def run_tflite():
+        texts = []
+        for img in images:
+            interpreter.set_tensor(inp, img[None])
+            interpreter.invoke()
+            texts.append(ids_to_text(interpreter.get_tensor(out)[0]))
+        return texts
+
+    results["tflite"] = timed("tflite (batch 1)", len(images), run_tflite)
+
+reference = results["step-by-step"]
+for name, texts in results.items():
+    if name == "step-by-step":
+        continue
+    same = sum(a == b for a, b in zip(reference, texts))
+    print(f"[CHECK] {name}: {same}/{len(reference)} identical to step-by-step")
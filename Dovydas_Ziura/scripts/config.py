@@ -6,6 +6,12 @@ BATCH_SIZE = 6
 DATA_LIMIT = 40000
 SEED = 45
 
+# Preprocessed shard cache (prepare_shards.py); train.py --shards reads from it
+SHARD_DIR = "../dataset/shards"
+SHARD_SIZE = 4096  # samples per .npy shard
+# Row ids held by the training shuffle buffer (images are gathered after shuffling)
+SHUFFLE_BUFFER = 16384
+
 #Image size used across dataset preprocessing and prediction (height, width)
 IMAGE_SIZE = (60, 120)
 
@@ -15,6 +21,9 @@ PREDICT_BEAM = 5  # 1=greedy; try 5 for better results
 PREDICT_LENGTH_NORM = 0.7
 PREDICT_MODEL = "best_model.h5"  # None -> prefer best_model.h5
 PREDICT_OUTPUT = None  # Optional path to save decoded LaTeX
+PREDICT_BATCH_SIZE = 32  # images per encoder call / lockstep decode in batch mode
+PREDICT_WORKERS = 4  # preprocessing threads in batch mode
+EXPORT_DIR = "fused_greedy"  # SavedModel written by export_inference.py (encoder + greedy decode)
 
 # Advanced decoding defaults
 PREDICT_TEMPERATURE = 0.9
@@ -1,10 +1,14 @@
 # dataset.py (ULTRA FAST VERSION)
+import json
+import os
+import pickle
 import numpy as np
 import tensorflow as tf
 import tensorflow_addons as tfa
 from PIL import Image
 from datasets import load_dataset
-from config import IMAGE_SIZE
+from config import IMAGE_SIZE, MAX_SEQ_LEN, SEED, SHARD_SIZE, SHUFFLE_BUFFER
+from tokenizer import create_char_tokenizer, texts_to_sequences
 
 # Image size (height, width) centralized in config
 IMG_SIZE = IMAGE_SIZE
@@ -13,10 +17,13 @@ IMG_SIZE = IMAGE_SIZE
 # ---------------------------------------------------------
 # LOAD HUGGINGFACE DATASET
 # ---------------------------------------------------------
-def load_mathwriting(limit=None):
+def load_mathwriting(limit=None, as_uint8=False):
     """
     Loads the MathWriting dataset and returns:
     (train_images, train_latex), (val_images, val_latex)
+    With as_uint8=True every image is resized to a uint8 array as it is read and the
+    image lists come back stacked as (N, H, W) uint8 arrays, so the decoded PIL
+    images are never all held at once.
     """
 
     ds = load_dataset("deepcopy/MathWriting-human")
@@ -33,6 +40,9 @@ def load_mathwriting(limit=None):
         tex = sample["latex"]
         tag = sample["split_tag"]
 
+        if as_uint8 and tag in ("train", "val"):
+            img = image_to_uint8(img)
+
         if tag == "train":
             train_imgs.append(img)
             train_latex.append(tex)
@@ -40,15 +50,20 @@ def load_mathwriting(limit=None):
             val_imgs.append(img)
             val_latex.append(tex)
 
+    if as_uint8:
+        empty = np.zeros((0, *IMG_SIZE), dtype=np.uint8)
+        train_imgs = np.stack(train_imgs) if train_imgs else empty
+        val_imgs = np.stack(val_imgs) if val_imgs else empty
+
     return (train_imgs, train_latex), (val_imgs, val_latex)
 
 
 # ---------------------------------------------------------
 # FAST IMAGE PREPROCESSING (PIL → NumPy)
 # ---------------------------------------------------------
-def preprocess_image(img):
+def image_to_uint8(img):
     """
-    Convert path/PIL/NumPy image to normalized grayscale float tensor of size IMG_SIZE.
+    Convert path/PIL/NumPy image to a grayscale uint8 array of size IMG_SIZE.
     Accepts:
     - str: filesystem path to an image
     - PIL.Image.Image
@@ -75,8 +90,17 @@ def preprocess_image(img):
     # Resize to (width, height)
     img = img.resize((IMG_SIZE[1], IMG_SIZE[0]))
 
+    return np.array(img, dtype=np.uint8)
+
+
+def preprocess_image(img):
+    """
+    Convert path/PIL/NumPy image to normalized grayscale float tensor of size IMG_SIZE.
+    Same inputs as image_to_uint8.
+    """
+
     # Convert to float32 tensor (0–1)
-    img = np.array(img, dtype=np.float32) / 255.0
+    img = image_to_uint8(img).astype(np.float32) / 255.0
 
     # Add channel dimension
     img = np.expand_dims(img, axis=-1)
@@ -85,38 +109,254 @@ def preprocess_image(img):
 
 
 # ---------------------------------------------------------
-# EXTREMELY FAST TF.DATA CREATION
+# STREAMING TF.DATA CREATION
 # ---------------------------------------------------------
-def create_tf_dataset(images, sequences, batch_size=32):
+def sequence_lengths(sequences):
+    """Token count (BOS..EOS, without padding) of each padded sequence."""
+    return np.count_nonzero(np.asarray(sequences), axis=1).astype(np.int32)
+
+
+def length_buckets(lengths, num_buckets=4):
     """
-    This version converts *everything* to TensorFlow tensors first,
-    then slices without Python overhead. 10–20× faster.
+    Bucket boundaries at the length quantiles, so every bucket gets about the same
+    number of rows. Each boundary is one past a quantile, which keeps the longest
+    row of a bucket inside the padded width.
     """
+    lengths = np.asarray(lengths)
+    if num_buckets <= 1 or len(lengths) == 0:
+        return []
+    quantiles = np.quantile(lengths, np.linspace(0, 1, num_buckets + 1)[1:-1])
+    return sorted({int(np.ceil(q)) + 1 for q in quantiles if np.ceil(q) + 1 < MAX_SEQ_LEN})
 
-    # Convert to TF tensors on CPU to avoid large GPU constant allocation
-    # This prevents the "Dst tensor is not initialized" error when copying a huge constant to GPU.
-    with tf.device('/CPU:0'):
-        images = tf.constant(np.array(images), dtype=tf.float32)
-        sequences = tf.constant(np.array(sequences), dtype=tf.int32)
 
-    # Prepare decoder input/output (shifted by 1)
-    decoder_in  = sequences[:, :-1]
-    decoder_out = sequences[:, 1:]
+def stream_batches(take, rows, batch_size=32, shuffle=True, shuffle_buffer=SHUFFLE_BUFFER,
+                   lengths=None, bucket_boundaries=None, drop_remainder=True):
+    """
+    Row ids -> shuffle (bounded buffer) -> batch -> gather.
+    take(batch_rows) must return uint8 images (N, H, W) and int32 sequences (N, MAX_SEQ_LEN);
+    it runs in parallel map calls and images are normalized per batch, so float32 images
+    only exist for the batches in flight.
+    With bucket_boundaries (and the token `lengths` of every row), rows of similar length
+    are batched together and each batch is cut to its bucket boundary instead of MAX_SEQ_LEN.
+    Every bucket then leaves its own partial batch; pass drop_remainder=False for
+    validation so small splits are not emptied.
+    """
+    H, W = IMG_SIZE
+    rows = np.asarray(rows, dtype=np.int64)
 
-    # Build dataset
-    ds = tf.data.Dataset.from_tensor_slices(
-        ((images, decoder_in), decoder_out)
-    )
+    def to_model_inputs(batch_rows, width):
+        images, seqs = tf.numpy_function(take, [batch_rows], [tf.uint8, tf.int32])
+        images = tf.reshape(tf.cast(images, tf.float32) / 255.0, (-1, H, W, 1))
+        seqs = tf.reshape(seqs, (-1, MAX_SEQ_LEN))[:, :width]
+        return (images, seqs[:, :-1]), seqs[:, 1:]
+
+    if not bucket_boundaries:
+        ds = tf.data.Dataset.from_tensor_slices(rows)
+        if shuffle:
+            ds = ds.shuffle(max(1, min(len(rows), shuffle_buffer)), seed=SEED, reshuffle_each_iteration=True)
+        ds = (
+            ds.batch(batch_size, drop_remainder=drop_remainder)
+                .map(lambda r: to_model_inputs(r, MAX_SEQ_LEN), num_parallel_calls=tf.data.AUTOTUNE)
+        )
+        return ds.prefetch(tf.data.AUTOTUNE)
 
+    # Bucket edges: a batch whose longest row has length L is padded to the first edge > L
+    boundaries = sorted(b for b in set(bucket_boundaries) if 1 < b < MAX_SEQ_LEN)
+    edges = tf.constant(boundaries + [MAX_SEQ_LEN], dtype=tf.int32)
+    lengths = np.minimum(np.asarray(lengths, dtype=np.int32), MAX_SEQ_LEN)
 
-    # Shuffle → batch → prefetch (always batch, even without augmentation)
-    # Cache is removed to avoid partial-cache warnings when only taking
-    # a small preview batch and to reduce peak RAM for very large limits.
+    def to_bucket_inputs(batch_rows, batch_lengths):
+        bucket = tf.searchsorted(edges, [tf.reduce_max(batch_lengths)], side="right")
+        width = tf.gather(edges, tf.minimum(bucket, len(boundaries)))[0]
+        return to_model_inputs(batch_rows, width)
+
+    ds = tf.data.Dataset.from_tensor_slices((rows, lengths))
+    if shuffle:
+        ds = ds.shuffle(max(1, min(len(rows), shuffle_buffer)), seed=SEED, reshuffle_each_iteration=True)
     ds = (
-        ds.shuffle(512)
-            .batch(batch_size, drop_remainder=True)
-            .prefetch(tf.data.AUTOTUNE)
+        ds.bucket_by_sequence_length(
+            element_length_func=lambda row, length: length,
+            bucket_boundaries=boundaries,
+            bucket_batch_sizes=[batch_size] * (len(boundaries) + 1),
+            drop_remainder=drop_remainder,
+        )
+            .map(to_bucket_inputs, num_parallel_calls=tf.data.AUTOTUNE)
     )
+    return ds.prefetch(tf.data.AUTOTUNE)
 
 
-    return ds
+def create_tf_dataset(images, sequences, batch_size=32, shuffle=True, shuffle_buffer=SHUFFLE_BUFFER,
+                      bucket_boundaries=None, drop_remainder=True):
+    """
+    Streaming dataset over in-memory uint8 images (N, H, W), e.g. from
+    load_mathwriting(as_uint8=True). Nothing is copied into a tf.constant: the
+    shuffle buffer only holds row ids and each batch is gathered from the NumPy
+    arrays and normalized when it is needed.
+    """
+    images = np.asarray(images)
+    if images.dtype != np.uint8:
+        raise ValueError(f"create_tf_dataset expects uint8 images (see image_to_uint8), got {images.dtype}")
+    sequences = np.asarray(sequences, dtype=np.int32)
+
+    def take(batch_rows):
+        return images[batch_rows].reshape(len(batch_rows), *IMG_SIZE), sequences[batch_rows]
+
+    lengths = sequence_lengths(sequences) if bucket_boundaries else None
+    return stream_batches(take, np.arange(len(sequences)), batch_size, shuffle=shuffle,
+                          shuffle_buffer=shuffle_buffer, lengths=lengths, bucket_boundaries=bucket_boundaries,
+                          drop_remainder=drop_remainder)
+
+
+# ---------------------------------------------------------
+# PREPROCESSED SHARDS (uint8 images + int32 sequences on disk)
+# ---------------------------------------------------------
+SPLITS = ("train", "val")
+
+
+def write_shards(out_dir, limit=None, shard_size=SHARD_SIZE):
+    """
+    One pass over MathWriting: every image is resized to IMG_SIZE and written as
+    uint8 into <split>_<n>_images.npy shards of `shard_size` samples. The char
+    tokenizer is then fit on the train texts and the padded int32 sequences are
+    written next to each image shard. meta.json is written last, so a directory
+    without it is an unfinished run.
+    If the dataset has no val samples, 10% of train is held out (as train.py does).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    ds = load_dataset("deepcopy/MathWriting-human")
+
+    texts = {split: [] for split in SPLITS}
+    buffers = {split: [] for split in SPLITS}
+    shards = {split: [] for split in SPLITS}
+
+    def flush(split):
+        if not buffers[split]:
+            return
+        name = f"{split}_{len(shards[split]):04d}"
+        np.save(os.path.join(out_dir, f"{name}_images.npy"), np.stack(buffers[split]))
+        shards[split].append({"name": name, "count": len(buffers[split])})
+        buffers[split] = []
+
+    total = 0
+    for sample in ds["train"]:
+        if limit is not None and total >= limit:
+            break
+        split = sample["split_tag"]
+        if split not in buffers:
+            continue
+        buffers[split].append(image_to_uint8(sample["image"]))
+        texts[split].append(sample["latex"])
+        total += 1
+        if len(buffers[split]) >= shard_size:
+            flush(split)
+    for split in SPLITS:
+        flush(split)
+
+    holdout = []
+    fit_texts = texts["train"]
+    if not texts["val"]:
+        from sklearn.model_selection import train_test_split
+        keep, held = train_test_split(np.arange(len(texts["train"])), test_size=0.1, random_state=SEED)
+        holdout = sorted(int(i) for i in held)
+        fit_texts = [texts["train"][i] for i in keep]
+    tokenizer = create_char_tokenizer(fit_texts)
+
+    for split in SPLITS:
+        seqs = texts_to_sequences(tokenizer, texts[split], max_len=MAX_SEQ_LEN)
+        start = 0
+        for shard in shards[split]:
+            np.save(os.path.join(out_dir, f"{shard['name']}_seqs.npy"), seqs[start:start + shard["count"]])
+            start += shard["count"]
+        with open(os.path.join(out_dir, f"{split}_latex.json"), "w", encoding="utf-8") as f:
+            json.dump(texts[split], f, ensure_ascii=False)
+
+    with open(os.path.join(out_dir, "tokenizer.pkl"), "wb") as f:
+        pickle.dump(tokenizer, f)
+    meta = {
+        "image_size": list(IMG_SIZE),
+        "max_seq_len": MAX_SEQ_LEN,
+        "shard_size": shard_size,
+        "limit": limit,
+        "shards": shards,
+        "holdout": holdout,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class ShardSet:
+    """
+    Memory-mapped view of a directory written by write_shards. Nothing is read
+    until rows are requested, so opening even 200k samples takes milliseconds.
+    """
+
+    def __init__(self, shard_dir):
+        meta_path = os.path.join(shard_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No meta.json in {shard_dir}; run prepare_shards.py first")
+        with open(meta_path, encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if tuple(self.meta["image_size"]) != tuple(IMG_SIZE) or self.meta["max_seq_len"] != MAX_SEQ_LEN:
+            raise ValueError(
+                f"Shards in {shard_dir} were written for image_size={self.meta['image_size']}, "
+                f"max_seq_len={self.meta['max_seq_len']}; config has {IMG_SIZE}, {MAX_SEQ_LEN}"
+            )
+        with open(os.path.join(shard_dir, "tokenizer.pkl"), "rb") as f:
+            self.tokenizer = pickle.load(f)
+        self.shard_size = self.meta["shard_size"]
+        self.images, self.seqs, self.latex = {}, {}, {}
+        for split in SPLITS:
+            entries = self.meta["shards"][split]
+            self.images[split] = [np.load(os.path.join(shard_dir, f"{e['name']}_images.npy"), mmap_mode="r") for e in entries]
+            self.seqs[split] = [np.load(os.path.join(shard_dir, f"{e['name']}_seqs.npy"), mmap_mode="r") for e in entries]
+            with open(os.path.join(shard_dir, f"{split}_latex.json"), encoding="utf-8") as f:
+                self.latex[split] = json.load(f)
+
+    def rows(self, split, limit=None):
+        """(source split, row ids) for a split; val may be the held-out part of train."""
+        holdout = np.asarray(self.meta["holdout"], dtype=np.int64)
+        if len(holdout) == 0:
+            source, rows = split, np.arange(len(self.latex[split]), dtype=np.int64)
+        elif split == "val":
+            source, rows = "train", holdout
+        else:
+            source = "train"
+            rows = np.setdiff1d(np.arange(len(self.latex["train"]), dtype=np.int64), holdout)
+        return source, rows[:limit] if limit is not None else rows
+
+    def take(self, source, rows):
+        """uint8 images (N, H, W) and int32 sequences (N, MAX_SEQ_LEN) for the given row ids."""
+        rows = np.asarray(rows, dtype=np.int64)
+        images = np.empty((len(rows), *IMG_SIZE), dtype=np.uint8)
+        seqs = np.empty((len(rows), MAX_SEQ_LEN), dtype=np.int32)
+        shard_ids = rows // self.shard_size
+        for shard in np.unique(shard_ids):
+            pick = np.flatnonzero(shard_ids == shard)
+            offsets = rows[pick] - shard * self.shard_size
+            images[pick] = self.images[source][shard][offsets]
+            seqs[pick] = self.seqs[source][shard][offsets]
+        return images, seqs
+
+    def lengths(self, source, rows):
+        """Token lengths for the given rows, read one shard at a time."""
+        rows = np.asarray(rows, dtype=np.int64)
+        per_shard = [sequence_lengths(seqs) for seqs in self.seqs[source]]
+        all_lengths = np.concatenate(per_shard) if per_shard else np.zeros(0, dtype=np.int32)
+        return all_lengths[rows]
+
+    def texts(self, source, rows):
+        return [self.latex[source][i] for i in rows]
+
+
+def create_shard_dataset(shards, split, batch_size=32, limit=None, shuffle=True,
+                         shuffle_buffer=SHUFFLE_BUFFER, bucket_boundaries=None, drop_remainder=True):
+    """
+    Batches straight from the shard files: row ids go through stream_batches and
+    each batch is gathered from the memory-mapped shards.
+    """
+    source, rows = shards.rows(split, limit)
+    lengths = shards.lengths(source, rows) if bucket_boundaries else None
+    return stream_batches(lambda batch_rows: shards.take(source, batch_rows), rows, batch_size,
+                          shuffle=shuffle, shuffle_buffer=shuffle_buffer,
+                          lengths=lengths, bucket_boundaries=bucket_boundaries, drop_remainder=drop_remainder)
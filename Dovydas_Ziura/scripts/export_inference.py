@@ -0,0 +1,25 @@
+# export_inference.py
+# Export encoder + greedy decode as one SavedModel (and optionally a TFLite model).
+# The SavedModel's serving signature maps images (N, H, W, 1) in [0, 1] to ids and LaTeX strings.
+import argparse
+import pickle
+from tensorflow.keras.models import load_model
+from config import EXPORT_DIR, PREDICT_MODEL
+from inference_model import export_fused
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--model', type=str, default=PREDICT_MODEL or "model_gpu.h5", help='Trained .h5 model')
+parser.add_argument('--tokenizer', type=str, default="tokenizer.pkl", help='Tokenizer pickle saved by train.py')
+parser.add_argument('--out', type=str, default=EXPORT_DIR, help=f'SavedModel directory (default {EXPORT_DIR})')
+parser.add_argument('--tflite', type=str, default=None, help='Also write a single-image TFLite model (XNNPACK on CPU)')
+args = parser.parse_args()
+
+print(f"[INFO] Loading model: {args.model}")
+training_model = load_model(args.model, compile=False)
+with open(args.tokenizer, "rb") as f:
+    tokenizer = pickle.load(f)
+
+export_fused(training_model, tokenizer, args.out, tflite_path=args.tflite)
+print(f"[INFO] SavedModel written to {args.out}")
+if args.tflite:
+    print(f"[INFO] TFLite model written to {args.tflite}")
@@ -1,6 +1,8 @@
+import tensorflow as tf
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Input
 from model import build_model  # uses current model definition
+from config import IMAGE_SIZE, MAX_SEQ_LEN
 import numpy as np
 
 def build_inference_models(training_model):
@@ -62,6 +64,122 @@ def build_inference_models(training_model):
     return encoder_model, decoder_model
 
 
+def make_decoder_step(decoder_model):
+    """
+    Compiled single decoder step: (token, h1, c1, h2, c2) -> (logits, h1, c1, h2, c2).
+    The batch dimension is left open, so one trace serves any number of beams
+    and the Keras predict() overhead is skipped.
+    """
+    signature = [tf.TensorSpec(shape=inp.shape, dtype=inp.dtype) for inp in decoder_model.inputs]
+
+    @tf.function(input_signature=signature)
+    def step(token, h1, c1, h2, c2):
+        return decoder_model([token, h1, c1, h2, c2], training=False)
+
+    return step
+
+
+class FusedGreedyDecoder(tf.Module):
+    """
+    Encoder + full greedy decode in one graph call.
+    images (N, H, W, 1) float32 in [0, 1] -> ids (N, max_len) int32, EOS included and
+    0 after it, plus the LaTeX strings. The token loop is a tf.while_loop that stops once
+    every row has produced EOS, so there is no Python or predict() call per step.
+    Each step calls the LSTM cells directly instead of running the LSTM layers over a
+    length-1 sequence, which drops the inner RNN loop (and lets the graph convert to
+    TFLite builtins). Built on the training model's layers, so it always decodes with
+    the current weights.
+    """
+
+    def __init__(self, training_model, tokenizer, max_len=MAX_SEQ_LEN - 1):
+        super().__init__(name="fused_greedy_decoder")
+        from tokenizer import BOS_TOKEN, EOS_TOKEN
+        self.encoder_model, _ = build_inference_models(training_model)
+        self.embedding = training_model.get_layer("decoder_embedding")
+        self.layer_norm = training_model.get_layer("decoder_ln")
+        self.cell1 = training_model.get_layer("decoder_lstm1").cell
+        self.cell2 = training_model.get_layer("decoder_lstm2").cell
+        self.proj = training_model.get_layer("proj")
+        self.logits_layer = training_model.get_layer("decoder_logits")
+        self.bos_id = int(tokenizer.word_index[BOS_TOKEN])
+        self.eos_id = int(tokenizer.word_index[EOS_TOKEN])
+        self.max_len = int(max_len)
+        # id -> character table, BOS/EOS/padding map to ""
+        vocab_size = int(training_model.get_layer("decoder_logits").units)
+        chars = [""] * vocab_size
+        for idx, ch in tokenizer.index_word.items():
+            if idx < vocab_size and ch not in (BOS_TOKEN, EOS_TOKEN):
+                chars[idx] = ch
+        self.chars = tf.constant(chars)
+
+    def step(self, token, h1, c1, h2, c2):
+        # LayerNorm was built on (batch, time, features); run it on a length-1 sequence
+        emb = self.layer_norm(self.embedding(token[:, None]))[:, 0, :]
+        out1, (new_h1, new_c1) = self.cell1(emb, [h1, c1], training=False)
+        out2, (new_h2, new_c2) = self.cell2(out1, [h2, c2], training=False)
+        # Padding id is masked (mask_zero): the LSTM layers keep their state and emit zeros
+        keep = tf.not_equal(token, 0)[:, None]
+        out2 = tf.where(keep, out2, tf.zeros_like(out2))
+        logits = self.logits_layer(self.proj(out2))
+        return (logits,
+                tf.where(keep, new_h1, h1), tf.where(keep, new_c1, c1),
+                tf.where(keep, new_h2, h2), tf.where(keep, new_c2, c2))
+
+    @tf.function(input_signature=[tf.TensorSpec([None, IMAGE_SIZE[0], IMAGE_SIZE[1], 1], tf.float32, name="images")])
+    def decode_ids(self, images):
+        batch = tf.shape(images)[0]
+        h1, c1 = self.encoder_model(images, training=False)
+        # Second LSTM layer starts from zeros, as in training
+        h2 = tf.zeros([batch, self.cell2.units])
+        c2 = tf.zeros([batch, self.cell2.units])
+        token = tf.fill([batch], self.bos_id)
+        finished = tf.zeros([batch], dtype=tf.bool)
+        # Fixed-size id buffer (no TensorArray, so the loop also converts to TFLite builtins)
+        ids = tf.zeros([batch, self.max_len], dtype=tf.int32)
+        positions = tf.range(self.max_len)
+
+        def not_done(t, token, finished, h1, c1, h2, c2, ids):
+            return tf.logical_not(tf.reduce_all(finished))
+
+        def step(t, token, finished, h1, c1, h2, c2, ids):
+            logits, h1, c1, h2, c2 = self.step(token, h1, c1, h2, c2)
+            next_id = tf.argmax(logits, axis=-1, output_type=tf.int32)
+            next_id = tf.where(finished, tf.zeros_like(next_id), next_id)
+            ids = ids + tf.cast(tf.equal(positions, t), tf.int32)[None, :] * next_id[:, None]
+            finished = tf.logical_or(finished, tf.equal(next_id, self.eos_id))
+            return t + 1, next_id, finished, h1, c1, h2, c2, ids
+
+        loop = tf.while_loop(
+            not_done, step, [0, token, finished, h1, c1, h2, c2, ids],
+            maximum_iterations=self.max_len,
+        )
+        return loop[-1]
+
+    @tf.function(input_signature=[tf.TensorSpec([None, IMAGE_SIZE[0], IMAGE_SIZE[1], 1], tf.float32, name="images")])
+    def __call__(self, images):
+        ids = self.decode_ids(images)
+        latex = tf.strings.reduce_join(tf.gather(self.chars, ids), axis=-1)
+        return {"ids": ids, "latex": latex}
+
+
+def export_fused(training_model, tokenizer, out_dir, tflite_path=None, max_len=MAX_SEQ_LEN - 1):
+    """
+    Save the fused greedy decoder as a SavedModel (serving signature: images -> ids, latex).
+    With tflite_path also write a TFLite flatbuffer of decode_ids for single images;
+    the TFLite CPU interpreter runs its float ops through XNNPACK.
+    """
+    fused = FusedGreedyDecoder(training_model, tokenizer, max_len=max_len)
+    tf.saved_model.save(fused, out_dir, signatures={"serving_default": fused.__call__})
+    if tflite_path:
+        concrete = fused.decode_ids.get_concrete_function(
+            tf.TensorSpec([1, IMAGE_SIZE[0], IMAGE_SIZE[1], 1], tf.float32, name="images"))
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], fused)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+        with open(tflite_path, "wb") as f:
+            f.write(converter.convert())
+    return fused
+
+
 BOS_TOKEN = "<s>"
 EOS_TOKEN = "</s>"
 
@@ -4,7 +4,7 @@ import numpy as np
 import pickle
 import argparse
 from tokenizer import sequence_to_text, BOS_TOKEN, EOS_TOKEN
-from inference_model import build_inference_models
+from inference_model import build_inference_models, make_decoder_step
 from dataset import preprocess_image, IMG_SIZE  # unified preprocessing
 import re
 from config import (
@@ -20,34 +20,57 @@ from config import (
     PREDICT_MIN_LEN,
     PREDICT_REPEAT_PENALTY,
     PREDICT_NGRAM_REPEAT,
+    PREDICT_BATCH_SIZE,
+    PREDICT_WORKERS,
 )
 
 # -----------------------------
-# Step-by-step greedy decoding function
+# Step-by-step decoding functions
 # -----------------------------
 def softmax(x, temperature=1.0):
+    """Softmax over the last axis (one row per beam)."""
     x = np.asarray(x, dtype=np.float64)
     x = x / max(1e-6, float(temperature))
-    x = x - np.max(x)
+    x = x - np.max(x, axis=-1, keepdims=True)
     ex = np.exp(x)
-    return ex / np.sum(ex)
+    return ex / np.sum(ex, axis=-1, keepdims=True)
 
-def greedy_decode(encoder_states, decoder_model, start_id, end_id, max_len=150):
-    h1, c1, h2, c2 = encoder_states
-    decoded_ids = [start_id]
+def greedy_decode_batch(encoder_states, decoder_step, start_id, end_id, max_len=150):
+    """
+    Greedy decoding of many images in lockstep: one decoder call per step for
+    every image that has not produced EOS yet. Returns one id list per image.
+    """
+    # copy: the rows are overwritten in place while decoding
+    states = [np.array(s, dtype=np.float32, copy=True) for s in encoder_states]
+    n = len(states[0])
+    decoded = [[start_id] for _ in range(n)]
+    live = np.arange(n)
     for _ in range(max_len):
-        token_input = np.array([[decoded_ids[-1]]])
-        logits, h1, c1, h2, c2 = decoder_model.predict([token_input, h1, c1, h2, c2], verbose=0)
-        logits_step = logits[0, 0] if logits.ndim == 3 else logits[0]
-        next_id = int(np.argmax(logits_step))
-        decoded_ids.append(next_id)
-        if next_id == end_id:
+        if len(live) == 0:
             break
-    return decoded_ids
+        token_input = np.array([[decoded[i][-1]] for i in live], dtype=np.int32)
+        out = decoder_step(token_input, *(s[live] for s in states))
+        logits = np.asarray(out[0]).reshape(len(live), -1)
+        for s, ns in zip(states, out[1:]):
+            s[live] = np.asarray(ns)
+        next_ids = np.argmax(logits, axis=1)
+        for i, next_id in zip(live, next_ids):
+            decoded[i].append(int(next_id))
+        live = live[next_ids != end_id]
+    return decoded
 
-def beam_decode(
+def greedy_decode(encoder_states, decoder_step, start_id, end_id, max_len=150):
+    return greedy_decode_batch(encoder_states, decoder_step, start_id, end_id, max_len)[0]
+
+def _top_k(probs, k):
+    """Indices of the k largest probabilities per row, largest first."""
+    top = np.argpartition(probs, -k, axis=1)[:, -k:]
+    order = np.argsort(-np.take_along_axis(probs, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def beam_decode_batch(
     encoder_states,
-    decoder_model,
+    decoder_step,
     start_id,
     end_id,
     max_len=150,
@@ -60,82 +83,133 @@ def beam_decode(
     topk=None,
     topp=None,
     min_len=5,
+    brace_ids=None,
 ):
-    h1, c1, h2, c2 = encoder_states
-    beams = [{
-        'seq': [start_id],
-        'logp': 0.0,
-        'states': (h1, c1, h2, c2),
-        'finished': False
-    }]
-    finished = []
+    """
+    Beam search for many images at once; every live beam of every image is
+    decoded in one batched decoder step. Beams are kept as arrays (owner image,
+    token matrix, lengths, log-probs, LSTM states); expansion, penalties and
+    scoring run over the beam dimension. Candidates are ranked per image in the
+    same order as the original per-beam loop (stable sort), so each image gets
+    the sequence the single-image search would pick. An image whose beams have
+    all finished drops out of the batch.
+    brace_ids: optional (open_id, close_id) for the unbalanced-brace penalty.
+    Returns one id list per image.
+    """
+    open_id, close_id = brace_ids if brace_ids else (None, None)
+    count_braces = bool(open_id and close_id)
+
+    # copy: the rows are overwritten in place while decoding
+    states = [np.array(s, dtype=np.float32, copy=True) for s in encoder_states]
+    n = len(states[0])
+    group = np.arange(n)
+    seqs = np.zeros((n, max_len + 1), dtype=np.int64)
+    seqs[:, 0] = start_id
+    lengths = np.ones(n, dtype=np.int64)
+    logp = np.zeros(n, dtype=np.float64)
+    finished = np.zeros(n, dtype=bool)
+    opens = np.zeros(n, dtype=np.int64)
+    closes = np.zeros(n, dtype=np.int64)
+    results = [None] * n
+    # (len(seq) - 1) ** length_norm per sequence length, with Python floats as before
+    length_norms = np.array([max(1, L - 1) ** length_norm for L in range(max_len + 2)])
+
+    def final_choice(idx):
+        # best beam per image, first one on ties
+        final = (logp[idx] + np.where(finished[idx], eos_bonus, 0.0)) / length_norms[lengths[idx]]
+        for g in np.unique(group[idx]):
+            members = idx[group[idx] == g]
+            best = members[int(np.argmax(final[group[idx] == g]))]
+            results[g] = seqs[best, :lengths[best]].tolist()
+
     for _ in range(max_len):
-        new_beams = []
-        for b in beams:
-            if b['finished']:
-                new_beams.append(b)
-                continue
-            last_id = b['seq'][-1]
-            token_input = np.array([[last_id]])
-            logits, nh1, nc1, nh2, nc2 = decoder_model.predict([token_input, b['states'][0], b['states'][1], b['states'][2], b['states'][3]], verbose=0)
-            logits_step = logits[0, 0] if logits.ndim == 3 else logits[0]
-            probs = softmax(logits_step, temperature=temperature)
-            # optional nucleus/top-k filtering
-            if topk is not None and topk > 0:
-                top_idx = np.argpartition(probs, -topk)[-topk:]
-                top_idx = top_idx[np.argsort(-probs[top_idx])]
-            elif topp is not None and 0 < topp < 1.0:
-                sorted_idx = np.argsort(-probs)
-                cum = 0.0
-                sel = []
-                for idx in sorted_idx:
-                    sel.append(idx)
-                    cum += probs[idx]
-                    if cum >= topp:
-                        break
-                top_idx = np.array(sel, dtype=np.int64)
-            else:
-                top_idx = np.argpartition(probs, -beam_size)[-beam_size:]
-                top_idx = top_idx[np.argsort(-probs[top_idx])]
-            for idx in top_idx:
-                seq = b['seq'] + [int(idx)]
-                # apply repeat penalty for immediate repeats and simple bi-gram loops
-                rp = 0.0
-                if len(seq) >= 2 and seq[-1] == seq[-2]:
-                    rp += repeat_penalty
-                if len(seq) >= 3 and seq[-1] == seq[-3]:
-                    rp += repeat_penalty * 0.5
-                nb = {
-                    'seq': seq,
-                    'logp': b['logp'] + float(np.log(probs[int(idx)] + 1e-12)) - rp,
-                    'states': (nh1, nc1, nh2, nc2),
-                    'finished': (int(idx) == end_id and len(seq) >= min_len)
-                }
-                new_beams.append(nb)
-        def score(b):
-            L = max(1, len(b['seq']) - 1)
-            bonus = eos_bonus if b['finished'] else 0.0
-            # simple brace balance penalty: count of '{' vs '}' tokens if available in tokenizer
-            brace_pen = 0.0
-            try:
-                open_id = tokenizer.word_index.get('{')
-                close_id = tokenizer.word_index.get('}')
-                if open_id and close_id:
-                    opens = sum(1 for t in b['seq'] if t == open_id)
-                    closes = sum(1 for t in b['seq'] if t == close_id)
-                    if opens > closes:
-                        brace_pen += 0.05 * (opens - closes)
-            except Exception:
-                pass
-            return (b['logp'] + bonus - brace_pen) / (L ** length_norm)
-        new_beams.sort(key=score, reverse=True)
-        beams = new_beams[:beam_size]
-        if all(b['finished'] for b in beams):
-            finished.extend(beams)
+        live = np.flatnonzero(~finished)
+        last = seqs[live, lengths[live] - 1].astype(np.int32)[:, None]
+        out = decoder_step(last, *(s[live] for s in states))
+        logits = np.asarray(out[0]).reshape(len(live), -1)
+        step_states = [np.asarray(s) for s in out[1:]]
+        probs = softmax(logits, temperature=temperature)
+        vocab = probs.shape[1]
+
+        # expansions per live beam, most probable first; argpartition/argsort per row
+        # break ties (e.g. the flat distribution after a padding token) like the 1-D calls did
+        if topk is not None and topk > 0:
+            ranked = _top_k(probs, min(topk, vocab))
+            counts = np.full(len(live), ranked.shape[1])
+        elif topp is not None and 0 < topp < 1.0:
+            ranked = np.argsort(-probs, axis=1)
+            cum = np.cumsum(np.take_along_axis(probs, ranked, axis=1), axis=1)
+            reached = cum >= topp
+            counts = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, vocab)
+        else:
+            ranked = _top_k(probs, min(beam_size, vocab))
+            counts = np.full(len(live), ranked.shape[1])
+        width = ranked.shape[1]
+        rows, ranks = np.nonzero(np.arange(width)[None, :] < counts[:, None])
+        parent = live[rows]
+        token = ranked[rows, ranks]
+
+        # repeat penalty for immediate repeats and simple bi-gram loops
+        plen = lengths[parent]
+        prev1 = seqs[parent, plen - 1]
+        prev2 = np.where(plen >= 2, seqs[parent, np.maximum(plen - 2, 0)], -1)
+        rp = 0.0 + np.where(token == prev1, repeat_penalty, 0.0)
+        rp = np.where(token == prev2, rp + repeat_penalty * 0.5, rp)
+
+        # candidates: finished beams carry over, then expansions; original loop order is (beam, rank)
+        done = np.flatnonzero(finished)
+        src = np.concatenate([done, parent])
+        step_row = np.concatenate([np.full(len(done), -1), rows])
+        cand_token = np.concatenate([np.full(len(done), -1), token])
+        cand_len = np.concatenate([lengths[done], plen + 1])
+        cand_logp = np.concatenate([logp[done], logp[parent] + np.log(probs[rows, token] + 1e-12) - rp])
+        cand_fin = np.concatenate([finished[done], (token == end_id) & (plen + 1 >= min_len)])
+        cand_opens = np.concatenate([opens[done], opens[parent] + (token == open_id)])
+        cand_closes = np.concatenate([closes[done], closes[parent] + (token == close_id)])
+        order = np.lexsort((np.concatenate([np.zeros(len(done), dtype=np.int64), ranks]), src))
+
+        bonus = np.where(cand_fin, eos_bonus, 0.0)
+        brace_pen = np.zeros(len(src))
+        if count_braces:
+            brace_pen = np.where(cand_opens > cand_closes, 0.0 + 0.05 * (cand_opens - cand_closes), 0.0)
+        norm = length_norms[cand_len]
+        score = ((cand_logp + bonus - brace_pen) / norm)[order]
+
+        # beam_size best per image (lexsort is stable, so ties keep loop order)
+        cand_group = group[src][order]
+        by_score = np.lexsort((-score, cand_group))
+        sorted_group = cand_group[by_score]
+        within = np.arange(len(by_score)) - np.searchsorted(sorted_group, sorted_group, side="left")
+        keep = order[by_score[within < beam_size]]
+
+        kept_row = step_row[keep]
+        new = kept_row >= 0
+        seqs = seqs[src[keep]]
+        seqs[np.flatnonzero(new), cand_len[keep][new] - 1] = cand_token[keep][new]
+        states = [np.where(new[:, None], ns[np.maximum(kept_row, 0)], s[src[keep]])
+                  for s, ns in zip(states, step_states)]
+        group, lengths, logp = group[src[keep]], cand_len[keep], cand_logp[keep]
+        finished, opens, closes = cand_fin[keep], cand_opens[keep], cand_closes[keep]
+
+        # images whose beams all finished are done
+        open_beams = np.bincount(group[~finished], minlength=n)
+        complete = (open_beams[group] == 0)
+        if complete.any():
+            final_choice(np.flatnonzero(complete))
+            stay = ~complete
+            seqs, group, lengths, logp = seqs[stay], group[stay], lengths[stay], logp[stay]
+            finished, opens, closes = finished[stay], opens[stay], closes[stay]
+            states = [s[stay] for s in states]
+        if len(group) == 0:
             break
-    candidates = finished if finished else beams
-    best = max(candidates, key=lambda b: (b['logp'] + (eos_bonus if b['finished'] else 0.0)) / (max(1, len(b['seq']) - 1) ** length_norm))
-    return best['seq']
+
+    if len(group):
+        final_choice(np.arange(len(group)))
+    return results
+
+def beam_decode(encoder_states, decoder_step, start_id, end_id, **kwargs):
+    """Single-image beam search; see beam_decode_batch for the options."""
+    return beam_decode_batch(encoder_states, decoder_step, start_id, end_id, **kwargs)[0]
 
 # -----------------------------
 # Load trained model
@@ -173,6 +247,8 @@ parser.add_argument('--topp', type=float, default=PREDICT_TOPP, help='Nucleus (t
 parser.add_argument('--min-len', type=int, default=PREDICT_MIN_LEN, help='Minimum generated length before allowing EOS')
 parser.add_argument('--repeat-penalty', type=float, default=PREDICT_REPEAT_PENALTY, help='Penalty weight for repeats')
 parser.add_argument('--ngram-repeat', type=int, default=PREDICT_NGRAM_REPEAT, help='n-gram size for repeat penalty (>=3)')
+parser.add_argument('--batch-size', type=int, default=PREDICT_BATCH_SIZE, help='Images encoded and decoded together in batch mode')
+parser.add_argument('--workers', type=int, default=PREDICT_WORKERS, help='Threads for image preprocessing in batch mode')
 args = parser.parse_args()
 if args.model:
     print(f"[INFO] Loading model override: {args.model}")
@@ -182,6 +258,7 @@ else:
     training_model = load_latest_model()
 print("[INFO] Building inference models...")
 encoder_model, decoder_model = build_inference_models(training_model)
+decoder_step = make_decoder_step(decoder_model)
 
 print("[INFO] Loading tokenizer...")
 with open("tokenizer.pkl", "rb") as f:
@@ -191,23 +268,15 @@ print("[INFO] Tokenizer loaded. vocab_size=", getattr(tokenizer, "num_words", No
 # Safe retrieval of BOS/EOS ids
 start_id = tokenizer.word_index.get(BOS_TOKEN, 1)
 end_id = tokenizer.word_index.get(EOS_TOKEN, 2)
+brace_ids = (tokenizer.word_index.get('{'), tokenizer.word_index.get('}'))
 
-def decode_one(img_path):
-    print(f"[INFO] Preprocessing image: {img_path}")
-    arr = preprocess_image(img_path)
-    arr = np.expand_dims(arr, axis=0)
-    print(f"[DEBUG] IMG_SIZE (from dataset.py): {IMG_SIZE}")
-    print(f"[DEBUG] preprocessed image shape: {arr.shape}, dtype: {arr.dtype}, min/max: {float(arr.min())}/{float(arr.max())}")
-
-    # Encoder forward pass
-    h1, c1 = encoder_model.predict(arr)
+def decode_states(h1, c1):
+    """Decode encoder states of N images in lockstep; returns N id lists."""
     h2, c2 = np.zeros_like(h1), np.zeros_like(c1)
-
-    # Decode
     if args.beam > 1:
-        ids = beam_decode(
+        return beam_decode_batch(
             encoder_states=(h1, c1, h2, c2),
-            decoder_model=decoder_model,
+            decoder_step=decoder_step,
             start_id=start_id,
             end_id=end_id,
             max_len=MAX_SEQ_LEN,
@@ -219,16 +288,17 @@ def decode_one(img_path):
             min_len=args.min_len,
             repeat_penalty=args.repeat_penalty,
             ngram_repeat=args.ngram_repeat,
+            brace_ids=brace_ids,
         )
-    else:
-        ids = greedy_decode(
-            encoder_states=(h1, c1, h2, c2),
-            decoder_model=decoder_model,
-            start_id=start_id,
-            end_id=end_id,
-            max_len=MAX_SEQ_LEN,
-        )
+    return greedy_decode_batch(
+        encoder_states=(h1, c1, h2, c2),
+        decoder_step=decoder_step,
+        start_id=start_id,
+        end_id=end_id,
+        max_len=MAX_SEQ_LEN,
+    )
 
+def ids_to_latex(ids):
     # Convert to LaTeX
     ids_no_bos = ids[1:]
     latex_text = sequence_to_text(tokenizer, ids_no_bos)
@@ -236,9 +306,60 @@ def decode_one(img_path):
     latex_text_clean = latex_text_clean.replace(BOS_TOKEN, "").replace(EOS_TOKEN, "")
     return latex_text_clean
 
+def decode_one(img_path):
+    print(f"[INFO] Preprocessing image: {img_path}")
+    arr = preprocess_image(img_path)
+    arr = np.expand_dims(arr, axis=0)
+    print(f"[DEBUG] IMG_SIZE (from dataset.py): {IMG_SIZE}")
+    print(f"[DEBUG] preprocessed image shape: {arr.shape}, dtype: {arr.dtype}, min/max: {float(arr.min())}/{float(arr.max())}")
+
+    # Encoder forward pass
+    h1, c1 = encoder_model.predict(arr)
+    return ids_to_latex(decode_states(h1, c1)[0])
+
+def _load_image(path):
+    try:
+        return preprocess_image(path), None
+    except Exception as e:
+        return None, e
+
+def _collect(chunk, futures):
+    loaded = [f.result() for f in futures]
+    return chunk, [img for img, _ in loaded], [err for _, err in loaded]
+
+def preprocessed_batches(paths, batch_size, workers, prefetch=2):
+    """
+    Yield (paths, images, errors) per batch. Images are loaded in a thread pool;
+    up to `prefetch` batches are queued ahead so PIL work overlaps decoding.
+    """
+    chunks = (paths[i:i + batch_size] for i in range(0, len(paths), batch_size))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        queue = deque()
+        for chunk in chunks:
+            queue.append((chunk, [pool.submit(_load_image, p) for p in chunk]))
+            if len(queue) <= prefetch:
+                continue
+            yield _collect(*queue.popleft())
+        while queue:
+            yield _collect(*queue.popleft())
+
+def predict_batches(paths, batch_size, workers):
+    """Yield (path, prediction, error) in input order, one encoder call and one lockstep decode per batch."""
+    for chunk, images, errors in preprocessed_batches(paths, batch_size, workers):
+        ok = [i for i, err in enumerate(errors) if err is None]
+        preds = {}
+        if ok:
+            h1, c1 = encoder_model.predict_on_batch(np.stack([images[i] for i in ok]))
+            for i, ids in zip(ok, decode_states(np.asarray(h1), np.asarray(c1))):
+                preds[i] = ids_to_latex(ids)
+        for i, p in enumerate(chunk):
+            yield p, preds.get(i, ""), errors[i]
+
 import os
 import glob as _glob
 import csv
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 def build_batch_list():
     paths = []
@@ -263,28 +384,32 @@ def build_batch_list():
 batch_paths = build_batch_list()
 
 if batch_paths:
-    print(f"[INFO] Running batch prediction on {len(batch_paths)} images")
-    rows = []
-    for p in batch_paths:
-        try:
-            pred = decode_one(p)
-            print(f"Decoded LaTeX ({p}): {pred}")
-            rows.append({"filename": p, "prediction": pred, "ground_truth": ""})
-        except Exception as e:
-            print(f"[WARN] Failed to decode {p}: {e}")
-            rows.append({"filename": p, "prediction": "", "ground_truth": "", "error": str(e)})
-
+    print(f"[INFO] Running batch prediction on {len(batch_paths)} images "
+          f"(batch size {args.batch_size}, {args.workers} preprocessing workers)")
+    f = writer = None
     if args.csv:
         try:
-            with open(args.csv, 'w', newline='', encoding='utf-8') as f:
-                fieldnames = ["filename", "prediction", "ground_truth"]
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                for r in rows:
-                    writer.writerow({k: r.get(k, "") for k in fieldnames})
-            print(f"[INFO] Saved batch predictions to {args.csv}")
+            # rows are streamed into the CSV as each batch finishes
+            f = open(args.csv, 'w', newline='', encoding='utf-8')
+            writer = csv.DictWriter(f, fieldnames=["filename", "prediction", "ground_truth"])
+            writer.writeheader()
         except Exception as e:
             print(f"[WARN] Could not write CSV {args.csv}: {e}")
+            f = writer = None
+    try:
+        for n, (p, pred, err) in enumerate(predict_batches(batch_paths, args.batch_size, args.workers), 1):
+            if err is not None:
+                print(f"[WARN] Failed to decode {p}: {err}")
+            else:
+                print(f"Decoded LaTeX ({p}): {pred}")
+            if writer is not None:
+                writer.writerow({"filename": p, "prediction": pred, "ground_truth": ""})
+                if n % args.batch_size == 0:
+                    f.flush()
+    finally:
+        if f is not None:
+            f.close()
+            print(f"[INFO] Saved batch predictions to {args.csv}")
 else:
     # Single-image mode
     latex_text_clean = decode_one(args.image)
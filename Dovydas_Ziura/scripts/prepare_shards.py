@@ -0,0 +1,20 @@
+# prepare_shards.py
+# One-time preprocessing: MathWriting -> resized uint8 images + int32 token sequences
+# in memory-mappable .npy shards. Train from them with: python train.py --shards
+import argparse
+import time
+from config import DATA_LIMIT, SHARD_DIR, SHARD_SIZE
+from dataset import write_shards
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--out', default=SHARD_DIR, help=f'Output directory (default {SHARD_DIR})')
+parser.add_argument('--data-limit', type=int, default=DATA_LIMIT, help='Number of samples to write (0 = whole dataset)')
+parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='Samples per shard file')
+args = parser.parse_args()
+
+start = time.time()
+meta = write_shards(args.out, limit=args.data_limit or None, shard_size=args.shard_size)
+counts = {split: sum(s["count"] for s in shards) for split, shards in meta["shards"].items()}
+print(f"[INFO] Wrote {counts} samples to {args.out} in {time.time() - start:.1f}s")
+if meta["holdout"]:
+    print(f"[INFO] No val split in the source; {len(meta['holdout'])} train samples held out for validation")
@@ -1,11 +1,12 @@
 from model import build_model
 from tokenizer import create_char_tokenizer, texts_to_sequences
-from dataset import load_mathwriting, preprocess_image, create_tf_dataset
+from dataset import load_mathwriting, preprocess_image, create_tf_dataset, ShardSet, create_shard_dataset
+from dataset import length_buckets, sequence_lengths
 import tensorflow as tf
 import pickle
 from tensorflow.keras.callbacks import ModelCheckpoint, ReduceLROnPlateau, EarlyStopping
 from tensorflow.keras.mixed_precision import set_global_policy
-from config import MAX_SEQ_LEN, BATCH_SIZE, DATA_LIMIT, SEED
+from config import MAX_SEQ_LEN, BATCH_SIZE, DATA_LIMIT, SEED, SHARD_DIR
 from inference_model import decode_sequence, build_inference_models
 import argparse
 import types
@@ -33,44 +34,80 @@ print("Num GPUs Available: ", len(gpus))
 if len(gpus) == 0:
     print("WARNING: No GPU detected. Training will run on CPU.")
 
-# -------------------------------
-# Load dataset (limit for speed)
-# -------------------------------
-# Allow CLI override for data limit (set after args parsing). Temporarily use config; will reassign below.
-(train_images, train_latex), (val_images, val_latex) = load_mathwriting(limit=DATA_LIMIT)
+parser = argparse.ArgumentParser()
+parser.add_argument('--scheduled-sampling', action='store_true', help='Enable scheduled sampling')
+parser.add_argument('--ss-prob', type=float, default=0.3, help='Scheduled sampling probability')
+parser.add_argument('--ss-no-grad', action='store_true',
+                    help='Run the scheduled-sampling prediction pass outside the gradient tape')
+parser.add_argument('--batch-size', type=int, default=None, help='Override batch size (default from config)')
+parser.add_argument('--data-limit', type=int, default=None, help='Override dataset size limit (default from config)')
+parser.add_argument('--epochs', type=int, default=10, help='Number of training epochs')
+parser.add_argument('--buckets', type=int, default=0,
+                    help='Batch by sequence length in this many buckets, padded to the bucket edge (0 = pad to MAX_SEQ_LEN)')
+parser.add_argument('--shards', nargs='?', const=SHARD_DIR, default=None,
+                    help=f'Train from preprocessed shards (prepare_shards.py); default dir {SHARD_DIR}')
+args = parser.parse_args()
 
-# If no val split, create one
-if len(val_images) == 0:
-    from sklearn.model_selection import train_test_split
-    train_images, val_images, train_latex, val_latex = train_test_split(
-        train_images, train_latex, test_size=0.1, random_state=SEED
-    )
+batch_size = args.batch_size if args.batch_size is not None else BATCH_SIZE
+data_limit = args.data_limit if args.data_limit is not None else DATA_LIMIT
+
+if args.shards:
+    # -------------------------------
+    # Stream from memory-mapped shards (no HF load, no per-run preprocessing)
+    # -------------------------------
+    shards = ShardSet(args.shards)
+    tokenizer = shards.tokenizer
+    buckets = length_buckets(shards.lengths(*shards.rows("train", args.data_limit)), args.buckets)
+    train_dataset = create_shard_dataset(shards, "train", batch_size=batch_size, limit=args.data_limit,
+                                         bucket_boundaries=buckets)
+    val_dataset   = create_shard_dataset(shards, "val", batch_size=batch_size, limit=args.data_limit, shuffle=False,
+                                         bucket_boundaries=buckets, drop_remainder=not buckets)
+    # A few decoded validation images for the preview callback / final decode
+    val_source, val_rows = shards.rows("val")
+    val_rows = val_rows[:3]
+    preview_images, _ = shards.take(val_source, val_rows)
+    processed_val_images = [preprocess_image(img) for img in preview_images]
+    val_latex = shards.texts(val_source, val_rows)
+    print(f"[INFO] Streaming from shards in {args.shards}: "
+          f"{len(shards.rows('train', args.data_limit)[1])} train / {len(shards.rows('val', args.data_limit)[1])} val samples")
+else:
+    # -------------------------------
+    # Load dataset (limit for speed)
+    # -------------------------------
+    (train_images, train_latex), (val_images, val_latex) = load_mathwriting(limit=data_limit, as_uint8=True)
+
+    # If no val split, create one
+    if len(val_images) == 0:
+        from sklearn.model_selection import train_test_split
+        train_images, val_images, train_latex, val_latex = train_test_split(
+            train_images, train_latex, test_size=0.1, random_state=SEED
+        )
+
+    # -------------------------------
+    # Tokenizer
+    # -------------------------------
+    tokenizer = create_char_tokenizer(train_latex)
+    train_sequences = texts_to_sequences(tokenizer, train_latex, max_len=MAX_SEQ_LEN)
+    val_sequences = texts_to_sequences(tokenizer, val_latex, max_len=MAX_SEQ_LEN)
+
+    # -------------------------------
+    # Streaming TF datasets (images stay uint8, normalized per batch)
+    # -------------------------------
+    buckets = length_buckets(sequence_lengths(train_sequences), args.buckets)
+    train_dataset = create_tf_dataset(train_images, train_sequences, batch_size=batch_size, bucket_boundaries=buckets)
+    val_dataset   = create_tf_dataset(val_images, val_sequences, batch_size=batch_size, bucket_boundaries=buckets,
+                                      drop_remainder=not buckets)
+    # A few float images for the preview callback / final decode
+    processed_val_images = [preprocess_image(img) for img in val_images[:3]]
 
-# -------------------------------
-# Tokenizer
-# -------------------------------
-tokenizer = create_char_tokenizer(train_latex)
-train_sequences = texts_to_sequences(tokenizer, train_latex, max_len=MAX_SEQ_LEN)
-val_sequences = texts_to_sequences(tokenizer, val_latex, max_len=MAX_SEQ_LEN)
 vocab_size = len(tokenizer.word_index) + 1  # include padding index
 from tokenizer import BOS_TOKEN, EOS_TOKEN
 pad_id = 0
 bos_id = tokenizer.word_index.get(BOS_TOKEN, None)
 eos_id = tokenizer.word_index.get(EOS_TOKEN, None)
 print(f"[INFO] Vocab size: {vocab_size}, PAD={pad_id}, BOS={bos_id}, EOS={eos_id}")
-
-# -------------------------------
-# Preprocess images ONCE (CPU)
-# -------------------------------
-processed_train_images = [preprocess_image(img) for img in train_images]
-processed_val_images = [preprocess_image(img) for img in val_images]
-
-# -------------------------------
-# Create ultra-fast TF datasets
-# -------------------------------
-# Batch size from config; may be overridden by CLI after args parsing.
-train_dataset = create_tf_dataset(processed_train_images, train_sequences, batch_size=BATCH_SIZE)
-val_dataset   = create_tf_dataset(processed_val_images, val_sequences, batch_size=BATCH_SIZE)
+if buckets:
+    print(f"[INFO] Length buckets (padded widths): {buckets + [MAX_SEQ_LEN]}")
 
 # -------------------------------
 # Debug: Inspect one batch (after CLI overrides applied)
@@ -114,24 +151,31 @@ early_stop = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=
 # -------------------------------
 # Scheduled sampling: simple generator and preview callback
 # -------------------------------
-def make_scheduled_train_step(ss_prob: float):
+def make_scheduled_train_step(ss_prob: float, no_grad_first_pass: bool = False):
     ss_prob = tf.constant(ss_prob, dtype=tf.float32)
 
+    def sampled_inputs(self, imgs, dec_in):
+        # Teacher-forced pass to get per-step predictions
+        logits_tf = self([imgs, dec_in], training=True)
+        pred_ids = tf.argmax(logits_tf, axis=-1, output_type=tf.int32)
+        # Random mask for scheduled sampling (exclude t=0 to keep BOS)
+        rand = tf.random.uniform(tf.shape(dec_in), 0.0, 1.0)
+        mask = tf.less(rand, ss_prob)
+        batch = tf.shape(dec_in)[0]
+        false_col = tf.zeros((batch, 1), dtype=tf.bool)
+        mask = tf.concat([false_col, mask[:, 1:]], axis=1)
+        # Mix predicted ids into decoder inputs
+        return tf.where(mask, pred_ids, dec_in)
+
     @tf.function
     def train_step(self, data):
         (imgs, dec_in), dec_out = data
+        if no_grad_first_pass:
+            # argmax cuts the gradient anyway; outside the tape the first pass is not recorded
+            new_dec_in = sampled_inputs(self, imgs, dec_in)
         with tf.GradientTape() as tape:
-            # Teacher-forced pass to get per-step predictions
-            logits_tf = self([imgs, dec_in], training=True)
-            pred_ids = tf.argmax(logits_tf, axis=-1, output_type=tf.int32)
-            # Random mask for scheduled sampling (exclude t=0 to keep BOS)
-            rand = tf.random.uniform(tf.shape(dec_in), 0.0, 1.0)
-            mask = tf.less(rand, ss_prob)
-            batch = tf.shape(dec_in)[0]
-            false_col = tf.zeros((batch, 1), dtype=tf.bool)
-            mask = tf.concat([false_col, mask[:, 1:]], axis=1)
-            # Mix predicted ids into decoder inputs
-            new_dec_in = tf.where(mask, pred_ids, dec_in)
+            if not no_grad_first_pass:
+                new_dec_in = sampled_inputs(self, imgs, dec_in)
             # Final pass for loss/gradients
             logits = self([imgs, new_dec_in], training=True)
             loss = self.compiled_loss(dec_out, logits, regularization_losses=self.losses)
@@ -151,51 +195,27 @@ class PreviewDecodeCallback(tf.keras.callbacks.Callback):
         self.val_texts = val_texts
         self.tokenizer = tokenizer
         self.max_len = max_len
+        self.decoder = None
 
     def on_epoch_end(self, epoch, logs=None):
         try:
-            from inference_model import build_inference_models, decode_sequence
-            tm = self.model
-            enc, dec = build_inference_models(tm)
-            print(f"\n[PREVIEW] Epoch {epoch+1}: decoding 3 validation samples...")
-            for i in range(min(3, len(self.val_images_np))):
+            # Built once on the training model's layers, so later epochs reuse the traced graph
+            if self.decoder is None:
+                from inference_model import FusedGreedyDecoder
+                self.decoder = FusedGreedyDecoder(self.model, self.tokenizer, max_len=self.max_len-1)
+            n = min(3, len(self.val_images_np))
+            print(f"\n[PREVIEW] Epoch {epoch+1}: decoding {n} validation samples...")
+            if n == 0:
+                return
+            preds = self.decoder(tf.constant(np.stack(self.val_images_np[:n]), dtype=tf.float32))["latex"].numpy()
+            for i in range(n):
                 gt = self.val_texts[i]
-                img = self.val_images_np[i]
-                pred = decode_sequence(img, enc, dec, self.tokenizer, max_len=self.max_len-1)
+                pred = preds[i].decode("utf-8")
                 print(f"[VAL {i}] GT: {gt}")
                 print(f"[VAL {i}] PR: {pred}")
         except Exception as e:
             print("[PREVIEW] Skipped due to error:", e)
 
-parser = argparse.ArgumentParser()
-parser.add_argument('--scheduled-sampling', action='store_true', help='Enable scheduled sampling')
-parser.add_argument('--ss-prob', type=float, default=0.3, help='Scheduled sampling probability')
-parser.add_argument('--batch-size', type=int, default=None, help='Override batch size (default from config)')
-parser.add_argument('--data-limit', type=int, default=None, help='Override dataset size limit (default from config)')
-parser.add_argument('--epochs', type=int, default=10, help='Number of training epochs')
-args = parser.parse_args()
-
-# If CLI overrides are provided, rebuild datasets accordingly
-if args.data_limit is not None:
-    (train_images, train_latex), (val_images, val_latex) = load_mathwriting(limit=args.data_limit)
-    # Re-tokenize and preprocess if data changed
-    # If no val split, create one
-    if len(val_images) == 0:
-        from sklearn.model_selection import train_test_split
-        train_images, val_images, train_latex, val_latex = train_test_split(
-            train_images, train_latex, test_size=0.1, random_state=SEED
-        )
-
-    tokenizer = create_char_tokenizer(train_latex)
-    train_sequences = texts_to_sequences(tokenizer, train_latex, max_len=MAX_SEQ_LEN)
-    val_sequences = texts_to_sequences(tokenizer, val_latex, max_len=MAX_SEQ_LEN)
-    processed_train_images = [preprocess_image(img) for img in train_images]
-    processed_val_images = [preprocess_image(img) for img in val_images]
-
-if args.batch_size is not None:
-    train_dataset = create_tf_dataset(processed_train_images, train_sequences, batch_size=args.batch_size)
-    val_dataset   = create_tf_dataset(processed_val_images, val_sequences, batch_size=args.batch_size)
-
 # Inspect after final dataset construction
 _inspect_one_batch(train_dataset, tokenizer)
 
@@ -207,9 +227,9 @@ preview_cb = PreviewDecodeCallback(
 )
 
 if args.scheduled_sampling:
-    print(f"[INFO] Using scheduled sampling with p={args.ss_prob}")
+    print(f"[INFO] Using scheduled sampling with p={args.ss_prob}" + (" (prediction pass without gradients)" if args.ss_no_grad else ""))
     # Monkey-patch train_step with a vectorized scheduled sampling implementation
-    model.train_step = make_scheduled_train_step(args.ss_prob).__get__(model, tf.keras.Model)
+    model.train_step = make_scheduled_train_step(args.ss_prob, args.ss_no_grad).__get__(model, tf.keras.Model)
 
 history = model.fit(
     train_dataset,
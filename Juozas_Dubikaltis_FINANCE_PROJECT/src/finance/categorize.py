@@ -1,67 +1,139 @@
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
-def _contains_any(text: str, keywords: list[str]) -> bool:
-    t = str(text).upper()
-    return any(k.upper() in t for k in keywords)
+from .models import ReportSummary
+
+# keyword groups; expense categories get ids CATEGORY_BASE + position in config
+INVESTMENT, EMPLOYER, CATEGORY_BASE = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class KeywordMatcher:
+    """All literal config keywords compiled into one regex that is run once per distinct text."""
+    pattern: re.Pattern | None
+    implied: dict[str, frozenset[int]]  # matched keyword -> groups of every keyword it contains
+    always: frozenset[int]  # groups with an empty keyword, which matches any text
+    categories: tuple[str, ...]
+
+    def hits(self, text: str) -> frozenset[int]:
+        found = set(self.always)
+        if self.pattern is not None:
+            for kw in set(self.pattern.findall(text.upper())):
+                found |= self.implied[kw]
+        return frozenset(found)
+
+    def scan(self, texts: pd.Series) -> tuple[np.ndarray, list[frozenset[int]]]:
+        """Row codes into the distinct texts plus the keyword groups hit by each distinct text."""
+        codes, uniques = pd.factorize(texts.astype(str))
+        return codes, [self.hits(t) for t in uniques]
+
+
+def _keyword_rules(config: dict) -> list[tuple[int, list[str]]]:
+    income = config.get("income", {})
+    rules = [(INVESTMENT, config.get("investments", {}).get("keywords", []))]
+    rules.append((EMPLOYER, [k for emp in income.get("employers", []) for k in emp.get("keywords", [])]))
+    for i, kws in enumerate(config.get("categories", {}).values()):
+        rules.append((CATEGORY_BASE + i, kws))
+    return [(group, [str(k).upper() for k in kws]) for group, kws in rules]
+
+
+@lru_cache(maxsize=16)
+def _compile(rules_json: str, categories: tuple[str, ...]) -> KeywordMatcher:
+    groups: dict[str, set[int]] = {}
+    always: set[int] = set()
+    for group, kws in json.loads(rules_json):
+        for kw in kws:
+            if kw:
+                groups.setdefault(kw, set()).add(group)
+            else:
+                always.add(group)
+
+    if not groups:
+        return KeywordMatcher(None, {}, frozenset(always), categories)
+
+    # The lookahead finds the longest keyword starting at every position; any shorter
+    # keyword in the text is a substring of one of those, so fold it in up front.
+    implied = {
+        kw: frozenset(g for other, gs in groups.items() if other in kw for g in gs)
+        for kw in groups
+    }
+    alternation = "|".join(re.escape(kw) for kw in sorted(groups, key=len, reverse=True))
+    return KeywordMatcher(re.compile(f"(?=({alternation}))"), implied, frozenset(always), categories)
+
+
+def keyword_matcher(config: dict) -> KeywordMatcher:
+    """Compiled matcher for the keyword parts of config, cached on their serialized form."""
+    rules = _keyword_rules(config)
+    return _compile(json.dumps(rules), tuple(str(c) for c in config.get("categories", {})))
+
 
 def categorize_transactions(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     df = df.copy()
-    df["category"] = config.get("unknown_category", "Miscellaneous")
+    unknown = config.get("unknown_category", "Miscellaneous")
+    matcher = keyword_matcher(config)
+    amount = df["amount"]
+    iban = df["iban"]
+
+    m_codes, m_hits = matcher.scan(df["merchant"])
+    d_codes, d_hits = matcher.scan(df["description"])
+
+    def flag(codes, hits, group):
+        return np.array([group in h for h in hits], dtype=bool)[codes]
+
+    def last_category(codes, hits):
+        return np.array([max((g for g in h if g >= CATEGORY_BASE), default=CATEGORY_BASE - 1)
+                         for h in hits], dtype=int)[codes] - CATEGORY_BASE
 
     # Investments
     inv = config.get("investments", {})
-    inv_kw = inv.get("keywords", [])
-    inv_ibans = set(inv.get("ibans", []))
-    df.loc[
-        df["merchant"].apply(lambda s: _contains_any(s, inv_kw)) | df["iban"].isin(inv_ibans),
-        "category"
-    ] = "Investment"
-
-    # Income: employers
-    for emp in config.get("income", {}).get("employers", []):
-        kws = emp.get("keywords", [])
-        ibs = set(emp.get("ibans", []))
-        mask = df["amount"] > 0
-        if kws:
-            mask &= df["merchant"].apply(lambda s: _contains_any(s, kws))
-        if ibs:
-            mask |= (df["iban"].isin(ibs) & (df["amount"] > 0))
-        df.loc[mask, "category"] = "Income:Employer"
+    is_investment = flag(m_codes, m_hits, INVESTMENT) | iban.isin(set(inv.get("ibans", []))).to_numpy()
+
+    # Income: employers (an employer without keywords takes every incoming payment)
+    employers = config.get("income", {}).get("employers", [])
+    emp_ibans = {i for emp in employers for i in emp.get("ibans", [])}
+    is_employer = flag(m_codes, m_hits, EMPLOYER) | iban.isin(emp_ibans).to_numpy()
+    if any(not emp.get("keywords") for emp in employers):
+        is_employer[:] = True
+    is_employer &= (amount > 0).to_numpy()
 
     # Income: students (multiples of 20 or IBANs)
     students_conf = config.get("income", {}).get("students", {})
     mult = students_conf.get("multiples_of", 20)
     st_ibans = set(students_conf.get("ibans", []))
-    mask_students = (df["amount"] > 0) & ((df["amount"] % mult) == 0)
+    is_students = (amount > 0) & ((amount % mult) == 0)
     if st_ibans:
-        mask_students |= (df["iban"].isin(st_ibans) & (df["amount"] > 0))
-    df.loc[mask_students, "category"] = "Income:Students"
+        is_students |= (iban.isin(st_ibans) & (amount > 0))
 
-    # Income: students cash
+    # Income: students cash; this keyword is a regular expression, not a literal
     cash_kw = config.get("income", {}).get("cash_students", {}).get("keyword", "")
+    is_cash = np.zeros(len(df), dtype=bool)
     if cash_kw:
-        df.loc[
-            (df["amount"] > 0) & (df["description"].str.upper().str.contains(cash_kw.upper(), na=False)),
-            "category"
-        ] = "Income:Students:Cash"
-
-    # Expense categories from keywords
-    for cat, kws in config.get("categories", {}).items():
-        mask = (df["amount"] < 0) & (
-            df["merchant"].apply(lambda s: _contains_any(s, kws))
-            | df["description"].apply(lambda s: _contains_any(s, kws))
-        )
-        df.loc[mask, "category"] = cat
+        is_cash = ((amount > 0) & df["description"].str.upper().str.contains(cash_kw.upper(), na=False)).to_numpy()
+
+    # Expense categories from keywords; a later category in the config wins
+    cat_idx = np.maximum(last_category(m_codes, m_hits), last_category(d_codes, d_hits))
+    is_expense = (amount < 0).to_numpy() & (cat_idx >= 0)
+    cat_labels = np.array(list(matcher.categories) + [unknown], dtype=object)
 
+    # Precedence, highest first: expense category, cash, students, employer, investment
+    df["category"] = np.select(
+        [is_expense, is_cash, is_students.to_numpy(), is_employer, is_investment],
+        [cat_labels[cat_idx], "Income:Students:Cash", "Income:Students", "Income:Employer", "Investment"],
+        default=unknown,
+    )
     return df
 
-def compute_income_sources(df: pd.DataFrame, config: dict) -> dict:
-    inc = df[df["amount"] > 0].copy()
+def compute_income_sources(summary: ReportSummary, config: dict) -> dict:
+    by_bucket = summary.income_by_bucket()
     res: dict[str, float] = {}
-    res["Employer"] = float(inc[inc["category"] == "Income:Employer"]["amount"].sum())
-    res["Students"] = float(inc[inc["category"] == "Income:Students"]["amount"].sum())
-    res["Students:Cash"] = float(inc[inc["category"] == "Income:Students:Cash"]["amount"].sum())
-    other = float(inc[~inc["category"].str.startswith("Income")]["amount"].sum())
+    for label in ("Employer", "Students", "Students:Cash"):
+        res[label] = float(by_bucket.get(label, 0.0))
+    other = float(by_bucket.get("Other", 0.0))
     if abs(other) > 1e-9:
         res["Other"] = other
     return res
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from .models import ReportSummary
+from .kpis import (
+    category_pie_chart,
+    chart_path,
+    daily_spend_chart,
+    income_pie_chart,
+    investment_pie_chart,
+)
+
+CHART_FUNCS = {
+    "expenses": category_pie_chart,
+    "income": income_pie_chart,
+    "investments": investment_pie_chart,
+    "daily": daily_spend_chart,
+}
+# chart file name -> hash of the inputs it was rendered from
+HASHES_FILE = Path("reports") / "chart_hashes.json"
+
+
+def summary_hash(summary: ReportSummary) -> str:
+    digest = hashlib.sha256(summary.month.encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(summary.cube, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _render_chart(name: str, summary: ReportSummary, hide: bool) -> str:
+    out = CHART_FUNCS[name](summary, hide)
+    return out[0] if isinstance(out, tuple) else out
+
+
+def render_charts(
+    summaries: List[ReportSummary],
+    hide: bool = False,
+    workers: int | None = None,
+) -> List[Dict[str, str]]:
+    """
+    Render every chart for every summary, in a process pool when there is more
+    than one to draw. A chart is skipped when its file exists and was last
+    rendered from the same summary hash and hide flag.
+    """
+    hashes: Dict[str, str] = {}
+    if HASHES_FILE.exists():
+        hashes = json.loads(HASHES_FILE.read_text(encoding="utf-8"))
+
+    results: List[Dict[str, str]] = []
+    todo = []
+    for summary in summaries:
+        key_base = summary_hash(summary)
+        charts = {}
+        for name in CHART_FUNCS:
+            path = chart_path(name, summary.month)
+            key = f"{key_base}:{name}:{int(hide)}"
+            charts[name] = path.name
+            if path.exists() and hashes.get(path.name) == key:
+                continue
+            todo.append((name, summary, key, path.name))
+        results.append(charts)
+
+    if todo:
+        if workers == 1 or len(todo) == 1:
+            for name, summary, _, _ in todo:
+                _render_chart(name, summary, hide)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_chart, name, summary, hide) for name, summary, _, _ in todo]
+                for f in futures:
+                    f.result()
+        hashes.update({file_name: key for _, _, key, file_name in todo})
+        HASHES_FILE.write_text(json.dumps(hashes, indent=2), encoding="utf-8")
+
+    return results
@@ -1,5 +1,41 @@
+import numpy as np
 import pandas as pd
 
+
+def _near_duplicates(frame: pd.DataFrame, window_days: int) -> np.ndarray:
+    """
+    Mark rows that repeat a transaction from another bank: same signed amount in
+    cents, date within +-window_days. Banks are ranked by first appearance and a
+    row is only matched against rows kept from higher-ranked banks. Matching is
+    one-to-one: a sorted nearest-date merge pairs every right row with its closest
+    left row, consumed rows are dropped and the merge is repeated on the rest.
+    """
+    dup = np.zeros(len(frame), dtype=bool)
+    frame = frame.assign(row=np.arange(len(frame)))
+    banks = list(pd.unique(frame["bank"]))
+    for i, bank in enumerate(banks[1:], start=1):
+        left = frame.loc[frame["bank"] == bank, ["day", "cents", "row"]].sort_values("day", kind="stable")
+        right = (
+            frame.loc[frame["bank"].isin(banks[:i]) & ~dup[frame["row"]], ["day", "cents", "row"]]
+            .rename(columns={"row": "match", "day": "match_day"})
+            .sort_values("match_day", kind="stable")
+        )
+        while not left.empty and not right.empty:
+            matched = pd.merge_asof(
+                left, right.assign(day=right["match_day"]),
+                on="day", by="cents", tolerance=window_days, direction="nearest",
+            ).dropna(subset=["match"])
+            if matched.empty:
+                break
+            # each right row absorbs only its closest left row (earliest on ties)
+            matched["gap"] = (matched["day"] - matched["match_day"]).abs()
+            pairs = matched.sort_values(["gap", "day"], kind="stable").drop_duplicates("match")
+            dup[pairs["row"].to_numpy()] = True
+            left = left[~left["row"].isin(pairs["row"])]
+            right = right[~right["match"].isin(pairs["match"])]
+    return dup
+
+
 def clean_transactions(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     df = df.copy()
 
@@ -7,12 +43,28 @@ def clean_transactions(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     df = df[pd.notnull(df["amount"])]
     df = df[pd.notnull(df["date"])]
 
-    # dedupe by (date, |amount|, merchant, bank)
-    key = df.apply(
-        lambda r: (r["date"], abs(float(r["amount"])), str(r["merchant"]).strip().lower(), r["bank"]),
-        axis=1,
-    )
-    df = df.loc[~key.duplicated()].copy()
+    # dedupe by (date, |amount|, merchant, bank) on integer/categorical columns
+    date_ns = pd.to_datetime(df["date"]).to_numpy("datetime64[ns]").view("int64")
+    cents = np.round(df["amount"].to_numpy(dtype=float) * 100).astype("int64")
+    key = pd.DataFrame({
+        "date": date_ns,
+        "cents": np.abs(cents),
+        "merchant": df["merchant"].astype(str).str.strip().str.lower().astype("category").cat.codes,
+        "bank": df["bank"].astype("category").cat.codes,
+    })
+    keep = ~key.duplicated().to_numpy()
+
+    # optional: the same transaction exported by two banks (e.g. card linked to both)
+    window_days = (config.get("dedupe") or {}).get("cross_bank_days")
+    if window_days is not None:
+        near = pd.DataFrame({
+            "day": date_ns // (86_400 * 10**9),
+            "cents": cents,
+            "bank": df["bank"].astype(str).to_numpy(),
+        })[keep].reset_index(drop=True)
+        keep[np.flatnonzero(keep)[_near_duplicates(near, int(window_days))]] = False
+
+    df = df.loc[keep].copy()
 
     # normalize text
     for c in ["description", "merchant"]:
@@ -1,26 +1,31 @@
 import typer
 from pathlib import Path
-from .pipeline import run_monthly_report
+from .pipeline import run_monthly_reports
 
 app = typer.Typer(help="FINANCE_PROJECT CLI")
 
 @app.command()
 def report(
-    month: str = typer.Option(..., help="Month in YYYY-MM, e.g., 2025-10"),
+    month: list[str] = typer.Option(..., help="Month in YYYY-MM, e.g., 2025-10 (repeat for several reports)"),
     csv: list[Path] = typer.Option(None, "--csv", help="One or more CSV files to read"),
     config_path: Path = typer.Option(Path("config.yaml"), help="Path to config.yaml"),
     presentation: bool = typer.Option(
         False, "--presentation/--no-presentation",
         help="Hide numeric values in report and charts (presentation mode)",
     ),
+    store: Path = typer.Option(Path("data/store"), help="Directory of the partitioned transaction store"),
+    open_report: bool = typer.Option(True, "--open/--no-open", help="Open the report in a browser (single month only)"),
+    workers: int = typer.Option(None, help="Processes for chart rendering (default: one per CPU)"),
 ):
     print(">>> CLI reached successfully")
     print("Month:", month)
     print("CSV files:", csv)
     print("Config path:", config_path)
     print("Presentation mode:", presentation)
+    print("Store:", store)
 
-    run_monthly_report(month, csv, config_path, presentation=presentation)
+    run_monthly_reports(month, csv, config_path, presentation=presentation, store_root=store, open_report=open_report,
+                        workers=workers)
     print(">>> Report generated successfully.")
 
 if __name__ == "__main__":
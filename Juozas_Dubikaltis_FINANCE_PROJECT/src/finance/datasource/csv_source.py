@@ -1,6 +1,104 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass
 from pathlib import Path
+
 import pandas as pd
 
+SNIFF_BYTES = 64 * 1024
+FORMAT_CACHE = Path("data/intermediate/csv_formats.json")
+
+# header columns (lower-case) that identify a bank export
+BANK_MARKERS = {
+    "revolut": {"completed date", "started date"},
+    "swedbank": {"suma", "d/k", "paaiškinimai", "paaiskinimai"},
+}
+REVOLUT_NUMERIC = {"amount", "fee", "balance"}
+
+
+@dataclass(frozen=True)
+class CsvFormat:
+    encoding: str
+    sep: str
+    decimal: str
+    bank: str | None
+    columns: tuple[str, ...]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _decode_sample(raw: bytes) -> tuple[str, str]:
+    try:
+        return "utf-8-sig", raw.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        # the sample may end in the middle of a multi-byte character
+        if e.start >= len(raw) - 3:
+            try:
+                return "utf-8-sig", raw[:e.start].decode("utf-8-sig")
+            except UnicodeDecodeError:
+                pass
+    return "latin1", raw.decode("latin1")
+
+
+def sniff_csv(p: Path) -> CsvFormat:
+    """Detect encoding, delimiter, decimal separator and bank from the first few KB."""
+    with open(p, "rb") as f:
+        encoding, text = _decode_sample(f.read(SNIFF_BYTES))
+    lines = text.splitlines()
+    header = lines[0] if lines else ""
+
+    try:
+        sep = csv.Sniffer().sniff("\n".join(lines[:20]), delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = max(",;\t|", key=header.count)
+
+    body = "\n".join(lines[1:])
+    decimal = "," if sep != "," and re.search(r"\d,\d{1,2}\b", body) else "."
+
+    columns = tuple(next(csv.reader([header], delimiter=sep), []))
+    lower = {c.strip().lower() for c in columns}
+    bank = next((name for name, markers in BANK_MARKERS.items() if lower & markers), None)
+    return CsvFormat(encoding=encoding, sep=sep, decimal=decimal, bank=bank, columns=columns)
+
+
+_format_cache: dict[str, dict] | None = None
+
+
+def _cached_format(p: Path) -> CsvFormat:
+    """sniff_csv result, remembered per file content hash across runs."""
+    global _format_cache
+    if _format_cache is None:
+        _format_cache = json.loads(FORMAT_CACHE.read_text(encoding="utf-8")) if FORMAT_CACHE.exists() else {}
+    key = file_sha256(p)
+    if key in _format_cache:
+        cached = _format_cache[key]
+        return CsvFormat(**{**cached, "columns": tuple(cached["columns"])})
+    fmt = sniff_csv(p)
+    _format_cache[key] = asdict(fmt)
+    FORMAT_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    FORMAT_CACHE.write_text(json.dumps(_format_cache, indent=2, ensure_ascii=False), encoding="utf-8")
+    return fmt
+
+
+def _dtypes(fmt: CsvFormat) -> dict[str, str] | None:
+    if fmt.bank == "revolut":
+        return {c: "float64" if c.strip().lower() in REVOLUT_NUMERIC else "str" for c in fmt.columns}
+    if fmt.bank == "swedbank":
+        # amounts may contain NBSP / comma decimals; the Swedbank normalizer parses them
+        return {c: "str" for c in fmt.columns}
+    return None
+
+
 def _smart_read_csv(p: Path) -> pd.DataFrame:
     # Try UTF-8 with automatic delimiter detection
     try:
@@ -19,6 +117,22 @@ def _smart_read_csv(p: Path) -> pd.DataFrame:
     # Last resort legacy encoding
     return pd.read_csv(p, sep=";", encoding="latin1", decimal=",", on_bad_lines="skip")
 
+
+def read_statement(p: Path) -> tuple[pd.DataFrame, str | None]:
+    """One C-engine parse using the sniffed format; the slow probing reader is the fallback."""
+    fmt = _cached_format(p)
+    try:
+        df = pd.read_csv(
+            p, sep=fmt.sep, decimal=fmt.decimal, encoding=fmt.encoding,
+            dtype=_dtypes(fmt), engine="c", on_bad_lines="skip",
+        )
+        if df.shape[1] > 1:
+            return df, fmt.bank
+    except (ValueError, UnicodeDecodeError, pd.errors.ParserError):
+        pass
+    return _smart_read_csv(p), fmt.bank
+
+
 class CsvSource:
     def __init__(self, paths: list[Path]):
         self.paths = paths
@@ -26,8 +140,9 @@ class CsvSource:
     def fetch(self) -> pd.DataFrame:
         frames: list[pd.DataFrame] = []
         for p in self.paths:
-            df = _smart_read_csv(p)
+            df, bank = read_statement(Path(p))
             df["_source_path"] = str(p)
+            df["_bank"] = bank
             frames.append(df)
         if not frames:
             return pd.DataFrame()
@@ -199,7 +199,9 @@ def normalize_any_bank(raw_all: pd.DataFrame) -> pd.DataFrame:
 
     if "_source_path" in raw_all.columns:
         for _, part in raw_all.groupby("_source_path"):
-            bank = _decide_bank(part)
+            # CsvSource tags files whose header identified the bank; score the rest
+            known = part["_bank"].iat[0] if "_bank" in part.columns else None
+            bank = known if isinstance(known, str) else _decide_bank(part)
             if bank == "revolut":
                 frames.append(_normalize_revolut(part))
             else:
@@ -1,19 +1,54 @@
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+import matplotlib
+matplotlib.use("Agg")  # charts are only saved to files, also from worker processes
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from .models import CUBE_KEYS, INCOME_BUCKETS, ReportSummary
+
+CHART_FILES = {
+    "expenses": "{month}_expenses_pie.png",
+    "income": "{month}_income_pie.png",
+    "investments": "{month}_investment_pie.png",
+    "daily": "{month}_daily_spending.png",
+}
+
+
+# -----------------------
+# SINGLE-PASS SUMMARY
+# -----------------------
+
+def summarize(df: pd.DataFrame, month_str: str, misc_limit: int = 50) -> ReportSummary:
+    amount = df["amount"]
+    keys = pd.DataFrame({
+        "sign": np.sign(amount).fillna(0).astype(int),
+        "category": df["category"],
+        "bank": df["bank"],
+        "merchant": df["merchant"],
+        "day": pd.to_datetime(df["date"], errors="coerce").dt.normalize(),
+        "amount": amount,
+    })
+    cube = (
+        keys.groupby(CUBE_KEYS, dropna=False, sort=False)["amount"]
+        .agg(amount="sum", count="count")
+        .reset_index()
+    )
+    misc = df[(amount < 0) & (df["category"] == "Miscellaneous")]
+    misc = misc.sort_values("amount").head(misc_limit)[["date", "merchant", "description", "amount"]]
+    return ReportSummary(month=month_str, cube=cube, misc=misc)
+
 
 # -----------------------
 # CORE KPI AGGREGATES
 # -----------------------
 
-def compute_kpis(df: pd.DataFrame, config: Dict) -> Dict:
-    income = float(df.loc[df["amount"] > 0, "amount"].sum())
-    expenses = float(df.loc[df["amount"] < 0, "amount"].sum())
-    invested = float(df.loc[df["category"] == "Investment", "amount"].sum())
+def compute_kpis(summary: ReportSummary, config: Dict) -> Dict:
+    income = float(summary.income()["amount"].sum())
+    expenses = float(summary.expenses()["amount"].sum())
+    invested = float(summary.investments()["amount"].sum())
     return {"total_income": income, "total_expenses": expenses, "total_invested": abs(invested)}
 
 
@@ -21,12 +56,13 @@ def compute_kpis(df: pd.DataFrame, config: Dict) -> Dict:
 # TABLE SUMMARIES
 # -----------------------
 
-def expense_category_summary(df: pd.DataFrame) -> List[Dict]:
-    exp = df[df["amount"] < 0].copy()
+def expense_category_summary(summary: ReportSummary) -> List[Dict]:
+    exp = summary.expenses()
     if exp.empty:
         return []
-    by_sum = exp.groupby("category", dropna=False)["amount"].sum().abs().sort_values(ascending=False)
-    by_count = exp.groupby("category", dropna=False)["amount"].count()
+    g = exp.groupby("category", dropna=False)
+    by_sum = g["amount"].sum().abs().sort_values(ascending=False)
+    by_count = g["count"].sum()
     total = float(by_sum.sum()) or 0.0
     rows: List[Dict] = []
     for cat, eur in by_sum.items():
@@ -36,25 +72,11 @@ def expense_category_summary(df: pd.DataFrame) -> List[Dict]:
     return rows
 
 
-def income_source_summary(df: pd.DataFrame) -> List[Dict]:
-    inc = df[df["amount"] > 0].copy()
-    if inc.empty:
+def income_source_summary(summary: ReportSummary) -> List[Dict]:
+    if summary.income().empty:
         return []
-    buckets = {
-        "Employer": ["Income:Employer"],
-        "Students": ["Income:Students"],
-        "Students:Cash": ["Income:Students:Cash"],
-        "Other": [],
-    }
-    totals: Dict[str, float] = {k: 0.0 for k in buckets}
-    all_bucket_cats: List[str] = []
-    for label, cats in buckets.items():
-        if cats:
-            val = float(inc[inc["category"].isin(cats)]["amount"].sum())
-            totals[label] = val
-            all_bucket_cats.extend(cats)
-    other_val = float(inc[~inc["category"].isin(all_bucket_cats)]["amount"].sum())
-    totals["Other"] = other_val
+    totals: Dict[str, float] = {k: 0.0 for k in [*INCOME_BUCKETS.values(), "Other"]}
+    totals.update({label: float(val) for label, val in summary.income_by_bucket().items()})
     grand = sum(totals.values()) or 0.0
     rows: List[Dict] = []
     for label, val in totals.items():
@@ -66,27 +88,23 @@ def income_source_summary(df: pd.DataFrame) -> List[Dict]:
     return rows
 
 
-def misc_details(df: pd.DataFrame, limit: int = 50) -> List[Dict]:
-    misc = df[(df["amount"] < 0) & (df["category"] == "Miscellaneous")].copy()
-    if misc.empty:
-        return []
-    misc = misc.sort_values("amount")
+def misc_details(summary: ReportSummary) -> List[Dict]:
     out: List[Dict] = []
-    for _, r in misc.head(limit).iterrows():
+    for r in summary.misc.itertuples(index=False):
         out.append({
-            "date": str(r["date"]),
-            "merchant": str(r["merchant"]),
-            "description": str(r["description"]),
-            "eur": float(abs(r["amount"])),
+            "date": str(r.date),
+            "merchant": str(r.merchant),
+            "description": str(r.description),
+            "eur": float(abs(r.amount)),
         })
     return out
 
 
-def top_merchants_table(df: pd.DataFrame, n: int = 15) -> List[Dict]:
-    exp = df[df["amount"] < 0].copy()
+def top_merchants_table(summary: ReportSummary, n: int = 15) -> List[Dict]:
+    exp = summary.expenses()
     if exp.empty:
         return []
-    g = exp.groupby("merchant", dropna=False)["amount"].agg(sum="sum", cnt="count").reset_index()
+    g = exp.groupby("merchant", dropna=False).agg(sum=("amount", "sum"), cnt=("count", "sum")).reset_index()
     g["abs_sum"] = g["sum"].abs()
     g = g.sort_values("abs_sum", ascending=False).drop(columns=["abs_sum"])
     rows: List[Dict] = []
@@ -105,10 +123,14 @@ def _reports_dir() -> Path:
     return p
 
 
-def category_pie_chart(df: pd.DataFrame, month_str: str, hide_labels: bool = False) -> str:
-    reports_dir = _reports_dir()
-    out_path = reports_dir / f"{month_str}_expenses_pie.png"
-    exp = df[df["amount"] < 0].copy()
+def chart_path(name: str, month_str: str) -> Path:
+    return _reports_dir() / CHART_FILES[name].format(month=month_str)
+
+
+def category_pie_chart(summary: ReportSummary, hide_labels: bool = False) -> str:
+    month_str = summary.month
+    out_path = chart_path("expenses", month_str)
+    exp = summary.expenses()
     if exp.empty:
         plt.figure()
         plt.title("No expenses")
@@ -141,23 +163,16 @@ def category_pie_chart(df: pd.DataFrame, month_str: str, hide_labels: bool = Fal
     return out_path.name
 
 
-def income_pie_chart(df: pd.DataFrame, month_str: str, hide_labels: bool = False) -> str:
-    reports_dir = _reports_dir()
-    out_path = reports_dir / f"{month_str}_income_pie.png"
-    inc = df[df["amount"] > 0].copy()
-    if inc.empty:
+def income_pie_chart(summary: ReportSummary, hide_labels: bool = False) -> str:
+    month_str = summary.month
+    out_path = chart_path("income", month_str)
+    if summary.income().empty:
         plt.figure()
         plt.title("No income")
         plt.savefig(out_path, dpi=150, bbox_inches="tight")
         plt.close()
         return out_path.name
-    def bucket(row_cat: str) -> str:
-        if row_cat == "Income:Employer": return "Employer"
-        if row_cat == "Income:Students": return "Students"
-        if row_cat == "Income:Students:Cash": return "Students:Cash"
-        return "Other"
-    inc["bucket"] = inc["category"].astype(str).map(bucket)
-    by_b = inc.groupby("bucket")["amount"].sum()
+    by_b = summary.income_by_bucket()
     labels = list(by_b.index)
     sizes = np.array(list(by_b.values), dtype=float)
     plt.figure(figsize=(6, 6))
@@ -175,18 +190,17 @@ def income_pie_chart(df: pd.DataFrame, month_str: str, hide_labels: bool = False
     return out_path.name
 
 
-def investment_pie_chart(df: pd.DataFrame, month_str: str, hide_labels: bool = False) -> str:
-    reports_dir = _reports_dir()
-    out_path = reports_dir / f"{month_str}_investment_pie.png"
-    inv = df[df["category"] == "Investment"].copy()
+def investment_pie_chart(summary: ReportSummary, hide_labels: bool = False) -> str:
+    month_str = summary.month
+    out_path = chart_path("investments", month_str)
+    inv = summary.investments()
     if inv.empty:
         plt.figure()
         plt.title("No investments")
         plt.savefig(out_path, dpi=150, bbox_inches="tight")
         plt.close()
         return out_path.name
-    inv["label"] = inv["merchant"].fillna(inv["description"]).astype(str)
-    by_lab = inv.groupby("label")["amount"].sum().abs().sort_values(ascending=False)
+    by_lab = inv.groupby(inv["merchant"].astype(str))["amount"].sum().abs().sort_values(ascending=False)
     labels = list(by_lab.index)
     sizes = np.array(list(by_lab.values), dtype=float)
     plt.figure(figsize=(6, 6))
@@ -204,24 +218,17 @@ def investment_pie_chart(df: pd.DataFrame, month_str: str, hide_labels: bool = F
     return out_path.name
 
 
-def daily_spend_chart(df: pd.DataFrame, month_str: str, hide_values: bool = False) -> Tuple[str, float]:
-    reports_dir = _reports_dir()
-    out_path = reports_dir / f"{month_str}_daily_spending.png"
-    mask = (df["amount"] < 0) & (df["category"] != "Investment")
-    exp = df[mask].copy()
-    if exp.empty:
+def daily_spend_chart(summary: ReportSummary, hide_values: bool = False) -> Tuple[str, float]:
+    month_str = summary.month
+    out_path = chart_path("daily", month_str)
+    daily_full = summary.daily_spending()
+    if daily_full.empty:
         plt.figure(figsize=(10, 3))
         plt.title("No daily spending data (excl. investments)")
         plt.savefig(out_path, dpi=150, bbox_inches="tight")
         plt.close()
         return out_path.name, 0.0
-    exp["date"] = pd.to_datetime(exp["date"], errors="coerce")
-    daily = exp.groupby("date")["amount"].sum().abs().sort_index()
-    month_period = pd.Period(month_str)
-    first_day = month_period.to_timestamp()
-    last_day = (month_period + 1).to_timestamp() - pd.Timedelta(days=1)
-    all_days = pd.date_range(first_day, last_day, freq="D")
-    daily_full = daily.reindex(all_days, fill_value=0.0)
+    all_days = daily_full.index
     avg_daily = float(daily_full.mean())
     x_vals = np.arange(len(all_days))
     day_labels = [d.day for d in all_days]
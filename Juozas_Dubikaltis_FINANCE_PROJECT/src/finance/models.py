@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Dict
+
+import pandas as pd
+
+INCOME_BUCKETS = {
+    "Income:Employer": "Employer",
+    "Income:Students": "Students",
+    "Income:Students:Cash": "Students:Cash",
+}
+CUBE_KEYS = ["sign", "category", "bank", "merchant", "day"]
+
+
+@dataclass
+class ReportSummary:
+    """
+    Everything the report needs from one month of transactions. `cube` holds the
+    amount sum and transaction count per (sign, category, bank, merchant, day);
+    every table and chart re-aggregates that small frame instead of the rows.
+    """
+    month: str
+    cube: pd.DataFrame
+    misc: pd.DataFrame  # largest uncategorized expenses
+
+    def expenses(self) -> pd.DataFrame:
+        return self.cube[self.cube["sign"] < 0]
+
+    def income(self) -> pd.DataFrame:
+        return self.cube[self.cube["sign"] > 0]
+
+    def investments(self) -> pd.DataFrame:
+        return self.cube[self.cube["category"] == "Investment"]
+
+    def income_by_bucket(self) -> pd.Series:
+        inc = self.income()
+        bucket = inc["category"].map(INCOME_BUCKETS).fillna("Other")
+        return inc.groupby(bucket)["amount"].sum()
+
+    def daily_spending(self) -> pd.Series:
+        """Spending per calendar day of the month (excl. investments); empty if there is none."""
+        exp = self.expenses()
+        exp = exp[exp["category"] != "Investment"]
+        if exp.empty:
+            return pd.Series(dtype=float)
+        daily = exp.groupby("day")["amount"].sum().abs().sort_index()
+        month_period = pd.Period(self.month)
+        first_day = month_period.to_timestamp()
+        last_day = (month_period + 1).to_timestamp() - pd.Timedelta(days=1)
+        all_days = pd.date_range(first_day, last_day, freq="D")
+        return daily.reindex(all_days, fill_value=0.0)
+
+    def avg_daily_spend(self) -> float:
+        daily = self.daily_spending()
+        return float(daily.mean()) if not daily.empty else 0.0
+
+    def bank_counts(self) -> Dict[str, int]:
+        return {bank: int(cnt) for bank, cnt in self.cube.groupby("bank")["count"].sum().items()}
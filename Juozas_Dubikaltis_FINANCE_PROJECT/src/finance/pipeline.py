@@ -5,77 +5,65 @@ import pandas as pd
 import yaml
 import webbrowser
 
-from .datasource.csv_source import CsvSource
-from .io_normalize import normalize_any_bank
+from .store import TransactionStore
 from .cleaning import clean_transactions
 from .categorize import categorize_transactions, compute_income_sources
+from .models import ReportSummary
 from .kpis import (
+    summarize,
     compute_kpis,
     top_merchants_table,
-    category_pie_chart,
-    income_pie_chart,
-    investment_pie_chart,
     expense_category_summary,
     income_source_summary,
     misc_details,
-    daily_spend_chart,
 )
+from .charts import render_charts
 from .report import render_report
 
 
-def run_monthly_report(
-    month_str: str,
-    csv_paths: List[Path] | None,
-    config_path: Path,
-    presentation: bool = False,   # NEW
-) -> str:
-    month = pd.to_datetime(f"{month_str}-01")
-    month_start = month.replace(day=1)
-    next_month = month_start + pd.offsets.MonthBegin(1)
-    month_end = next_month - pd.Timedelta(days=1)
-
+def _load_config(config_path: Path) -> dict:
     with open(config_path, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f) or {}
+        return yaml.safe_load(f) or {}
 
-    if not csv_paths:
-        raise SystemExit("No CSVs provided. Use --csv data/raw/*.csv")
 
-    ds = CsvSource(csv_paths)
-    raw_df = ds.fetch()
+def _open_store(csv_paths: List[Path] | None, store: TransactionStore) -> TransactionStore:
+    # new/changed statements are added to the store; months are read from its partitions
+    if csv_paths:
+        ingested = store.ingest(csv_paths)
+        print(f"Ingested {len(ingested)} new/changed statement(s) into {store.root}")
+    elif not store.months():
+        raise SystemExit("No CSVs provided. Use --csv data/raw/*.csv")
+    return store
 
-    df = normalize_any_bank(raw_df)
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    mdf = df[(df["date"] >= month_start) & (df["date"] <= month_end)].copy()
 
+def _prepare_month(month_str: str, store: TransactionStore, config: dict):
+    mdf = store.load(month_str)
     mdf = clean_transactions(mdf, config)
     mdf = categorize_transactions(mdf, config)
+    # one pass over the rows; every table and chart reads the summary
+    return mdf, summarize(mdf, month_str)
 
-    kpis = compute_kpis(mdf, config)
 
-    # charts: hide labels/values when presentation=True
-    expenses_path = category_pie_chart(mdf, month_str, hide_labels=presentation)
-    income_path = income_pie_chart(mdf, month_str, hide_labels=presentation)
-    investment_path = investment_pie_chart(mdf, month_str, hide_labels=presentation)
-    daily_path, avg_daily = daily_spend_chart(mdf, month_str, hide_values=presentation)
-    kpis["avg_daily_spend"] = avg_daily
-
-    charts = {
-        "expenses": expenses_path,
-        "income": income_path,
-        "investments": investment_path,
-        "daily": daily_path,
-    }
-
-    income_sources = compute_income_sources(mdf, config)
-    cat_summary = expense_category_summary(mdf)
-    inc_summary = income_source_summary(mdf)
-    misc_rows = misc_details(mdf)
-    merchants = top_merchants_table(mdf)
-
-    source_summary = "n/a"
-    if "bank" in mdf.columns:
-        counts = mdf.groupby("bank")["amount"].count().to_dict()
-        source_summary = ", ".join(f"{bank}: {cnt} tx" for bank, cnt in counts.items()) or "n/a"
+def _write_report(
+    month_str: str,
+    mdf: pd.DataFrame,
+    summary: ReportSummary,
+    charts: dict,
+    config: dict,
+    presentation: bool,
+    open_report: bool,
+) -> str:
+    kpis = compute_kpis(summary, config)
+    kpis["avg_daily_spend"] = summary.avg_daily_spend()
+
+    income_sources = compute_income_sources(summary, config)
+    cat_summary = expense_category_summary(summary)
+    inc_summary = income_source_summary(summary)
+    misc_rows = misc_details(summary)
+    merchants = top_merchants_table(summary)
+
+    counts = summary.bank_counts()
+    source_summary = ", ".join(f"{bank}: {cnt} tx" for bank, cnt in counts.items()) or "n/a"
 
     reports_dir = Path("reports")
     reports_dir.mkdir(parents=True, exist_ok=True)
@@ -101,9 +89,54 @@ def run_monthly_report(
     mdf.to_parquet(Path("output") / f"clean_transactions_{month_str}.parquet", index=False)
     mdf.to_csv(Path("output") / f"clean_transactions_{month_str}.csv", index=False)
 
-    try:
-        webbrowser.open(out_html.resolve().as_uri(), new=2)
-    except Exception as e:
-        print(f"Could not auto-open the report: {e}")
+    if open_report:
+        try:
+            webbrowser.open(out_html.resolve().as_uri(), new=2)
+        except Exception as e:
+            print(f"Could not auto-open the report: {e}")
 
     return str(out_html.resolve())
+
+
+def run_monthly_report(
+    month_str: str,
+    csv_paths: List[Path] | None,
+    config_path: Path,
+    presentation: bool = False,   # NEW
+    store: TransactionStore | None = None,
+    open_report: bool = True,
+) -> str:
+    config = _load_config(config_path)
+    store = _open_store(csv_paths, store or TransactionStore())
+    mdf, summary = _prepare_month(month_str, store, config)
+
+    # charts: hide labels/values when presentation=True
+    [charts] = render_charts([summary], hide=presentation, workers=1)
+    return _write_report(month_str, mdf, summary, charts, config, presentation, open_report)
+
+
+def run_monthly_reports(
+    months: List[str],
+    csv_paths: List[Path] | None,
+    config_path: Path,
+    presentation: bool = False,
+    store_root: Path = Path("data/store"),
+    open_report: bool = True,
+    workers: int | None = None,
+) -> List[str]:
+    """
+    Batch mode: ingest the statements once, summarize every month, render all
+    charts together in a process pool, then write one report per month.
+    """
+    config = _load_config(config_path)
+    store = _open_store(csv_paths, TransactionStore(store_root))
+    prepared = [_prepare_month(month, store, config) for month in months]
+
+    all_charts = render_charts([summary for _, summary in prepared], hide=presentation, workers=workers)
+    return [
+        _write_report(
+            month, mdf, summary, charts, config, presentation,
+            open_report=open_report and len(months) == 1,
+        )
+        for month, (mdf, summary), charts in zip(months, prepared, all_charts)
+    ]
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 import re
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape, TemplateNotFound
 
 
+@lru_cache(maxsize=1)
 def _get_env() -> Environment:
     this_file = Path(__file__).resolve()
     finance_dir = this_file.parent
@@ -18,6 +20,7 @@ def _get_env() -> Environment:
     )
 
 
+@lru_cache(maxsize=1)
 def _load_template(env: Environment):
     for name in ("report.html.j2", "report.html"):
         try:
@@ -61,8 +64,8 @@ def render_report(
     cat_details: list[dict] | None = None,
     presentation: bool = False,   # NEW
 ) -> None:
-    env = _get_env()
-    template = _load_template(env)
+    # environment and compiled template are built once per process
+    template = _load_template(_get_env())
 
     html_str = template.render(
         month=month,
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from .datasource.csv_source import CsvSource, file_sha256
+from .io_normalize import UNIFIED_COLS, normalize_any_bank
+
+SOURCE_COL = "_source_path"
+
+
+def _write_atomic(df: pd.DataFrame, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class TransactionStore:
+    """
+    Normalized transactions on disk, one parquet file per month and bank:
+    <root>/<YYYY-MM>/<bank>.parquet, plus manifest.json with the content hash
+    of every ingested statement. Only new or changed statements are parsed.
+    """
+
+    def __init__(self, root: Path = Path("data/store")):
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+        if self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        else:
+            self.manifest = {}
+
+    def _partition_path(self, month: str, bank: str) -> Path:
+        return self.root / month / f"{bank}.parquet"
+
+    def ingest(self, csv_paths: Iterable[Path]) -> list[Path]:
+        """Parse statements that are new or changed since the last ingest; return those paths."""
+        known_hashes = {entry["sha256"] for entry in self.manifest.values()}
+        changed: dict[str, str] = {}
+        for p in csv_paths:
+            key = str(Path(p).resolve())
+            digest = file_sha256(Path(p))
+            if digest in known_hashes or digest in changed.values():
+                continue
+            changed[key] = digest
+        if not changed:
+            return []
+
+        frames = []
+        for key in changed:
+            part = normalize_any_bank(CsvSource([Path(key)]).fetch())
+            part[SOURCE_COL] = key
+            frames.append(part)
+        df = pd.concat(frames, ignore_index=True)
+        # header-only or unparseable statements leave "date" as an object column
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df = df[df["date"].notna()].copy()
+        df["month"] = df["date"].dt.strftime("%Y-%m")
+
+        # partitions that need rewriting: ones the new rows land in, plus ones that
+        # still hold rows from the previous version of a changed file
+        touched = set(df[["month", "bank"]].itertuples(index=False, name=None))
+        for key in changed:
+            touched.update(tuple(p) for p in self.manifest.get(key, {}).get("partitions", []))
+
+        new_parts = {part_key: part for part_key, part in df.groupby(["month", "bank"])}
+        for month, bank in sorted(touched):
+            path = self._partition_path(month, bank)
+            frames = []
+            if path.exists():
+                old = pd.read_parquet(path)
+                frames.append(old[~old[SOURCE_COL].isin(changed)])
+            if (month, bank) in new_parts:
+                frames.append(new_parts[(month, bank)].drop(columns=["month"]))
+            merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            if merged.empty:
+                path.unlink(missing_ok=True)
+            else:
+                _write_atomic(merged, path)
+
+        for key, digest in changed.items():
+            rows = df[df[SOURCE_COL] == key]
+            self.manifest[key] = {
+                "sha256": digest,
+                "rows": int(len(rows)),
+                "partitions": sorted(set(rows[["month", "bank"]].itertuples(index=False, name=None))),
+            }
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+        return [Path(k) for k in changed]
+
+    def months(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and any(p.glob("*.parquet")))
+
+    def load(self, start: str, end: str | None = None, banks: Iterable[str] | None = None) -> pd.DataFrame:
+        """
+        Transactions for months start..end (YYYY-MM, inclusive), reading only those
+        partitions. Rows present in several overlapping statements are returned once.
+        """
+        end = end or start
+        bank_set = set(banks) if banks is not None else None
+        frames = []
+        for month in self.months():
+            if not (start <= month <= end):
+                continue
+            for path in sorted((self.root / month).glob("*.parquet")):
+                if bank_set is None or path.stem in bank_set:
+                    frames.append(pd.read_parquet(path))
+        if not frames:
+            return pd.DataFrame(columns=UNIFIED_COLS)
+        df = pd.concat(frames, ignore_index=True)
+        df = df.drop_duplicates(subset=UNIFIED_COLS).drop(columns=[SOURCE_COL])
+        return df.sort_values("date", kind="stable").reset_index(drop=True)
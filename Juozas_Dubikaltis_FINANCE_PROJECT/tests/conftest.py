@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# make src/ importable, as run.py does
+sys.path.append(str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from finance.cleaning import clean_transactions
+
+
+def _frame(rows):
+    return pd.DataFrame(
+        [
+            {"date": pd.Timestamp(day), "amount": amount, "merchant": merchant,
+             "description": merchant, "bank": bank}
+            for bank, day, amount, merchant in rows
+        ]
+    )
+
+
+def _kept(df):
+    return sorted(zip(df["bank"], df["date"].dt.strftime("%Y-%m-%d"), df["amount"]))
+
+
+def test_one_row_absorbs_at_most_one_duplicate():
+    df = _frame([
+        ("Swedbank", "2024-01-02", -3.50, "Cafe"),
+        ("Revolut", "2024-01-01", -3.50, "CAFE"),
+        ("Revolut", "2024-01-03", -3.50, "CAFE"),
+    ])
+    out = clean_transactions(df, {"dedupe": {"cross_bank_days": 1}})
+    assert _kept(out) == [("Revolut", "2024-01-03", -3.5), ("Swedbank", "2024-01-02", -3.5)]
+
+
+def test_nearest_row_is_the_duplicate():
+    df = _frame([
+        ("Swedbank", "2024-01-05", -10.0, "Shop"),
+        ("Swedbank", "2024-01-07", -10.0, "Shop"),
+        ("Revolut", "2024-01-06", -10.0, "SHOP"),
+        ("Revolut", "2024-01-08", -10.0, "SHOP"),
+    ])
+    out = clean_transactions(df, {"dedupe": {"cross_bank_days": 1}})
+    assert _kept(out) == [("Swedbank", "2024-01-05", -10.0), ("Swedbank", "2024-01-07", -10.0)]
+
+
+@pytest.mark.parametrize("days_apart, removed", [(2, True), (3, False)])
+def test_window_edge(days_apart, removed):
+    df = _frame([
+        ("Swedbank", "2024-01-10", -7.25, "Taxi"),
+        ("Revolut", str(pd.Timestamp("2024-01-10") + pd.Timedelta(days=days_apart)), -7.25, "TAXI"),
+    ])
+    out = clean_transactions(df, {"dedupe": {"cross_bank_days": 2}})
+    assert len(out) == (1 if removed else 2)
+
+
+def test_sign_must_match():
+    df = _frame([
+        ("Swedbank", "2024-01-10", -5.0, "Transfer"),
+        ("Revolut", "2024-01-10", 5.0, "Transfer"),
+    ])
+    assert len(clean_transactions(df, {"dedupe": {"cross_bank_days": 1}})) == 2
+
+
+@pytest.mark.parametrize("config", [{}, {"dedupe": None}, {"dedupe": {}}, {"dedupe": {"cross_bank_days": None}}])
+def test_cross_bank_dedupe_off(config):
+    df = _frame([
+        ("Swedbank", "2024-01-02", -3.50, "Cafe"),
+        ("Revolut", "2024-01-02", -3.50, "CAFE"),
+        ("Revolut", "2024-01-02", -3.50, "CAFE"),
+    ])
+    # only the exact same-bank repeat is dropped
+    assert _kept(clean_transactions(df, config)) == [
+        ("Revolut", "2024-01-02", -3.5), ("Swedbank", "2024-01-02", -3.5)]
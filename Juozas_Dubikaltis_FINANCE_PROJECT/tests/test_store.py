@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from finance.store import TransactionStore
+
+REVOLUT_HEADER = "Type,Product,Started Date,Completed Date,Description,Amount,Fee,Currency,State,Balance\n"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # the CSV format cache lives under data/intermediate relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _write(path: Path, text: str) -> Path:
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_ingest_header_only_statement(workdir):
+    csv = _write(workdir / "revolut_empty.csv", REVOLUT_HEADER)
+    store = TransactionStore(workdir / "store")
+
+    assert store.ingest([csv]) == [csv.resolve()]
+    entry = store.manifest[str(csv.resolve())]
+    assert entry["rows"] == 0
+    assert entry["partitions"] == []
+    assert store.months() == []
+    # recorded in the manifest, so the next run does not parse it again
+    assert TransactionStore(workdir / "store").ingest([csv]) == []
+
+
+def test_ingest_unparseable_dates(workdir):
+    csv = _write(
+        workdir / "revolut_bad_dates.csv",
+        REVOLUT_HEADER + "CARD_PAYMENT,Current,not a date,not a date,Cafe,-3.50,0,EUR,COMPLETED,96.50\n",
+    )
+    store = TransactionStore(workdir / "store")
+
+    store.ingest([csv])
+    assert store.manifest[str(csv.resolve())]["rows"] == 0
+    assert store.load("2024-01").empty
+
+
+def test_last_day_of_month_lands_in_that_month(workdir):
+    # the old date-range filter ended at midnight of the last day and dropped
+    # these rows; partitioning by calendar month keeps them
+    csv = _write(
+        workdir / "revolut_jan.csv",
+        REVOLUT_HEADER
+        + "CARD_PAYMENT,Current,2024-01-31 18:40:00,2024-01-31 18:45:00,Cafe,-3.50,0,EUR,COMPLETED,96.50\n"
+        + "CARD_PAYMENT,Current,2024-02-01 00:10:00,2024-02-01 00:15:00,Taxi,-9.00,0,EUR,COMPLETED,87.50\n",
+    )
+    store = TransactionStore(workdir / "store")
+    store.ingest([csv])
+
+    jan = store.load("2024-01")
+    assert list(jan["description"]) == ["Cafe"]
+    assert list(store.load("2024-02")["description"]) == ["Taxi"]
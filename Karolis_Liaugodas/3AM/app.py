@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 
 from utils.data_helper import get_session_data, get_weather_info
+from utils.session_cache import SESSION_CACHE
+from utils.telemetry_store import TELEMETRY_STORE
 from components.session_view import create_session_plot, create_lap_info_table
 from components.telemetry_view import create_telemetry_plot
 
@@ -13,6 +15,9 @@ from components.telemetry_view import create_telemetry_plot
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG], suppress_callback_exceptions=True)
 server = app.server
 
+# Sessions are parsed once per process; the ones used last time are loaded in the background
+SESSION_CACHE.warm_start()
+
 # --- Global Config ---
 YEARS = list(range(2025, 2017, -1))
 SESSIONS = ['FP1', 'FP2', 'FP3', 'Q', 'S', 'SQ', 'R']
@@ -106,9 +111,10 @@ def update_gp_options(year):
 def update_drivers(n_clicks, year, gp, session_type):
     if not n_clicks or not gp: return []
     try:
-        session = fastf1.get_session(year, gp, session_type)
-        session.load(laps=False, telemetry=False, weather=False, messages=False)
+        session = get_session_data(year, gp, session_type, laps=False, telemetry=False, weather=False, messages=False)
         drivers = session.drivers
+        # Full load starts now, while the user picks drivers
+        SESSION_CACHE.preload(year, gp, session_type)
         options = []
         for d in drivers:
             try:
@@ -221,10 +227,9 @@ def manage_selected_laps(active_cell, clear_clicks, table_data, current_store, y
             return current_store
 
         # Fetch Official Team Color
-        # We load a lightweight session to get driver info
+        # Driver info comes from the cached session (lightweight load only if it is not cached yet)
         try:
-            session = fastf1.get_session(year, gp, ses)
-            session.load(laps=False, telemetry=False, weather=False, messages=False)
+            session = get_session_data(year, gp, ses, laps=False, telemetry=False, weather=False, messages=False)
             drv_info = session.get_driver(driver)
             team_color = '#' + drv_info.get('TeamColor', 'FFFFFF')
             team_name = drv_info.get('TeamName', 'Unknown')
@@ -303,16 +308,18 @@ def update_telemetry_view(active_tab, stored_laps):
     laps_to_plot = []
     for item in stored_laps:
         try:
-            # Full load for telemetry
-            session = fastf1.get_session(item['year'], item['gp'], item['session'])
-            session.load(laps=True, telemetry=True, weather=False, messages=False)
-            
-            d_laps = session.laps.pick_driver(item['driver'])
-            lap_obj = d_laps[d_laps['LapNumber'] == item['lap_number']].iloc[0]
+            # Resampled arrays from the telemetry store; the session is only loaded
+            # (once, from the session cache) for laps that were never extracted
+            key = (item['year'], item['gp'], item['session'])
+            tel = TELEMETRY_STORE.get(
+                key, item['driver'], item['lap_number'],
+                load_session=lambda key=key: get_session_data(*key, laps=True, telemetry=True, weather=False, messages=False),
+            )
             
             laps_to_plot.append({
                 'driver': item['driver'],
-                'lap_object': lap_obj,
+                'lap_number': item['lap_number'],
+                'telemetry': tel,
                 'color': item['color'],
                 'session_name': f"{item['year']} {item['gp']}"
             })
@@ -2,11 +2,14 @@ import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from utils.data_helper import calculate_delta
+from utils.telemetry_store import grid_distance
 
 def create_telemetry_plot(laps_data_list):
     """
     laps_data_list: List of dicts containing:
-      { 'driver': str, 'lap_object': fastf1.Lap, 'color': str, 'session_name': str }
+      { 'driver': str, 'lap_number': int, 'telemetry': dict of arrays on the distance grid
+        (utils.telemetry_store), 'color': str, 'session_name': str }
+    Traces are WebGL (Scattergl) so many overlaid laps stay responsive.
     """
     
     if not laps_data_list:
@@ -23,72 +26,72 @@ def create_telemetry_plot(laps_data_list):
     
     # Use the LAST selected lap as the reference for Delta
     reference_lap_data = laps_data_list[-1] 
-    ref_lap_obj = reference_lap_data['lap_object']
+    ref_tel = reference_lap_data['telemetry']
     
     for item in laps_data_list:
         driver = item['driver']
-        lap = item['lap_object']
+        tel = item['telemetry']
         color = item['color']
-        label = f"{driver} (Lap {int(lap['LapNumber'])}) - {item['session_name']}"
+        label = f"{driver} (Lap {int(item['lap_number'])}) - {item['session_name']}"
         
         try:
-            # Get Telemetry
-            tel = lap.get_car_data().add_distance()
+            # Cached arrays on the shared distance grid
+            distance = grid_distance(tel)
             
             # 1. Speed
-            fig.add_trace(go.Scatter(
-                x=tel['Distance'], y=tel['Speed'],
+            fig.add_trace(go.Scattergl(
+                x=distance, y=tel['Speed'],
                 mode='lines', name=label, line=dict(color=color),
                 legendgroup=label
             ), row=1, col=1)
             
             # 2. Delta (Only if not the reference, or plot flat line)
-            if item == reference_lap_data:
-                 fig.add_trace(go.Scatter(
-                    x=tel['Distance'], y=[0]*len(tel),
+            if item is reference_lap_data:
+                 fig.add_trace(go.Scattergl(
+                    x=distance, y=[0]*len(distance),
                     mode='lines', showlegend=False, line=dict(color=color, dash='dash')
                 ), row=2, col=1)
             else:
-                dist_grid, delta_vals = calculate_delta(ref_lap_obj, lap)
+                dist_grid, delta_vals = calculate_delta(ref_tel, tel)
                 if dist_grid is not None:
-                     fig.add_trace(go.Scatter(
+                     fig.add_trace(go.Scattergl(
                         x=dist_grid, y=delta_vals,
                         mode='lines', showlegend=False, line=dict(color=color)
                     ), row=2, col=1)
             
             # 3. Throttle
-            fig.add_trace(go.Scatter(
-                x=tel['Distance'], y=tel['Throttle'],
+            fig.add_trace(go.Scattergl(
+                x=distance, y=tel['Throttle'],
                 mode='lines', name=label, showlegend=False, line=dict(color=color),
                 legendgroup=label
             ), row=3, col=1)
 
             # 4. Brake (Boolean or Pressure if available)
             # FastF1 'Brake' is usually boolean.
-            fig.add_trace(go.Scatter(
-                x=tel['Distance'], y=tel['Brake'].astype(int),
+            fig.add_trace(go.Scattergl(
+                x=distance, y=tel['Brake'],
                 mode='lines', name=label, showlegend=False, fill='tozeroy', line=dict(color=color),
                 legendgroup=label
             ), row=4, col=1)
 
             # 5. RPM
-            fig.add_trace(go.Scatter(
-                x=tel['Distance'], y=tel['RPM'],
+            fig.add_trace(go.Scattergl(
+                x=distance, y=tel['RPM'],
                 mode='lines', name=label, showlegend=False, line=dict(color=color),
                 legendgroup=label
             ), row=5, col=1)
             
             # 6. Gear
-            fig.add_trace(go.Scatter(
-                x=tel['Distance'], y=tel['nGear'],
+            fig.add_trace(go.Scattergl(
+                x=distance, y=tel['nGear'],
                 mode='lines', name=label, showlegend=False, line=dict(color=color),
                 legendgroup=label
             ), row=6, col=1)
             
             # 7. DRS
-            if 'DRS' in tel.columns:
-                 fig.add_trace(go.Scatter(
-                    x=tel['Distance'], y=tel['DRS'],
+            if 'DRS' in tel:
+                 fig.add_trace(go.Scattergl(
+                    x=distance, y=tel['DRS'],
                     mode='lines', name=label, showlegend=False, line=dict(color=color),
                     legendgroup=label
                 ), row=7, col=1)
@@ -10,12 +10,16 @@ if not os.path.exists(CACHE_DIR):
     os.makedirs(CACHE_DIR)
 fastf1.Cache.enable_cache(CACHE_DIR)
 
-def get_session_data(year, gp, session_type):
-    """Loads a session and returns the session object and laps."""
+from utils.session_cache import SESSION_CACHE
+from utils.telemetry_store import GRID_STEP
+
+def get_session_data(year, gp, session_type, **parts):
+    """
+    Returns the loaded session from the in-process session cache.
+    parts (laps/telemetry/weather/messages) default to a full load, like session.load().
+    """
     try:
-        session = fastf1.get_session(year, gp, session_type)
-        session.load()
-        return session
+        return SESSION_CACHE.get(year, gp, session_type, **parts)
     except Exception as e:
         print(f"Error loading session: {e}")
         return None
@@ -29,25 +33,15 @@ def format_lap_time(timedelta_val):
     seconds = total_seconds % 60
     return f"{minutes}:{seconds:06.3f}"
 
-def calculate_delta(ref_lap, comp_lap):
+def calculate_delta(ref_tel, comp_tel):
     """
-    Calculates time delta between two laps based on distance.
-    Resamples comp_lap to match ref_lap's distance grid.
+    Time delta between two laps resampled onto the same distance grid
+    (utils.telemetry_store): comp minus ref at every grid point both laps reach.
     """
     try:
-        # Get telemetry
-        ref_tel = ref_lap.get_car_data().add_distance()
-        comp_tel = comp_lap.get_car_data().add_distance()
-
-        # Create a common distance grid based on the reference lap
-        # We assume tracks are roughly similar length; if completely different, this is meaningless
-        dist_grid = ref_tel['Distance']
-        
-        # Interpolate comparison lap time to reference distance
-        comp_time_interp = np.interp(dist_grid, comp_tel['Distance'], comp_tel['Time'].dt.total_seconds())
-        ref_time_seconds = ref_tel['Time'].dt.total_seconds()
-        
-        delta = comp_time_interp - ref_time_seconds
+        n = min(len(ref_tel['Time']), len(comp_tel['Time']))
+        dist_grid = np.arange(n, dtype=np.float32) * np.float32(GRID_STEP)
+        delta = comp_tel['Time'][:n] - ref_tel['Time'][:n]
         return dist_grid, delta
     except Exception as e:
         print(f"Error calculating delta: {e}")
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import fastf1
+import pandas as pd
+
+# Memory budget for loaded sessions (a full race with telemetry is roughly 100-300 MB)
+MAX_CACHE_MB = 1500
+MAX_SESSIONS = 8
+# Sessions remembered across restarts and preloaded on start-up
+WARM_SESSIONS = 2
+RECENT_FILE = os.path.join('fastf1_cache', 'recent_sessions.json')
+
+PARTS = ('laps', 'telemetry', 'weather', 'messages')
+FULL = frozenset(PARTS)
+
+
+def session_nbytes(session):
+    """Approximate memory held by a loaded session's DataFrames."""
+    frames = []
+    for attr in ('_laps', '_weather_data', '_race_control_messages', '_results'):
+        value = getattr(session, attr, None)
+        if isinstance(value, pd.DataFrame):
+            frames.append(value)
+    for attr in ('_car_data', '_pos_data'):
+        value = getattr(session, attr, None)
+        if isinstance(value, dict):
+            frames.extend(v for v in value.values() if isinstance(v, pd.DataFrame))
+    return int(sum(df.memory_usage(index=True).sum() for df in frames))
+
+
+class SessionCache:
+    """
+    In-process LRU of loaded fastf1 Sessions keyed by (year, gp, session_type).
+
+    Each entry remembers which parts (laps, telemetry, weather, messages) were loaded.
+    A request for more parts loads only the missing ones into the same Session object,
+    so a lightweight driver-list load is promoted to a full load without reparsing what
+    is already there. Entries are evicted least-recently-used first once the estimated
+    size exceeds MAX_CACHE_MB or there are more than MAX_SESSIONS.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_MB * 1024 ** 2, max_sessions=MAX_SESSIONS, recent_file=RECENT_FILE):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.recent_file = recent_file
+        self.entries = OrderedDict()  # key -> {'session', 'parts', 'nbytes'}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='session-preload')
+        self.pending = set()
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def get(self, year, gp, session_type, laps=True, telemetry=True, weather=True, messages=True):
+        """Return the Session with at least the requested parts loaded."""
+        key = (int(year), gp, session_type)
+        wanted = frozenset(p for p, on in zip(PARTS, (laps, telemetry, weather, messages)) if on)
+        if 'telemetry' in wanted:
+            wanted |= {'laps'}  # fastf1 slices telemetry by laps
+
+        with self._key_lock(key):
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    if wanted <= entry['parts']:
+                        return entry['session']
+
+            if entry is None:
+                session = fastf1.get_session(*key)
+                loaded = frozenset()
+            else:
+                session, loaded = entry['session'], entry['parts']
+            missing = wanted - loaded
+            session.load(**{p: p in missing for p in PARTS})
+
+            with self.lock:
+                self.entries[key] = {'session': session, 'parts': loaded | wanted, 'nbytes': session_nbytes(session)}
+                self.entries.move_to_end(key)
+                self._evict()
+        self._remember(key)
+        return session
+
+    def _evict(self):
+        total = sum(e['nbytes'] for e in self.entries.values())
+        while len(self.entries) > 1 and (total > self.max_bytes or len(self.entries) > self.max_sessions):
+            _, entry = self.entries.popitem(last=False)
+            total -= entry['nbytes']
+
+    def preload(self, year, gp, session_type, **parts):
+        """Load a session in the background thread (full load unless parts are given)."""
+        key = (int(year), gp, session_type)
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending.add(key)
+
+        def run():
+            try:
+                self.get(*key, **parts)
+            except Exception as e:
+                print(f"Background load failed for {key}: {e}")
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+
+        self.pool.submit(run)
+
+    def _remember(self, key):
+        """Keep the most recently used keys on disk for warm_start."""
+        try:
+            recent = self._recent()
+            recent = [key] + [k for k in recent if k != key]
+            with open(self.recent_file, 'w', encoding='utf-8') as f:
+                json.dump([list(k) for k in recent[:self.max_sessions]], f)
+        except OSError:
+            pass
+
+    def _recent(self):
+        try:
+            with open(self.recent_file, encoding='utf-8') as f:
+                return [tuple(k) for k in json.load(f)]
+        except (OSError, ValueError):
+            return []
+
+    def warm_start(self, n=WARM_SESSIONS):
+        """Preload the n sessions used most recently in earlier runs."""
+        for key in self._recent()[:n]:
+            self.preload(*key)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'sessions': [(k, sorted(e['parts']), round(e['nbytes'] / 1024 ** 2, 1)) for k, e in self.entries.items()],
+                'total_mb': round(sum(e['nbytes'] for e in self.entries.values()) / 1024 ** 2, 1),
+            }
+
+
+SESSION_CACHE = SessionCache()
@@ -0,0 +1,167 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Car data is resampled onto distance = i * GRID_STEP metres
+GRID_STEP = 5.0
+STORE_DIR = 'telemetry_store'
+
+# Stored columns and their on-disk dtypes; stepped channels take the last sample instead of interpolating
+COLUMNS = {
+    'Time': np.float32,      # seconds since lap start
+    'Speed': np.float32,
+    'Throttle': np.float32,
+    'RPM': np.float32,
+    'nGear': np.int8,
+    'DRS': np.int8,
+    'Brake': np.int8,
+}
+STEPPED = ('nGear', 'DRS', 'Brake')
+
+
+def resample_lap(lap, step=GRID_STEP):
+    """Resample one lap's car data onto the fixed distance grid; returns {column: array}."""
+    tel = lap.get_car_data().add_distance()
+    dist = tel['Distance'].to_numpy(dtype=float)
+    grid = np.arange(0.0, dist[-1], step)
+    last = np.clip(np.searchsorted(dist, grid, side='right') - 1, 0, len(dist) - 1)
+    arrays = {}
+    for col, dtype in COLUMNS.items():
+        if col == 'Time':
+            values = tel['Time'].dt.total_seconds().to_numpy()
+        elif col in tel.columns:
+            values = tel[col].to_numpy(dtype=float)
+        else:
+            values = np.zeros(len(dist))
+        resampled = values[last] if col in STEPPED else np.interp(grid, dist, values)
+        arrays[col] = resampled.astype(dtype)
+    return arrays
+
+
+def grid_distance(arrays, step=GRID_STEP):
+    return np.arange(len(arrays['Time']), dtype=np.float32) * np.float32(step)
+
+
+class TelemetryStore:
+    """
+    Per-session columnar telemetry: every lap resampled once onto the distance grid
+    and kept as compact float32/int8 arrays, keyed by (driver, lap number).
+
+    One NPZ per session (<root>/<year>/<gp>/<session>.npz) holds each column of all
+    its laps concatenated plus an index (driver, lap, offset), so reading a lap is
+    array slicing. Laps missing from the store are extracted from the loaded session
+    on first use, and the rest of that session is extracted in the background.
+    """
+
+    def __init__(self, root=STORE_DIR, step=GRID_STEP):
+        self.root = root
+        self.step = step
+        self.sessions = {}  # session key -> {(driver, lap): {column: array}}
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='telemetry-extract')
+        self.extracting = set()
+
+    def _path(self, key):
+        year, gp, session_type = key
+        safe_gp = re.sub(r'[^\w\-]+', '_', str(gp))
+        return os.path.join(self.root, str(year), safe_gp, f"{session_type}.npz")
+
+    def _laps(self, key):
+        """In-memory laps of a session, read from disk the first time."""
+        with self.lock:
+            laps = self.sessions.get(key)
+            if laps is not None:
+                return laps
+            laps = {}
+            path = self._path(key)
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    if float(data['step']) == self.step:
+                        offsets = data['offsets']
+                        columns = {col: data[col] for col in COLUMNS}
+                        for i, (driver, lap) in enumerate(zip(data['drivers'], data['laps'])):
+                            start, end = offsets[i], offsets[i + 1]
+                            laps[(str(driver), int(lap))] = {col: columns[col][start:end] for col in COLUMNS}
+            self.sessions[key] = laps
+            return laps
+
+    def save(self, key):
+        """Write all laps of a session as one packed NPZ."""
+        with self.save_lock:
+            with self.lock:
+                laps = dict(self.sessions.get(key, {}))
+            if laps:
+                self._write(key, laps)
+
+    def _write(self, key, laps):
+        order = sorted(laps)
+        lengths = [len(laps[k]['Time']) for k in order]
+        packed = {col: np.concatenate([laps[k][col] for k in order]).astype(dtype) for col, dtype in COLUMNS.items()}
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp,
+            step=np.float32(self.step),
+            drivers=np.array([d for d, _ in order]),
+            laps=np.array([lap for _, lap in order], dtype=np.int16),
+            offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            **packed,
+        )
+        os.replace(tmp, path)
+
+    def get(self, key, driver, lap_number, load_session):
+        """
+        Arrays of one lap. load_session() is only called if the lap is not stored yet;
+        it must return a session loaded with laps and telemetry.
+        """
+        lap_key = (driver, int(lap_number))
+        laps = self._laps(key)
+        if lap_key in laps:
+            return laps[lap_key]
+        session = load_session()
+        d_laps = session.laps.pick_driver(driver)
+        lap = d_laps[d_laps['LapNumber'] == lap_number].iloc[0]
+        arrays = resample_lap(lap, self.step)
+        with self.lock:
+            laps[lap_key] = arrays
+        self.save(key)
+        self.extract_in_background(key, session)
+        return arrays
+
+    def extract_session(self, key, session):
+        """Resample every lap of a loaded session that is not stored yet."""
+        laps = self._laps(key)
+        for _, lap in session.laps.iterlaps():
+            lap_key = (str(lap['Driver']), int(lap['LapNumber']))
+            if lap_key in laps:
+                continue
+            try:
+                arrays = resample_lap(lap, self.step)
+            except Exception as e:
+                print(f"Skipping telemetry for {lap_key}: {e}")
+                continue
+            with self.lock:
+                laps[lap_key] = arrays
+        self.save(key)
+
+    def extract_in_background(self, key, session):
+        with self.lock:
+            if key in self.extracting:
+                return
+            self.extracting.add(key)
+
+        def run():
+            try:
+                self.extract_session(key, session)
+            except Exception as e:
+                print(f"Telemetry extraction failed for {key}: {e}")
+
+        self.pool.submit(run)
+
+
+TELEMETRY_STORE = TelemetryStore()
@@ -258,7 +258,8 @@ class NBACareerAnalyzer:
         else:
             return 'Bench Player'
     
-    def simulate_career_trajectory(self, position: str, archetype: str, starting_age: int = 22, years: int = 15) -> pd.DataFrame:
+    def simulate_career_trajectory(self, position: str, archetype: str, starting_age: int = 22, years: int = 15,
+                                   verbose: bool = True) -> pd.DataFrame:
         """Simulate a career trajectory based on position, archetype, and age"""
         if position not in self.position_benchmarks:
             print(f"⚠️ Position '{position}' not found in benchmarks, using default")
@@ -330,7 +331,8 @@ class NBACareerAnalyzer:
             })
         
         df = pd.DataFrame(trajectory)
-        print(f"🎯 Simulated {years}-year career for {archetype} {position}")
+        if verbose:
+            print(f"🎯 Simulated {years}-year career for {archetype} {position}")
         return df
     
     def get_career_summary(self, trajectory_df: pd.DataFrame) -> Dict:
@@ -4,19 +4,20 @@ Now includes 82-game seasons with events and gradual stat development
 """
 
 import pygame
-import random
 import time
 import json
 from enum import Enum
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Dict, List, Tuple, Optional
 import sys
 import os
 import math
+from functools import lru_cache
 
 # Add the current directory to path so we can import the analyzer
 sys.path.append('.')
 from nba_career_analyzer import NBACareerAnalyzer
+from nba_season_engine import SeasonEngine, SeasonStats, GameEvent, create_event_pool, season_summary
 
 # Initialize Pygame
 pygame.init()
@@ -26,6 +27,10 @@ pygame.font.init()
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 FPS = 60
+IDLE_FPS = 20  # Frame rate while nothing is simulating
+# Window events after which the screen contents may be lost and need a full repaint
+REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN,
+                  pygame.WINDOWRESTORED, pygame.WINDOWFOCUSGAINED)
 
 # Colors
 COLORS = {
@@ -54,6 +59,11 @@ FONT_LARGE = pygame.font.Font(None, 36)
 FONT_TITLE = pygame.font.Font(None, 48)
 FONT_STATS = pygame.font.Font(None, 32)
 
+@lru_cache(maxsize=512)
+def render_text(text: str, font: pygame.font.Font, color: Tuple[int, int, int]) -> pygame.Surface:
+    """Render text once and reuse the surface while (text, font, color) stays the same"""
+    return font.render(text, True, color)
+
 class GameState(Enum):
     MAIN_MENU = "main_menu"
     PLAYER_CREATION = "player_creation"
@@ -100,16 +110,6 @@ class PlayerStats:
     def get_apg(self) -> float:
         return self.assists / max(self.games_played, 1)
 
-@dataclass
-class SeasonStats:
-    games_played: int = 0
-    total_points: int = 0
-    total_rebounds: int = 0
-    total_assists: int = 0
-    current_ppg: float = 0.0
-    current_rpg: float = 0.0
-    current_apg: float = 0.0
-
 @dataclass
 class Player:
     position: PlayerPosition
@@ -125,14 +125,6 @@ class Player:
     def get_overall(self) -> int:
         return int(self.attributes.get_total() * 99)
 
-@dataclass
-class GameEvent:
-    title: str
-    description: str
-    impact: Dict[str, float]  # stat_name: multiplier
-    duration: int  # number of games
-    is_positive: bool
-
 class NBACareerGameEnhanced:
     def __init__(self):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -183,61 +175,21 @@ class NBACareerGameEnhanced:
         
         # Event system
         self.active_events = []
-        self.event_pool = self._create_event_pool()
+        self.event_pool = create_event_pool()
         
         # Season performance modifiers
         self.current_modifiers = {'ppg': 1.0, 'rpg': 1.0, 'apg': 1.0}
-
-    def _create_event_pool(self) -> List[GameEvent]:
-        """Create a pool of possible events that can occur during the season"""
-        events = [
-            # Positive Events
-            GameEvent("Hot Streak", "You're on fire! Everything is clicking.", 
-                     {'ppg': 1.3, 'rpg': 1.2, 'apg': 1.2}, 5, True),
-            GameEvent("Training Breakthrough", "New training method is paying off!", 
-                     {'ppg': 1.25, 'rpg': 1.1, 'apg': 1.1}, 8, True),
-            GameEvent("Team Chemistry", "Great chemistry with teammates!", 
-                     {'ppg': 1.2, 'rpg': 1.3, 'apg': 1.4}, 6, True),
-            GameEvent("Coaching Confidence", "Coach has full confidence in you!", 
-                     {'ppg': 1.4, 'rpg': 1.0, 'apg': 1.0}, 4, True),
-            GameEvent("Playoff Push", "Stepping up for the playoff push!", 
-                     {'ppg': 1.35, 'rpg': 1.25, 'apg': 1.15}, 7, True),
-            GameEvent("Contract Year", "Playing for that new contract!", 
-                     {'ppg': 1.3, 'rpg': 1.2, 'apg': 1.1}, 10, True),
-            GameEvent("All-Star Form", "Playing at an All-Star level!", 
-                     {'ppg': 1.4, 'rpg': 1.3, 'apg': 1.3}, 6, True),
-            GameEvent("Leadership Role", "Embracing leadership responsibilities!", 
-                     {'ppg': 1.15, 'rpg': 1.35, 'apg': 1.4}, 8, True),
-            
-            # Negative Events
-            GameEvent("Shooting Slump", "Can't buy a basket lately...", 
-                     {'ppg': 0.7, 'rpg': 0.9, 'apg': 0.9}, 5, False),
-            GameEvent("Minor Injury", "Playing through a nagging injury", 
-                     {'ppg': 0.8, 'rpg': 0.7, 'apg': 0.8}, 3, False),
-            GameEvent("Fatigue", "Worn down by the long season", 
-                     {'ppg': 0.75, 'rpg': 0.8, 'apg': 0.85}, 6, False),
-            GameEvent("Team Conflict", "Issues with teammates/coach", 
-                     {'ppg': 0.7, 'rpg': 0.7, 'apg': 0.6}, 4, False),
-            GameEvent("Personal Issues", "Off-court distractions affecting play", 
-                     {'ppg': 0.65, 'rpg': 0.8, 'apg': 0.7}, 5, False),
-            GameEvent("Reduced Minutes", "Coach cutting your playing time", 
-                     {'ppg': 0.6, 'rpg': 0.6, 'apg': 0.6}, 8, False),
-            GameEvent("Bad Form", "Just not playing well right now", 
-                     {'ppg': 0.7, 'rpg': 0.75, 'apg': 0.7}, 7, False),
-            GameEvent("Trade Rumors", "Uncertainty affecting performance", 
-                     {'ppg': 0.75, 'rpg': 0.8, 'apg': 0.75}, 6, False),
-            
-            # Neutral/Mixed Events
-            GameEvent("Role Change", "Adjusting to new team role", 
-                     {'ppg': 0.9, 'rpg': 1.1, 'apg': 1.2}, 10, True),
-            GameEvent("System Change", "New offensive system takes adjustment", 
-                     {'ppg': 0.85, 'rpg': 0.9, 'apg': 1.1}, 8, True),
-            GameEvent("Rookie Wall", "Hitting the rookie wall", 
-                     {'ppg': 0.7, 'rpg': 0.8, 'apg': 0.7}, 10, False),
-            GameEvent("Veteran Savvy", "Using experience to impact games", 
-                     {'ppg': 1.0, 'rpg': 1.1, 'apg': 1.3}, 12, True),
-        ]
-        return events
+        
+        # Headless engine simulates the whole career up front; the UI replays it
+        self.engine = SeasonEngine(self.event_pool, games_per_season=self.total_games)
+        self.career_results = None
+        
+        # Retained rendering: static panels per state and the last drawn frame
+        self.static_layers = {}
+        self.dirty_rects = []
+        self.last_dirty_rects = []
+        self.last_frame_key = None
+        self.last_drawn_state = None
 
     def run(self):
         """Main game loop"""
@@ -245,7 +197,7 @@ class NBACareerGameEnhanced:
             self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(FPS)
+            self.clock.tick(FPS if self.is_simulating else IDLE_FPS)
         
         pygame.quit()
 
@@ -254,6 +206,8 @@ class NBACareerGameEnhanced:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in REPAINT_EVENTS:
+                self.invalidate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     if self.state == GameState.CAREER_SIMULATION:
@@ -304,8 +258,6 @@ class NBACareerGameEnhanced:
 
     def update(self):
         """Update game logic"""
-        self.buttons = []
-        
         # Auto simulation logic
         if self.state == GameState.CAREER_SIMULATION and self.is_simulating:
             current_time = time.time()
@@ -314,106 +266,48 @@ class NBACareerGameEnhanced:
                 self.last_game_time = current_time
 
     def simulate_next_game(self):
-        """Simulate the next game in the season"""
+        """Replay the next game of the season from the precomputed career"""
         if self.current_game > self.total_games:
             # Season is over, advance to next year
             self.end_season()
             return
         
-        # Get base stats from current career year
-        if not self.career_trajectory or self.current_career_year >= len(self.career_trajectory):
+        if self.career_results is None or self.current_career_year >= len(self.career_trajectory):
             return
         
-        year_data = self.career_trajectory[self.current_career_year]
-        
-        # Calculate game stats with current modifiers
-        base_ppg = year_data['PPG']
-        base_rpg = year_data['RPG']
-        base_apg = year_data['APG']
+        season = self.current_career_year
+        game_index = self.current_game - 1
         
-        # Apply event modifiers
-        game_ppg = base_ppg * self.current_modifiers['ppg'] * random.uniform(0.5, 1.5)
-        game_rpg = base_rpg * self.current_modifiers['rpg'] * random.uniform(0.3, 2.0)
-        game_apg = base_apg * self.current_modifiers['apg'] * random.uniform(0.3, 2.0)
+        # Season averages after this game
+        self.player.season_stats = self.career_results.season_stats(season, games=self.current_game)
         
-        # Add realistic game-to-game variation
-        game_ppg = max(0, game_ppg)
-        game_rpg = max(0, game_rpg)
-        game_apg = max(0, game_apg)
+        # Event notifications
+        started = self.career_results.event_started[season, game_index]
+        if started >= 0:
+            self.current_event = self.event_pool[started]
+            print(f"🎯 EVENT: {self.current_event.title} - {self.current_event.description}")
         
-        # Update season stats
-        self.player.season_stats.games_played += 1
-        self.player.season_stats.total_points += int(game_ppg)
-        self.player.season_stats.total_rebounds += int(game_rpg)
-        self.player.season_stats.total_assists += int(game_apg)
+        event_id = self.career_results.event_id[season, game_index]
+        if event_id < 0 and self.active_events:
+            print(f"✅ Event ended: {self.active_events[0].title}")
         
-        # Calculate current averages
-        games = self.player.season_stats.games_played
-        self.player.season_stats.current_ppg = self.player.season_stats.total_points / games
-        self.player.season_stats.current_rpg = self.player.season_stats.total_rebounds / games
-        self.player.season_stats.current_apg = self.player.season_stats.total_assists / games
-        
-        # Trigger events occasionally (about every 10 games)
-        if random.random() < 0.1 and not self.active_events:
-            self.trigger_random_event()
-        
-        # Update active events
-        self.update_active_events()
+        # Active events (copies, so the shared pool keeps its nominal durations)
+        if event_id >= 0:
+            remaining = int(self.career_results.event_remaining[season, game_index])
+            self.active_events = [replace(self.event_pool[event_id], duration=remaining)]
+        else:
+            self.active_events = []
+        self.current_modifiers = self.engine.modifiers_for(event_id)
         
         # Advance game counter
         self.current_game += 1
 
-    def trigger_random_event(self):
-        """Trigger a random event that affects performance"""
-        event = random.choice(self.event_pool)
-        self.active_events.append(event)
-        self.current_event = event
-        
-        # Update modifiers
-        for stat, multiplier in event.impact.items():
-            self.current_modifiers[stat] = multiplier
-        
-        print(f"🎯 EVENT: {event.title} - {event.description}")
-
-    def update_active_events(self):
-        """Update and remove expired events"""
-        expired_events = []
-        
-        for i, event in enumerate(self.active_events):
-            event.duration -= 1
-            if event.duration <= 0:
-                expired_events.append(i)
-        
-        # Remove expired events (in reverse order)
-        for i in reversed(expired_events):
-            expired_event = self.active_events.pop(i)
-            print(f"✅ Event ended: {expired_event.title}")
-        
-        # Reset modifiers if no active events
-        if not self.active_events:
-            self.current_modifiers = {'ppg': 1.0, 'rpg': 1.0, 'apg': 1.0}
-        else:
-            # Recalculate modifiers from remaining events
-            self.current_modifiers = {'ppg': 1.0, 'rpg': 1.0, 'apg': 1.0}
-            for event in self.active_events:
-                for stat, multiplier in event.impact.items():
-                    self.current_modifiers[stat] *= multiplier
-
     def end_season(self):
         """End the current season and prepare for the next"""
         # Record season stats
-        season_summary = {
-            'season': self.current_season,
-            'games_played': self.player.season_stats.games_played,
-            'ppg': self.player.season_stats.current_ppg,
-            'rpg': self.player.season_stats.current_rpg,
-            'apg': self.player.season_stats.current_apg,
-            'total_points': self.player.season_stats.total_points,
-            'total_rebounds': self.player.season_stats.total_rebounds,
-            'total_assists': self.player.season_stats.total_assists
-        }
-        
-        self.season_history.append(season_summary)
+        self.season_history.append(
+            season_summary(self.career_results, self.current_career_year, self.current_season)
+        )
         
         # Advance to next season or end career
         if self.current_season < self.total_seasons and self.current_career_year < len(self.career_trajectory) - 1:
@@ -431,9 +325,49 @@ class NBACareerGameEnhanced:
             # Career is over
             self.show_career_summary()
 
+    def invalidate(self):
+        """Force the next draw to repaint and flip the whole window"""
+        self.last_frame_key = None
+        self.last_drawn_state = None
+
+    def frame_key(self):
+        """Everything the current frame depends on; an unchanged key means nothing to redraw"""
+        mouse_pos = pygame.mouse.get_pos()
+        hovered = tuple(button.rect.collidepoint(mouse_pos) for button in self.buttons)
+        events = tuple((event.title, event.duration) for event in self.active_events)
+        return (self.state, self.current_season, self.current_game, self.is_simulating,
+                round(self.sim_speed, 2), self.selected_position, self.selected_archetype,
+                hovered, events, id(self.player), id(self.current_event))
+
+    def static_layer(self, state):
+        """Background plus the static panels of a state, rendered once"""
+        if state not in self.static_layers:
+            layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            layer.fill(COLORS['bg_dark'])
+            if state == GameState.MAIN_MENU:
+                self.draw_main_menu_static(layer)
+            elif state == GameState.PLAYER_CREATION:
+                self.draw_player_creation_static(layer)
+            elif state == GameState.CAREER_SIMULATION:
+                self.draw_career_simulation_static(layer)
+            self.static_layers[state] = layer
+        return self.static_layers[state]
+
+    def blit(self, surface, dest):
+        """Blit onto the screen and remember the area for the dirty-rectangle update"""
+        rect = self.screen.blit(surface, dest)
+        self.dirty_rects.append(rect)
+        return rect
+
     def draw(self):
-        """Draw everything"""
-        self.screen.fill(COLORS['bg_dark'])
+        """Draw everything that changed since the last frame"""
+        frame_key = self.frame_key()
+        if frame_key == self.last_frame_key:
+            return
+        
+        self.buttons = []
+        self.dirty_rects = []
+        self.screen.blit(self.static_layer(self.state), (0, 0))
         
         if self.state == GameState.MAIN_MENU:
             self.draw_main_menu()
@@ -450,18 +384,26 @@ class NBACareerGameEnhanced:
         elif self.state == GameState.FINAL_SUMMARY:
             self.draw_final_summary()
         
-        pygame.display.flip()
+        # Full flip on state changes, otherwise only the areas drawn this frame or last frame
+        if self.state != self.last_drawn_state:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.last_dirty_rects + self.dirty_rects)
+        
+        self.last_dirty_rects = self.dirty_rects
+        self.last_frame_key = self.frame_key()
+        self.last_drawn_state = self.state
 
-    def draw_main_menu(self):
-        """Draw main menu with enhanced features"""
+    def draw_main_menu_static(self, surface):
+        """Pre-render the static main menu text"""
         # Title
-        title = FONT_TITLE.render("NBA CAREER GAME", True, COLORS['accent'])
+        title = render_text("NBA CAREER GAME", FONT_TITLE, COLORS['accent'])
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 120))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
-        subtitle = FONT_LARGE.render("Enhanced Game-by-Game Edition", True, COLORS['text_secondary'])
+        subtitle = render_text("Enhanced Game-by-Game Edition", FONT_LARGE, COLORS['text_secondary'])
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 170))
-        self.screen.blit(subtitle, subtitle_rect)
+        surface.blit(subtitle, subtitle_rect)
         
         # Features with game-by-game emphasis
         features = [
@@ -479,63 +421,68 @@ class NBACareerGameEnhanced:
         y_offset = 250
         for feature in features:
             if feature:
-                desc = FONT_MEDIUM.render(feature, True, COLORS['text_secondary'])
+                desc = render_text(feature, FONT_MEDIUM, COLORS['text_secondary'])
                 desc_rect = desc.get_rect(center=(SCREEN_WIDTH // 2, y_offset))
-                self.screen.blit(desc, desc_rect)
+                surface.blit(desc, desc_rect)
             y_offset += 35
         
-        # Start button
-        self.draw_button("START CAREER", SCREEN_WIDTH // 2, 550, 
-                        lambda: self.start_player_creation())
-        
         # Instructions
         inst_y = 620
-        inst1 = FONT_MEDIUM.render("Experience an 82-game NBA season with realistic events!", True, COLORS['text_primary'])
+        inst1 = render_text("Experience an 82-game NBA season with realistic events!", FONT_MEDIUM, COLORS['text_primary'])
         inst1_rect = inst1.get_rect(center=(SCREEN_WIDTH // 2, inst_y))
-        self.screen.blit(inst1, inst1_rect)
+        surface.blit(inst1, inst1_rect)
 
-    def draw_player_creation(self):
-        """Draw player creation with data-driven elements"""
+    def draw_main_menu(self):
+        """Draw main menu with enhanced features"""
+        # Start button
+        self.draw_button("START CAREER", SCREEN_WIDTH // 2, 550, 
+                        lambda: self.start_player_creation())
+
+    def draw_player_creation_static(self, surface):
+        """Pre-render the static player creation headings"""
         # Title
-        title = FONT_LARGE.render("Create Your Player", True, COLORS['text_primary'])
+        title = render_text("Create Your Player", FONT_LARGE, COLORS['text_primary'])
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 40))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
-        # Position selection
-        pos_text = FONT_MEDIUM.render("Choose Position:", True, COLORS['text_secondary'])
-        self.screen.blit(pos_text, (200, 100))
+        # Position and archetype selection
+        pos_text = render_text("Choose Position:", FONT_MEDIUM, COLORS['text_secondary'])
+        surface.blit(pos_text, (200, 100))
         
+        archetype_text = render_text("Choose Archetype:", FONT_MEDIUM, COLORS['text_secondary'])
+        surface.blit(archetype_text, (550, 100))
+
+    def draw_player_creation(self):
+        """Draw player creation with data-driven elements"""
+        # Position selection
         positions = list(PlayerPosition)
         for i, pos in enumerate(positions):
             y_pos = 140 + i * 35
             color = COLORS['accent'] if self.selected_position == pos else COLORS['text_primary']
-            pos_name = FONT_MEDIUM.render(pos.value, True, color)
-            self.screen.blit(pos_name, (220, y_pos))
+            pos_name = render_text(pos.value, FONT_MEDIUM, color)
+            self.blit(pos_name, (220, y_pos))
             
             # Draw selection highlight
             if self.selected_position == pos:
-                pygame.draw.rect(self.screen, COLORS['accent'], (215, y_pos - 5, 200, 35), 2)
+                self.dirty_rects.append(pygame.draw.rect(self.screen, COLORS['accent'], (215, y_pos - 5, 200, 35), 2))
         
         # Archetype selection
-        archetype_text = FONT_MEDIUM.render("Choose Archetype:", True, COLORS['text_secondary'])
-        self.screen.blit(archetype_text, (550, 100))
-        
         archetypes = ['Scorer', 'Playmaker', 'Defender', 'All-Around', 'Specialist', 'Prospect']
         for i, arch in enumerate(archetypes):
             y_pos = 140 + i * 35
             color = COLORS['accent'] if self.selected_archetype == arch else COLORS['text_primary']
-            arch_name = FONT_MEDIUM.render(arch, True, color)
-            self.screen.blit(arch_name, (570, y_pos))
+            arch_name = render_text(arch, FONT_MEDIUM, color)
+            self.blit(arch_name, (570, y_pos))
             
             # Draw selection highlight
             if self.selected_archetype == arch:
-                pygame.draw.rect(self.screen, COLORS['accent'], (565, y_pos - 5, 200, 35), 2)
+                self.dirty_rects.append(pygame.draw.rect(self.screen, COLORS['accent'], (565, y_pos - 5, 200, 35), 2))
         
         # Show position benchmarks if position selected
         if self.selected_position:
             bench_y = 400
-            bench_title = FONT_MEDIUM.render(f"{self.selected_position.value} Benchmarks:", True, COLORS['accent'])
-            self.screen.blit(bench_title, (200, bench_y))
+            bench_title = render_text(f"{self.selected_position.value} Benchmarks:", FONT_MEDIUM, COLORS['accent'])
+            self.blit(bench_title, (200, bench_y))
             
             pos_benchmarks = self.analyzer.position_benchmarks.get(self.selected_position.value, {})
             if pos_benchmarks:
@@ -547,8 +494,8 @@ class NBACareerGameEnhanced:
                 ]
                 
                 for i, data in enumerate(bench_data):
-                    data_text = FONT_SMALL.render(data, True, COLORS['text_secondary'])
-                    self.screen.blit(data_text, (220, bench_y + 30 + i * 20))
+                    data_text = render_text(data, FONT_SMALL, COLORS['text_secondary'])
+                    self.blit(data_text, (220, bench_y + 30 + i * 20))
         
         # Start button - only enabled when both position and archetype are selected
         if self.selected_position and self.selected_archetype:
@@ -557,9 +504,29 @@ class NBACareerGameEnhanced:
         else:
             # Draw disabled button
             button_text = "Select Position and Archetype First"
-            text_surface = FONT_MEDIUM.render(button_text, True, COLORS['text_secondary'])
+            text_surface = render_text(button_text, FONT_MEDIUM, COLORS['text_secondary'])
             text_rect = text_surface.get_rect(center=(SCREEN_WIDTH // 2, 600))
-            self.screen.blit(text_surface, text_rect)
+            self.blit(text_surface, text_rect)
+
+    def draw_career_simulation_static(self, surface):
+        """Pre-render the static career simulation labels and control help"""
+        stats_y = 130
+        stats_title = render_text("Current Season Stats", FONT_LARGE, COLORS['text_primary'])
+        surface.blit(stats_title, (SCREEN_WIDTH // 2 - 150, stats_y))
+        
+        # Controls
+        controls_y = 560
+        controls = [
+            "SPACE - Pause/Resume Simulation",
+            "N - Next Game",
+            "← → - Adjust Speed",
+            "ESC - Back to Menu"
+        ]
+        
+        for i, control in enumerate(controls):
+            control_text = render_text(control, FONT_MEDIUM, COLORS['text_secondary'])
+            control_rect = control_text.get_rect(center=(SCREEN_WIDTH // 2, controls_y + i * 25))
+            surface.blit(control_text, control_rect)
 
     def draw_career_simulation(self):
         """Draw career simulation with game-by-game stats"""
@@ -568,72 +535,67 @@ class NBACareerGameEnhanced:
         
         # Player info header
         info_y = 20
-        pos_text = FONT_LARGE.render(self.player.position.value, True, COLORS['accent'])
-        self.screen.blit(pos_text, (50, info_y))
+        pos_text = render_text(self.player.position.value, FONT_LARGE, COLORS['accent'])
+        self.blit(pos_text, (50, info_y))
         
-        overall_text = FONT_LARGE.render(f"Overall: {self.player.get_overall()}", 
-                                        True, COLORS['success'])
-        self.screen.blit(overall_text, (50, info_y + 40))
+        overall_text = render_text(f"Overall: {self.player.get_overall()}", FONT_LARGE, COLORS['success'])
+        self.blit(overall_text, (50, info_y + 40))
         
         # Season info
-        season_text = FONT_LARGE.render(f"Season {self.current_season} - Game {self.current_game}/82", True, COLORS['accent'])
-        self.screen.blit(season_text, (SCREEN_WIDTH // 2 - 200, 10))
+        season_text = render_text(f"Season {self.current_season} - Game {self.current_game}/82", FONT_LARGE, COLORS['accent'])
+        self.blit(season_text, (SCREEN_WIDTH // 2 - 200, 10))
         
-        age_text = FONT_MEDIUM.render(f"Age: {22 + self.current_career_year}", True, COLORS['text_primary'])
-        self.screen.blit(age_text, (SCREEN_WIDTH // 2 - 200, 40))
+        age_text = render_text(f"Age: {22 + self.current_career_year}", FONT_MEDIUM, COLORS['text_primary'])
+        self.blit(age_text, (SCREEN_WIDTH // 2 - 200, 40))
         
         # Current season stats (big display)
-        stats_y = 130
-        stats_title = FONT_LARGE.render("Current Season Stats", True, COLORS['text_primary'])
-        self.screen.blit(stats_title, (SCREEN_WIDTH // 2 - 150, stats_y))
-        
         # PPG
         ppg_y = 180
-        ppg_text = FONT_STATS.render(f"PPG: {self.player.season_stats.current_ppg:.1f}", True, COLORS['success'])
-        self.screen.blit(ppg_text, (200, ppg_y))
+        ppg_text = render_text(f"PPG: {self.player.season_stats.current_ppg:.1f}", FONT_STATS, COLORS['success'])
+        self.blit(ppg_text, (200, ppg_y))
         
         # RPG
-        rpg_text = FONT_STATS.render(f"RPG: {self.player.season_stats.current_rpg:.1f}", True, COLORS['success'])
-        self.screen.blit(rpg_text, (400, ppg_y))
+        rpg_text = render_text(f"RPG: {self.player.season_stats.current_rpg:.1f}", FONT_STATS, COLORS['success'])
+        self.blit(rpg_text, (400, ppg_y))
         
         # APG
-        apg_text = FONT_STATS.render(f"APG: {self.player.season_stats.current_apg:.1f}", True, COLORS['success'])
-        self.screen.blit(apg_text, (600, ppg_y))
+        apg_text = render_text(f"APG: {self.player.season_stats.current_apg:.1f}", FONT_STATS, COLORS['success'])
+        self.blit(apg_text, (600, ppg_y))
         
         # Games played
-        games_text = FONT_STATS.render(f"Games: {self.player.season_stats.games_played}/82", True, COLORS['text_primary'])
-        self.screen.blit(games_text, (800, ppg_y))
+        games_text = render_text(f"Games: {self.player.season_stats.games_played}/82", FONT_STATS, COLORS['text_primary'])
+        self.blit(games_text, (800, ppg_y))
         
         # Performance tier
         tier_y = 230
         if self.career_trajectory and self.current_career_year < len(self.career_trajectory):
             tier = self.career_trajectory[self.current_career_year]['Performance_Tier']
             tier_color = self.tier_colors.get(tier, COLORS['text_secondary'])
-            tier_text = FONT_LARGE.render(f"Tier: {tier}", True, tier_color)
-            self.screen.blit(tier_text, (SCREEN_WIDTH // 2 - 100, tier_y))
+            tier_text = render_text(f"Tier: {tier}", FONT_LARGE, tier_color)
+            self.blit(tier_text, (SCREEN_WIDTH // 2 - 100, tier_y))
         
         # Career progress
         progress_y = 280
-        progress_text = FONT_MEDIUM.render(f"Career Progress: Season {self.current_season}/15", True, COLORS['text_secondary'])
-        self.screen.blit(progress_text, (SCREEN_WIDTH // 2 - 150, progress_y))
+        progress_text = render_text(f"Career Progress: Season {self.current_season}/15", FONT_MEDIUM, COLORS['text_secondary'])
+        self.blit(progress_text, (SCREEN_WIDTH // 2 - 150, progress_y))
         
         # Career totals
         totals_y = 320
         total_points = sum(year['PPG'] * 82 for year in self.career_trajectory[:self.current_career_year])
         if self.player.season_stats.games_played > 0:
             total_points += self.player.season_stats.total_points
-        totals_text = FONT_MEDIUM.render(f"Career Points: {total_points:.0f}", True, COLORS['money'])
-        self.screen.blit(totals_text, (SCREEN_WIDTH // 2 - 100, totals_y))
+        totals_text = render_text(f"Career Points: {total_points:.0f}", FONT_MEDIUM, COLORS['money'])
+        self.blit(totals_text, (SCREEN_WIDTH // 2 - 100, totals_y))
         
         # Active events
         if self.active_events:
             event_y = 380
-            event_title = FONT_MEDIUM.render("Active Events:", True, COLORS['warning'])
-            self.screen.blit(event_title, (50, event_y))
+            event_title = render_text("Active Events:", FONT_MEDIUM, COLORS['warning'])
+            self.blit(event_title, (50, event_y))
             
             for i, event in enumerate(self.active_events[:3]):  # Show max 3 events
-                event_text = FONT_SMALL.render(f"• {event.title} ({event.duration} games)", True, COLORS['text_secondary'])
-                self.screen.blit(event_text, (50, event_y + 25 + i * 20))
+                event_text = render_text(f"• {event.title} ({event.duration} games)", FONT_SMALL, COLORS['text_secondary'])
+                self.blit(event_text, (50, event_y + 25 + i * 20))
         
         # Simulation controls
         sim_y = 450
@@ -644,29 +606,15 @@ class NBACareerGameEnhanced:
             status_text = "PAUSED (Press SPACE to resume or N for next game)"
             status_color = COLORS['warning']
         
-        status = FONT_LARGE.render(status_text, True, status_color)
+        status = render_text(status_text, FONT_LARGE, status_color)
         status_rect = status.get_rect(center=(SCREEN_WIDTH // 2, sim_y))
-        self.screen.blit(status, status_rect)
+        self.blit(status, status_rect)
         
         # Speed controls
         speed_y = 520
-        speed_text = FONT_MEDIUM.render(f"Speed: {self.sim_speed:.2f}s/game (Use ← → to adjust)", True, COLORS['text_secondary'])
+        speed_text = render_text(f"Speed: {self.sim_speed:.2f}s/game (Use ← → to adjust)", FONT_MEDIUM, COLORS['text_secondary'])
         speed_rect = speed_text.get_rect(center=(SCREEN_WIDTH // 2, speed_y))
-        self.screen.blit(speed_text, speed_rect)
-        
-        # Controls
-        controls_y = 560
-        controls = [
-            "SPACE - Pause/Resume Simulation",
-            "N - Next Game",
-            "← → - Adjust Speed",
-            "ESC - Back to Menu"
-        ]
-        
-        for i, control in enumerate(controls):
-            control_text = FONT_MEDIUM.render(control, True, COLORS['text_secondary'])
-            control_rect = control_text.get_rect(center=(SCREEN_WIDTH // 2, controls_y + i * 25))
-            self.screen.blit(control_text, control_rect)
+        self.blit(speed_text, speed_rect)
         
         # Next game button
         self.draw_button("NEXT GAME", SCREEN_WIDTH // 2, 700, 
@@ -688,6 +636,9 @@ class NBACareerGameEnhanced:
         self.career_trajectory = trajectory.to_dict('records')
         self.current_career_year = 0
         
+        # Simulate every game of the career at once; the UI only replays it
+        self.career_results = self.engine.simulate_career(self.career_trajectory)
+        
         # Create player object
         self.player = Player(
             position=self.selected_position,
@@ -715,9 +666,9 @@ class NBACareerGameEnhanced:
             return
             
         # Title
-        title = FONT_TITLE.render("Career Complete!", True, COLORS['accent'])
+        title = render_text("Career Complete!", FONT_TITLE, COLORS['accent'])
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 50))
-        self.screen.blit(title, title_rect)
+        self.blit(title, title_rect)
         
         # Career summary stats
         summary_data = [
@@ -734,9 +685,9 @@ class NBACareerGameEnhanced:
         
         y_pos = 120
         for i, stat in enumerate(summary_data):
-            stat_text = FONT_MEDIUM.render(stat, True, COLORS['text_primary'])
+            stat_text = render_text(stat, FONT_MEDIUM, COLORS['text_primary'])
             stat_rect = stat_text.get_rect(center=(SCREEN_WIDTH // 2, y_pos + i * 35))
-            self.screen.blit(stat_text, stat_rect)
+            self.blit(stat_text, stat_rect)
         
         # Performance evaluation
         eval_y = 450
@@ -753,9 +704,9 @@ class NBACareerGameEnhanced:
             evaluation = "ROLE PLAYER CAREER!"
             eval_color = COLORS['text_secondary']
         
-        eval_text = FONT_LARGE.render(evaluation, True, eval_color)
+        eval_text = render_text(evaluation, FONT_LARGE, eval_color)
         eval_rect = eval_text.get_rect(center=(SCREEN_WIDTH // 2, eval_y))
-        self.screen.blit(eval_text, eval_rect)
+        self.blit(eval_text, eval_rect)
         
         # Buttons
         self.draw_button("NEW CAREER", SCREEN_WIDTH // 2 - 200, 550, 
@@ -784,10 +735,12 @@ class NBACareerGameEnhanced:
         if not self.current_event:
             return
         
-        # Draw event overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
+        # Draw event overlay (built once, it never changes)
+        if 'event_overlay' not in self.static_layers:
+            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 180))
+            self.static_layers['event_overlay'] = overlay
+        self.blit(self.static_layers['event_overlay'], (0, 0))
         
         # Event box
         box_width = 600
@@ -795,41 +748,41 @@ class NBACareerGameEnhanced:
         box_x = (SCREEN_WIDTH - box_width) // 2
         box_y = (SCREEN_HEIGHT - box_height) // 2
         
-        pygame.draw.rect(self.screen, COLORS['bg_light'], (box_x, box_y, box_width, box_height), border_radius=15)
-        pygame.draw.rect(self.screen, COLORS['accent'], (box_x, box_y, box_width, box_height), 3, border_radius=15)
+        self.dirty_rects.append(pygame.draw.rect(self.screen, COLORS['bg_light'], (box_x, box_y, box_width, box_height), border_radius=15))
+        self.dirty_rects.append(pygame.draw.rect(self.screen, COLORS['accent'], (box_x, box_y, box_width, box_height), 3, border_radius=15))
         
         # Event title
         title_color = COLORS['success'] if self.current_event.is_positive else COLORS['danger']
-        title = FONT_LARGE.render(self.current_event.title, True, title_color)
+        title = render_text(self.current_event.title, FONT_LARGE, title_color)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, box_y + 50))
-        self.screen.blit(title, title_rect)
+        self.blit(title, title_rect)
         
         # Event description
-        desc = FONT_MEDIUM.render(self.current_event.description, True, COLORS['text_primary'])
+        desc = render_text(self.current_event.description, FONT_MEDIUM, COLORS['text_primary'])
         desc_rect = desc.get_rect(center=(SCREEN_WIDTH // 2, box_y + 120))
-        self.screen.blit(desc, desc_rect)
+        self.blit(desc, desc_rect)
         
         # Impact details
         impact_text = "Stat Impact:"
-        impact_title = FONT_MEDIUM.render(impact_text, True, COLORS['text_secondary'])
+        impact_title = render_text(impact_text, FONT_MEDIUM, COLORS['text_secondary'])
         impact_rect = impact_title.get_rect(center=(SCREEN_WIDTH // 2, box_y + 170))
-        self.screen.blit(impact_title, impact_rect)
+        self.blit(impact_title, impact_rect)
         
         # Show impacts
         y_offset = 200
         for stat, multiplier in self.current_event.impact.items():
             impact_desc = f"{stat.upper()}: {multiplier:.1f}x"
             impact_color = COLORS['success'] if multiplier > 1.0 else COLORS['danger']
-            impact_text = FONT_SMALL.render(impact_desc, True, impact_color)
+            impact_text = render_text(impact_desc, FONT_SMALL, impact_color)
             impact_rect = impact_text.get_rect(center=(SCREEN_WIDTH // 2, box_y + y_offset))
-            self.screen.blit(impact_text, impact_rect)
+            self.blit(impact_text, impact_rect)
             y_offset += 25
         
         # Duration
         duration_text = f"Duration: {self.current_event.duration} games"
-        duration = FONT_SMALL.render(duration_text, True, COLORS['text_secondary'])
+        duration = render_text(duration_text, FONT_SMALL, COLORS['text_secondary'])
         duration_rect = duration.get_rect(center=(SCREEN_WIDTH // 2, box_y + 260))
-        self.screen.blit(duration, duration_rect)
+        self.blit(duration, duration_rect)
 
     def draw_result(self):
         """Draw event result"""
@@ -842,7 +795,7 @@ class NBACareerGameEnhanced:
     def draw_button(self, text, x, y, callback, width=200, height=50):
         """Draw a button"""
         button = Button(text, x, y, width, height, callback)
-        button.draw(self.screen)
+        self.dirty_rects.append(button.draw(self.screen))
         self.buttons.append(button)
 
 class Button:
@@ -867,9 +820,10 @@ class Button:
         pygame.draw.rect(screen, COLORS['text_primary'], self.rect, 2, border_radius=10)
         
         # Draw text
-        text_surface = FONT_MEDIUM.render(self.text, True, COLORS['text_primary'])
+        text_surface = render_text(self.text, FONT_MEDIUM, COLORS['text_primary'])
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
+        return self.rect
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
@@ -0,0 +1,336 @@
+"""
+NBA Season Engine - Headless Game-by-Game Simulation
+Simulates whole 82-game seasons (and whole careers) in vectorized NumPy calls,
+independently of the pygame front end
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import sys
+
+STAT_KEYS = ('ppg', 'rpg', 'apg')
+TRAJECTORY_COLUMNS = ('PPG', 'RPG', 'APG')
+GAMES_PER_SEASON = 82
+EVENT_CHANCE = 0.1  # About one event every 10 games
+
+# Game-to-game variation (low, high) applied on top of the season baseline
+GAME_VARIANCE = np.array([
+    [0.5, 1.5],  # ppg
+    [0.3, 2.0],  # rpg
+    [0.3, 2.0],  # apg
+])
+
+
+@dataclass
+class SeasonStats:
+    games_played: int = 0
+    total_points: int = 0
+    total_rebounds: int = 0
+    total_assists: int = 0
+    current_ppg: float = 0.0
+    current_rpg: float = 0.0
+    current_apg: float = 0.0
+
+
+@dataclass
+class GameEvent:
+    title: str
+    description: str
+    impact: Dict[str, float]  # stat_name: multiplier
+    duration: int  # number of games
+    is_positive: bool
+
+
+def create_event_pool() -> List[GameEvent]:
+    """Create a pool of possible events that can occur during the season"""
+    events = [
+        # Positive Events
+        GameEvent("Hot Streak", "You're on fire! Everything is clicking.",
+                 {'ppg': 1.3, 'rpg': 1.2, 'apg': 1.2}, 5, True),
+        GameEvent("Training Breakthrough", "New training method is paying off!",
+                 {'ppg': 1.25, 'rpg': 1.1, 'apg': 1.1}, 8, True),
+        GameEvent("Team Chemistry", "Great chemistry with teammates!",
+                 {'ppg': 1.2, 'rpg': 1.3, 'apg': 1.4}, 6, True),
+        GameEvent("Coaching Confidence", "Coach has full confidence in you!",
+                 {'ppg': 1.4, 'rpg': 1.0, 'apg': 1.0}, 4, True),
+        GameEvent("Playoff Push", "Stepping up for the playoff push!",
+                 {'ppg': 1.35, 'rpg': 1.25, 'apg': 1.15}, 7, True),
+        GameEvent("Contract Year", "Playing for that new contract!",
+                 {'ppg': 1.3, 'rpg': 1.2, 'apg': 1.1}, 10, True),
+        GameEvent("All-Star Form", "Playing at an All-Star level!",
+                 {'ppg': 1.4, 'rpg': 1.3, 'apg': 1.3}, 6, True),
+        GameEvent("Leadership Role", "Embracing leadership responsibilities!",
+                 {'ppg': 1.15, 'rpg': 1.35, 'apg': 1.4}, 8, True),
+
+        # Negative Events
+        GameEvent("Shooting Slump", "Can't buy a basket lately...",
+                 {'ppg': 0.7, 'rpg': 0.9, 'apg': 0.9}, 5, False),
+        GameEvent("Minor Injury", "Playing through a nagging injury",
+                 {'ppg': 0.8, 'rpg': 0.7, 'apg': 0.8}, 3, False),
+        GameEvent("Fatigue", "Worn down by the long season",
+                 {'ppg': 0.75, 'rpg': 0.8, 'apg': 0.85}, 6, False),
+        GameEvent("Team Conflict", "Issues with teammates/coach",
+                 {'ppg': 0.7, 'rpg': 0.7, 'apg': 0.6}, 4, False),
+        GameEvent("Personal Issues", "Off-court distractions affecting play",
+                 {'ppg': 0.65, 'rpg': 0.8, 'apg': 0.7}, 5, False),
+        GameEvent("Reduced Minutes", "Coach cutting your playing time",
+                 {'ppg': 0.6, 'rpg': 0.6, 'apg': 0.6}, 8, False),
+        GameEvent("Bad Form", "Just not playing well right now",
+                 {'ppg': 0.7, 'rpg': 0.75, 'apg': 0.7}, 7, False),
+        GameEvent("Trade Rumors", "Uncertainty affecting performance",
+                 {'ppg': 0.75, 'rpg': 0.8, 'apg': 0.75}, 6, False),
+
+        # Neutral/Mixed Events
+        GameEvent("Role Change", "Adjusting to new team role",
+                 {'ppg': 0.9, 'rpg': 1.1, 'apg': 1.2}, 10, True),
+        GameEvent("System Change", "New offensive system takes adjustment",
+                 {'ppg': 0.85, 'rpg': 0.9, 'apg': 1.1}, 8, True),
+        GameEvent("Rookie Wall", "Hitting the rookie wall",
+                 {'ppg': 0.7, 'rpg': 0.8, 'apg': 0.7}, 10, False),
+        GameEvent("Veteran Savvy", "Using experience to impact games",
+                 {'ppg': 1.0, 'rpg': 1.1, 'apg': 1.3}, 12, True),
+    ]
+    return events
+
+
+@dataclass
+class EventSchedule:
+    """Events sampled up front for a batch of seasons
+
+    Each season has a fixed number of slots; slots whose event would start
+    after the last game are marked invalid.
+    """
+    start: np.ndarray     # (n, slots) game the event triggers after
+    duration: np.ndarray  # (n, slots) nominal duration in games
+    event_id: np.ndarray  # (n, slots) index into the event pool
+    impact: np.ndarray    # (n, slots, 3) ppg/rpg/apg multipliers
+    valid: np.ndarray     # (n, slots) slot holds an event inside the season
+
+    @property
+    def end(self) -> np.ndarray:
+        """Game on which each event expires (its last modified game)"""
+        return self.start + self.duration - 1
+
+
+@dataclass
+class SeasonResults:
+    """Game-by-game output for a batch of simulated seasons
+
+    All arrays share the leading batch shape of the base stats passed to
+    ``SeasonEngine.simulate_seasons`` followed by a games axis.
+    """
+    stats: np.ndarray            # (..., games, 3) integer points/rebounds/assists per game
+    modifiers: np.ndarray        # (..., games, 3) event multiplier in effect for each game
+    event_started: np.ndarray    # (..., games) pool index triggered after each game, -1 if none
+    event_id: np.ndarray         # (..., games) pool index still active after each game, -1 if none
+    event_remaining: np.ndarray  # (..., games) games left on the active event
+
+    @property
+    def n_games(self) -> int:
+        return self.stats.shape[-2]
+
+    def totals(self, games: Optional[int] = None) -> np.ndarray:
+        """Season totals after the first ``games`` games, shape (..., 3)"""
+        games = self.n_games if games is None else games
+        return self.stats[..., :games, :].sum(axis=-2)
+
+    def averages(self, games: Optional[int] = None) -> np.ndarray:
+        """Season per-game averages after the first ``games`` games, shape (..., 3)"""
+        games = self.n_games if games is None else games
+        return self.totals(games) / max(games, 1)
+
+    def season_stats(self, index, games: Optional[int] = None) -> SeasonStats:
+        """SeasonStats for one season of the batch after ``games`` games"""
+        games = self.n_games if games is None else games
+        totals = self.stats[index][:games].sum(axis=0)
+        averages = totals / max(games, 1)
+        return SeasonStats(
+            games_played=games,
+            total_points=int(totals[0]),
+            total_rebounds=int(totals[1]),
+            total_assists=int(totals[2]),
+            current_ppg=float(averages[0]),
+            current_rpg=float(averages[1]),
+            current_apg=float(averages[2]),
+        )
+
+
+class SeasonEngine:
+    """Pure game-by-game season model shared by the pygame game and batch analysis"""
+
+    def __init__(self, event_pool: Optional[List[GameEvent]] = None,
+                 games_per_season: int = GAMES_PER_SEASON,
+                 event_chance: float = EVENT_CHANCE,
+                 seed: Optional[int] = None):
+        self.event_pool = event_pool if event_pool is not None else create_event_pool()
+        self.games_per_season = games_per_season
+        self.event_chance = event_chance
+        self.rng = np.random.default_rng(seed)
+
+        # Event pool as arrays so events can be applied to many seasons at once
+        self.event_impacts = np.array(
+            [[event.impact.get(stat, 1.0) for stat in STAT_KEYS] for event in self.event_pool]
+        )
+        self.event_durations = np.array([event.duration for event in self.event_pool])
+
+    def modifiers_for(self, event_id: int) -> Dict[str, float]:
+        """Modifier dict for an active pool index (-1 means no active event)"""
+        if event_id < 0:
+            return {stat: 1.0 for stat in STAT_KEYS}
+        return dict(zip(STAT_KEYS, self.event_impacts[event_id].tolist()))
+
+    def sample_event_schedule(self, n: int) -> EventSchedule:
+        """Sample every event of ``n`` seasons at once
+
+        Only one event can be active at a time and each game without one
+        triggers a new event with probability ``event_chance``, so the gap of
+        free games before each event is geometric and events follow each
+        other back to back: start_k = start_(k-1) + duration_(k-1) + gap_k.
+        """
+        games = self.games_per_season
+        # Every event blocks at least min(durations) games, which bounds the slots needed
+        slots = games // max(int(self.event_durations.min()), 1) + 1
+
+        event_id = self.rng.integers(len(self.event_pool), size=(n, slots))
+        duration = self.event_durations[event_id]
+        if self.event_chance > 0:
+            gaps = self.rng.geometric(self.event_chance, size=(n, slots)) - 1
+        else:
+            gaps = np.full((n, slots), games)
+
+        # Free games before each event plus the durations of the previous ones
+        blocked = np.zeros_like(duration)
+        blocked[:, 1:] = duration[:, :-1]
+        start = np.cumsum(gaps + blocked, axis=1)
+
+        return EventSchedule(
+            start=start,
+            duration=duration,
+            event_id=event_id,
+            impact=self.event_impacts[event_id],
+            valid=start < games,
+        )
+
+    def apply_event_schedule(self, schedule: EventSchedule):
+        """Turn an event schedule into per-game arrays
+
+        Returns (modifiers, event_started, event_id, event_remaining) with the
+        same meaning as the matching ``SeasonResults`` fields.
+        """
+        n, slots = schedule.start.shape
+        games = self.games_per_season
+        rows, cols = np.nonzero(schedule.valid)
+        starts = schedule.start[rows, cols]
+
+        event_started = np.full((n, games), -1, dtype=int)
+        event_started[rows, starts] = schedule.event_id[rows, cols]
+
+        # Latest slot started on or before every game (events never overlap)
+        latest = np.zeros((n, games), dtype=int)
+        latest[rows, starts] = cols + 1
+        latest = np.maximum.accumulate(latest, axis=1)
+        has_event = latest > 0
+        slot = np.where(has_event, latest - 1, 0)
+
+        game = np.arange(games)
+        end = np.take_along_axis(schedule.end, slot, axis=1)
+        active = has_event & (game < end)
+        event_id = np.where(active, np.take_along_axis(schedule.event_id, slot, axis=1), -1)
+        event_remaining = np.where(active, end - game, 0)
+
+        # An event modifies the games after the one it triggered on, up to its end
+        impact = np.take_along_axis(schedule.impact, slot[..., None], axis=1)
+        modifiers = np.ones((n, games, len(STAT_KEYS)))
+        modifiers[:, 1:] = np.where(active[:, :-1, None], impact[:, :-1], 1.0)
+
+        return modifiers, event_started, event_id, event_remaining
+
+    def simulate_seasons(self, base_stats) -> SeasonResults:
+        """Simulate full seasons for every row of ``base_stats``
+
+        ``base_stats`` has shape (..., 3) holding the season PPG/RPG/APG
+        baselines; any leading shape (seasons, careers x seasons, ...) works.
+        """
+        base = np.asarray(base_stats, dtype=float)
+        batch_shape = base.shape[:-1]
+        base = base.reshape(-1, len(STAT_KEYS))
+        n = base.shape[0]
+        games = self.games_per_season
+
+        schedule = self.sample_event_schedule(n)
+        modifiers, event_started, event_id, event_remaining = self.apply_event_schedule(schedule)
+
+        variance = self.rng.uniform(GAME_VARIANCE[:, 0], GAME_VARIANCE[:, 1],
+                                    size=(n, games, len(STAT_KEYS)))
+        stats = np.floor(np.maximum(base[:, None, :] * modifiers * variance, 0)).astype(int)
+
+        return SeasonResults(
+            stats=stats.reshape(batch_shape + (games, len(STAT_KEYS))),
+            modifiers=modifiers.reshape(batch_shape + (games, len(STAT_KEYS))),
+            event_started=event_started.reshape(batch_shape + (games,)),
+            event_id=event_id.reshape(batch_shape + (games,)),
+            event_remaining=event_remaining.reshape(batch_shape + (games,)),
+        )
+
+    def simulate_career(self, trajectory) -> SeasonResults:
+        """Simulate every season of one career trajectory (records or DataFrame)"""
+        return self.simulate_seasons(career_base_stats(trajectory))
+
+    def simulate_careers(self, trajectories: Sequence) -> SeasonResults:
+        """Simulate many equal-length careers at once, batch shape (careers, seasons)"""
+        return self.simulate_seasons(np.stack([career_base_stats(t) for t in trajectories]))
+
+
+def career_base_stats(trajectory) -> np.ndarray:
+    """Season baselines (seasons, 3) from an analyzer trajectory"""
+    if hasattr(trajectory, 'to_dict'):
+        trajectory = trajectory.to_dict('records')
+    return np.array([[year[col] for col in TRAJECTORY_COLUMNS] for year in trajectory], dtype=float)
+
+
+def season_summary(results: SeasonResults, index, season: int) -> Dict:
+    """Season record in the same format the game keeps in ``season_history``"""
+    stats = results.season_stats(index)
+    return {
+        'season': season,
+        'games_played': stats.games_played,
+        'ppg': stats.current_ppg,
+        'rpg': stats.current_rpg,
+        'apg': stats.current_apg,
+        'total_points': stats.total_points,
+        'total_rebounds': stats.total_rebounds,
+        'total_assists': stats.total_assists
+    }
+
+
+# Batch analysis of many careers without the pygame window
+if __name__ == "__main__":
+    import time
+    sys.path.append('.')
+    from nba_career_analyzer import NBACareerAnalyzer
+
+    n_careers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    position = sys.argv[2] if len(sys.argv) > 2 else "Point Guard"
+    archetype = sys.argv[3] if len(sys.argv) > 3 else "Scorer"
+
+    analyzer = NBACareerAnalyzer(
+        '2021-2022 NBA Player Stats - Regular.csv',
+        '2021-2022 NBA Player Stats - Playoffs.csv'
+    )
+    trajectories = [
+        analyzer.simulate_career_trajectory(position, archetype, starting_age=22, years=15, verbose=False)
+        for _ in range(n_careers)
+    ]
+
+    engine = SeasonEngine()
+    start = time.perf_counter()
+    results = engine.simulate_careers(trajectories)
+    elapsed = time.perf_counter() - start
+
+    career_ppg = results.averages().mean(axis=1)[:, 0]
+    print(f"\n🏀 Simulated {n_careers} careers ({results.stats[..., 0].size} games) in {elapsed:.2f}s")
+    print(f"  Career PPG: mean {career_ppg.mean():.1f}, "
+          f"p10 {np.percentile(career_ppg, 10):.1f}, p90 {np.percentile(career_ppg, 90):.1f}")
+    print(f"  Hall of Fame careers (25+ PPG): {(career_ppg >= 25).mean():.1%}")
+    print(f"  Events per season: {(results.event_started >= 0).sum(axis=-1).mean():.1f}")
@@ -0,0 +1,154 @@
+"""Pose detection, vectorized scoring and overlay rendering for uploaded videos"""
+import cv2
+import numpy as np
+
+from pose_reference import FRAME_STEP_MS, LANDMARK_FIELDS, NUM_LANDMARKS, has_pose, landmarks_to_array
+
+selected_indices = [0, 11, 12, 13, 14, 19, 20, 26, 23, 24, 25, 30, 29]
+
+landmark_names = {
+    0: 'Nose', 11: 'L_Shoulder', 12: 'R_Shoulder',
+    13: 'L_Elbow', 14: 'R_Elbow', 19: 'L_Index', 20: 'R_Index',
+    23: 'L_Hip', 24: 'R_Hip', 25: 'L_Knee',
+    26: 'R_Knee', 29: 'L_Heel', 30: 'R_Heel'
+}
+
+LANDMARK_THRESHOLD = 0.05
+PROGRESS_EVERY = 15  # frames between progress callbacks
+
+# Overlay box half-size per selected landmark: head, hands, everything else
+BOX_SIZES = np.array([40 if i == 0 else 22 if i in (5, 6) else 12 for i in range(len(selected_indices))])
+
+
+def weighted_distance(pose1, pose2):
+    """Weighted distance using confidence scores
+
+    Poses are (..., 33, 4) arrays of x, y, z, visibility; any leading
+    frame dimensions are compared element-wise.
+    """
+    weight = pose1[..., 3] * pose2[..., 3]
+    total_confidence = weight.sum(axis=-1)
+    distance_squared = ((pose1[..., :2] - pose2[..., :2]) ** 2).sum(axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distance = np.sqrt((weight * distance_squared).sum(axis=-1) / total_confidence)
+    return np.where(total_confidence == 0, np.inf, distance)
+
+
+def video_properties(cap):
+    """fps, width, height and rotation of an opened capture, with width/height after rotation"""
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    # Check for rotation metadata
+    rotation = int(cap.get(cv2.CAP_PROP_ORIENTATION_META))
+
+    # Adjust dimensions if video is rotated 90 or 270 degrees
+    if rotation in [90, 270]:
+        width, height = height, width
+    return fps, width, height, rotation
+
+
+def read_frames(cap, rotation):
+    """Yield BGR frames with rotation correction applied"""
+    while True:
+        success, img = cap.read()
+        if not success:
+            break
+
+        if rotation == 90:
+            img = cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+        elif rotation == 180:
+            img = cv2.rotate(img, cv2.ROTATE_180)
+        elif rotation == 270:
+            img = cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        yield img
+
+
+def detect_poses(video_path, landmarker, on_progress=None):
+    """Run the landmarker over a video, returning (frames, 33, 4) with NaN for missed frames
+
+    `landmarker.detect_for_video(rgb, timestamp_ms)` gets each frame as an RGB array.
+
+    `on_progress(frames_done, total_frames)` is called every PROGRESS_EVERY frames.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    _, _, _, rotation = video_properties(cap)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    poses = []
+    frame_timestamp_ms = 0
+
+    for img in read_frames(cap, rotation):
+        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        results = landmarker.detect_for_video(imgRGB, frame_timestamp_ms)
+        frame_timestamp_ms += FRAME_STEP_MS
+
+        if results.pose_landmarks:
+            poses.append(landmarks_to_array(results.pose_landmarks[0]))
+        else:
+            poses.append(np.full((NUM_LANDMARKS, LANDMARK_FIELDS), np.nan, dtype=np.float32))
+
+        if on_progress is not None and len(poses) % PROGRESS_EVERY == 0:
+            on_progress(len(poses), total_frames)
+
+    cap.release()
+    if on_progress is not None:
+        on_progress(len(poses), total_frames)
+    if not poses:
+        return np.empty((0, NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+    return np.stack(poses)
+
+
+def score_poses(poses, reference, threshold=LANDMARK_THRESHOLD):
+    """Compare every frame against the reference in one pass
+
+    Frames are aligned by index; a frame is compared only when both it and
+    the matching reference frame have a pose. Returns a dict with
+    `compared` (frames,), `pose_distance` (frames,), `landmark_distance`
+    and `correct` (frames, len(selected_indices)) and `correct_counts`
+    (len(selected_indices),).
+    """
+    n_frames = len(poses)
+    n_common = min(n_frames, len(reference))
+
+    aligned_reference = np.full_like(poses, np.nan)
+    aligned_reference[:n_common] = reference[:n_common]
+    compared = has_pose(poses) & has_pose(aligned_reference)
+
+    pose_distance = np.full(n_frames, np.nan)
+    pose_distance[compared] = weighted_distance(poses[compared], aligned_reference[compared])
+
+    landmark_distance = np.linalg.norm(
+        poses[:, selected_indices, :2] - aligned_reference[:, selected_indices, :2], axis=-1)
+    correct = compared[:, None] & (landmark_distance < threshold)
+
+    return {
+        "compared": compared,
+        "pose_distance": pose_distance,
+        "landmark_distance": landmark_distance,
+        "correct": correct,
+        "correct_counts": correct.sum(axis=0),
+    }
+
+
+def draw_overlay(video_path, output_path, poses, scores):
+    """Write a copy of the video with green/red boxes on the selected landmarks"""
+    cap = cv2.VideoCapture(str(video_path))
+    fps_out, width, height, rotation = video_properties(cap)
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(str(output_path), fourcc, fps_out, (width, height))
+
+    for frame_index, img in enumerate(read_frames(cap, rotation)):
+        if frame_index < len(poses) and scores["compared"][frame_index]:
+            h, w, c = img.shape
+            points = poses[frame_index, selected_indices, :2] * (w, h)
+            for (cx, cy), size, is_correct in zip(points.astype(int).tolist(), BOX_SIZES.tolist(),
+                                                   scores["correct"][frame_index]):
+                color = (0, 255, 0) if is_correct else (0, 0, 255)
+                cv2.rectangle(img, (cx - size, cy - size), (cx + size, cy + size), color, 2)
+
+        out.write(img)
+
+    cap.release()
+    out.release()
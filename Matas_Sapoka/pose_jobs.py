@@ -0,0 +1,331 @@
+"""Background analysis jobs for the Pose Analysis API
+
+Uploads are analyzed in a bounded worker pool so the event loop never runs
+OpenCV, MediaPipe or matplotlib itself. Everything a worker needs is passed
+in explicitly (landmarker factory, reference cache path, output directory),
+so a stub detector can replace MediaPipe in tests. MediaPipe itself is only
+imported by create_landmarker.
+"""
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend for workers
+import matplotlib.pyplot as plt
+import numpy as np
+
+from pose_analysis import detect_poses, draw_overlay, landmark_names, score_poses, selected_indices
+
+STAGES = ("detect", "score", "overlay", "chart")
+
+
+class VideoLandmarker:
+    """MediaPipe PoseLandmarker that takes RGB numpy frames
+
+    `detect_for_video(rgb, timestamp_ms)` is the whole interface the analysis
+    code uses, so a stub with the same method can stand in for it.
+    """
+
+    def __init__(self, landmarker, mp):
+        self.landmarker = landmarker
+        self.mp = mp
+
+    def detect_for_video(self, rgb, timestamp_ms):
+        mp_image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb)
+        return self.landmarker.detect_for_video(mp_image, timestamp_ms)
+
+
+def create_landmarker(model_path, detector_settings):
+    """Fresh VIDEO-mode PoseLandmarker (one per video to avoid timestamp state issues)"""
+    import mediapipe as mp
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    options = vision.PoseLandmarkerOptions(
+        base_options=python.BaseOptions(model_asset_path=model_path),
+        running_mode=vision.RunningMode.VIDEO,
+        **detector_settings)
+    return VideoLandmarker(vision.PoseLandmarker.create_from_options(options), mp)
+
+
+def render_accuracy_chart(correct_counts, perfect_frames, overall_score, output_chart):
+    """Bar chart of correct frames per body part"""
+    labels = [landmark_names[idx] for idx in selected_indices]
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bars = ax.bar(labels, correct_counts, color='#4CAF50', edgecolor='black', linewidth=1.5)
+
+    ax.axhline(y=perfect_frames, color='red', linestyle='--', linewidth=2,
+               label=f'Perfect (Reference): {perfect_frames} frames')
+
+    ax.set_xlabel('Body Parts', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Correct Frames (Green)', fontsize=14, fontweight='bold')
+    ax.set_title(f'Pose Accuracy Analysis\nOverall Score: {overall_score:.2f}%',
+                 fontsize=16, fontweight='bold')
+    ax.set_ylim(0, perfect_frames + 20)
+    ax.legend(fontsize=12)
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    plt.xticks(rotation=45, ha='right')
+
+    for bar, count in zip(bars, correct_counts):
+        height = bar.get_height()
+        percentage = (count / perfect_frames) * 100
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{int(count)}\n({percentage:.1f}%)',
+                ha='center', va='bottom', fontsize=10, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(str(output_chart), dpi=150, bbox_inches='tight')
+    plt.close(fig)
+
+
+def run_analysis(job_id, input_path, output_name, progress, *, reference_path, output_dir,
+                 landmarker_factory):
+    """Analyze one uploaded video (runs inside a worker)
+
+    Progress updates go to the shared `progress` mapping under `job_id`.
+    Returns the /analyze response body plus per-stage timings in seconds.
+    """
+    started_at = time.time()
+    timings = {}
+    progress[job_id] = {"stage": "detect", "started_at": started_at,
+                        "frames_done": 0, "total_frames": None}
+
+    def on_frames(frames_done, total_frames):
+        progress[job_id] = {"stage": "detect", "started_at": started_at,
+                            "frames_done": frames_done, "total_frames": total_frames}
+
+    def stage(name):
+        progress[job_id] = {**progress[job_id], "stage": name}
+
+    output_dir = Path(output_dir)
+    reference = np.load(reference_path, mmap_mode='r')
+
+    t = time.perf_counter()
+    comp_poses = detect_poses(input_path, landmarker_factory(), on_frames)
+    timings["detect"] = time.perf_counter() - t
+
+    stage("score")
+    t = time.perf_counter()
+    scores = score_poses(comp_poses, reference)
+    correct_counts = scores["correct_counts"].tolist()
+    timings["score"] = time.perf_counter() - t
+
+    stage("overlay")
+    t = time.perf_counter()
+    output_video = output_dir / f"analyzed_{output_name}"
+    draw_overlay(input_path, output_video, comp_poses, scores)
+    timings["overlay"] = time.perf_counter() - t
+
+    # Generate statistics
+    perfect_frames = len(reference)
+    total_possible = perfect_frames * len(selected_indices)
+    overall_score = (sum(correct_counts) / total_possible) * 100
+
+    stage("chart")
+    t = time.perf_counter()
+    output_chart = output_dir / f"chart_{Path(output_name).stem}.png"
+    render_accuracy_chart(correct_counts, perfect_frames, overall_score, output_chart)
+    timings["chart"] = time.perf_counter() - t
+
+    per_landmark_stats = {}
+    for idx, correct in zip(selected_indices, correct_counts):
+        percentage = (correct / perfect_frames) * 100
+        per_landmark_stats[landmark_names[idx]] = {
+            "correct_frames": correct,
+            "total_frames": perfect_frames,
+            "accuracy_percentage": round(percentage, 2)
+        }
+
+    return {
+        "overall_score": round(overall_score, 2),
+        "frames_analyzed": len(comp_poses),
+        "reference_frames": perfect_frames,
+        "per_landmark_accuracy": per_landmark_stats,
+        "analyzed_video": f"/download/video/{output_video.name}",
+        "stream_video": f"/stream/video/{output_video.name}",
+        "chart": f"/download/chart/{output_chart.name}",
+        "timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+
+
+@dataclass
+class Job:
+    id: str
+    filename: str
+    input_path: Path
+    status: str = "queued"  # queued, running, done, failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    future: Optional[asyncio.Future] = None
+
+
+class QueueFull(Exception):
+    """Raised when `max_pending` jobs are already queued or running"""
+
+
+class JobManager:
+    """Bounded pool of analysis workers with in-memory job tracking
+
+    `run_job(job_id, input_path, output_name, progress)` is executed in the
+    pool; by default that is a process pool of `max_workers` processes,
+    created by `start()` so importing the app does not spawn workers.
+    At most `max_pending` jobs can be queued or running at once; a slot is
+    taken by `reserve()` before the upload is saved and the job is handed
+    to the pool with `submit()`.
+    """
+
+    def __init__(self, run_job, max_workers=2, max_pending=8, executor=None, keep_finished=100):
+        self.run_job = run_job
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.executor = executor
+        self._manager = None
+        self.progress = {}
+        self.jobs = {}
+
+    def start(self):
+        """Create the worker pool; call once from the app's startup hook"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        # Workers in other processes report progress through a manager dict
+        if isinstance(self.executor, ProcessPoolExecutor) and self._manager is None:
+            self._manager = multiprocessing.Manager()
+            self.progress = self._manager.dict()
+
+    @property
+    def pending(self):
+        return sum(1 for job in self.jobs.values() if job.status in ("queued", "running"))
+
+    def is_full(self):
+        return self.pending >= self.max_pending
+
+    def reserve(self, job_id, filename, input_path):
+        """Register a queued job or raise QueueFull; must be called from the event loop
+
+        The check and the registration happen without an await in between,
+        so concurrent uploads cannot all pass the limit before any is queued.
+        """
+        if self.is_full():
+            raise QueueFull(f"{self.max_pending} jobs already queued or running")
+        job = Job(id=job_id, filename=filename, input_path=Path(input_path))
+        self.jobs[job.id] = job
+        return job
+
+    def submit(self, job):
+        """Hand a reserved job to the pool; must be called from the event loop"""
+        if self.executor is None:
+            raise RuntimeError("JobManager.start() has not been called")
+        loop = asyncio.get_running_loop()
+        job.future = loop.run_in_executor(
+            self.executor, self.run_job, job.id, str(job.input_path), f"{job.id}_{job.filename}", self.progress)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def discard(self, job):
+        """Release the slot of a reserved job that was never submitted"""
+        self.jobs.pop(job.id, None)
+        if job.input_path.exists():
+            job.input_path.unlink()
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            self._refresh(job)
+        return job
+
+    def _refresh(self, job):
+        """Pick up worker-side progress for a queued/running job"""
+        if job.status == "queued" and job.id in self.progress:
+            job.status = "running"
+            job.started_at = self.progress[job.id].get("started_at")
+
+    def _finish(self, job, future):
+        self._refresh(job)
+        job.finished_at = time.time()
+        if future.cancelled():
+            job.status, job.error = "failed", "cancelled"
+        elif future.exception() is not None:
+            job.status, job.error = "failed", str(future.exception())
+        else:
+            job.status, job.result = "done", future.result()
+        if job.started_at is None:
+            job.started_at = job.finished_at
+        self.progress.pop(job.id, None)
+        if job.input_path.exists():
+            job.input_path.unlink()
+        self._prune()
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.status in ("done", "failed")]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:-self.keep_finished or None]:
+            del self.jobs[job.id]
+
+    def describe(self, job):
+        """JSON-friendly job status"""
+        self._refresh(job)
+        info = {
+            "job_id": job.id,
+            "filename": job.filename,
+            "status": job.status,
+            "submitted_at": job.submitted_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "queue_seconds": None,
+            "run_seconds": None,
+        }
+        if job.started_at is not None:
+            info["queue_seconds"] = round(job.started_at - job.submitted_at, 3)
+        if job.finished_at is not None and job.started_at is not None:
+            info["run_seconds"] = round(job.finished_at - job.started_at, 3)
+        if job.status == "running":
+            info["progress"] = dict(self.progress.get(job.id, {}))
+        if job.status == "done":
+            info["result"] = job.result
+        if job.status == "failed":
+            info["error"] = job.error
+        return info
+
+    def metrics(self):
+        """Pool limits, queue sizes and average timings of finished jobs"""
+        jobs = list(self.jobs.values())
+        for job in jobs:
+            self._refresh(job)
+        done = [job for job in jobs if job.status == "done"]
+
+        def average(values):
+            values = list(values)
+            return round(sum(values) / len(values), 3) if values else None
+
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queued": sum(1 for job in jobs if job.status == "queued"),
+            "running": sum(1 for job in jobs if job.status == "running"),
+            "done": len(done),
+            "failed": sum(1 for job in jobs if job.status == "failed"),
+            "avg_queue_seconds": average(job.started_at - job.submitted_at for job in done),
+            "avg_run_seconds": average(job.finished_at - job.started_at for job in done),
+            "avg_stage_seconds": {
+                name: average(job.result["timings"][name] for job in done) for name in STAGES
+            },
+        }
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
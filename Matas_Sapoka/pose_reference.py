@@ -0,0 +1,98 @@
+"""Reference pose extraction and on-disk landmark cache for the Pose Analysis API"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 33
+# x, y, z, visibility per landmark
+LANDMARK_FIELDS = 4
+FRAME_STEP_MS = 33
+
+
+def landmarks_to_array(landmarks):
+    """Convert a MediaPipe landmark list to a (33, 4) float32 array"""
+    pose_array = np.full((NUM_LANDMARKS, LANDMARK_FIELDS), np.nan, dtype=np.float32)
+    for i, lm in enumerate(landmarks[:NUM_LANDMARKS]):
+        visibility = lm.visibility if getattr(lm, 'visibility', None) is not None else 1.0
+        pose_array[i] = (lm.x, lm.y, lm.z, visibility)
+    return pose_array
+
+
+def has_pose(poses):
+    """Boolean mask of frames (rows) that contain a detected pose"""
+    return ~np.isnan(poses[..., 0, 0])
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reference_cache_path(video_path, model_path, detector_settings, cache_dir):
+    """Cache file for a reference video, keyed by video hash, model hash and detector options"""
+    key = json.dumps({
+        "video": file_hash(video_path),
+        "model": file_hash(model_path),
+        "settings": detector_settings,
+        "frame_step_ms": FRAME_STEP_MS,
+    }, sort_keys=True)
+    key_hash = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"reference_{Path(video_path).stem}_{key_hash}.npy"
+
+
+def extract_reference(video_path, landmarker):
+    """Run the landmarker over every frame of a video
+
+    Returns a (frames, 33, 4) float32 array; frames without a detected pose are NaN.
+    """
+    poses = []
+    cap = cv2.VideoCapture(str(video_path))
+    frame_timestamp = 0
+
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = landmarker.detect_for_video(rgb, frame_timestamp)
+        frame_timestamp += FRAME_STEP_MS
+
+        if results.pose_landmarks:
+            poses.append(landmarks_to_array(results.pose_landmarks[0]))
+        else:
+            poses.append(np.full((NUM_LANDMARKS, LANDMARK_FIELDS), np.nan, dtype=np.float32))
+
+    cap.release()
+    if not poses:
+        return np.empty((0, NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+    return np.stack(poses)
+
+
+def load_reference(video_path, model_path, detector_settings, create_landmarker, cache_dir):
+    """Load reference landmarks memory-mapped from the cache, extracting them on a miss
+
+    `create_landmarker` is only called when the cache has no entry for this
+    video/model/settings combination.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(exist_ok=True)
+    cache_file = reference_cache_path(video_path, model_path, detector_settings, cache_dir)
+
+    if not cache_file.exists():
+        print(f"Extracting reference poses from {video_path}...")
+        poses = extract_reference(video_path, create_landmarker())
+        # Write to a temp file first so a crash never leaves a truncated cache entry
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp.npy")
+        np.save(tmp_file, poses)
+        os.replace(tmp_file, cache_file)
+
+    return np.load(cache_file, mmap_mode='r')
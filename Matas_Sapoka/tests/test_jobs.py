@@ -0,0 +1,188 @@
+"""Analysis jobs and the /analyze flow with a stub detector instead of MediaPipe"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from pose_jobs import JobManager, QueueFull, run_analysis
+from pose_reference import NUM_LANDMARKS
+
+FRAMES = 6
+
+
+class StubLandmarker:
+    """Same pose in every frame; every second frame has no detection"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_for_video(self, rgb, timestamp_ms):
+        assert rgb.ndim == 3 and rgb.shape[2] == 3
+        self.calls += 1
+        if self.calls % 2 == 0:
+            return SimpleNamespace(pose_landmarks=[])
+        landmarks = [SimpleNamespace(x=0.5, y=0.5, z=0.0, visibility=1.0) for _ in range(NUM_LANDMARKS)]
+        return SimpleNamespace(pose_landmarks=[landmarks])
+
+
+def write_video(path, frames=FRAMES):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def write_reference(path, frames=FRAMES):
+    reference = np.full((frames, NUM_LANDMARKS, 4), 0.5, dtype=np.float32)
+    reference[..., 2] = 0.0
+    reference[..., 3] = 1.0
+    np.save(path, reference)
+    return path
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "outputs").mkdir()
+    write_reference(tmp_path / "reference.npy")
+    return tmp_path
+
+
+def stub_run_job(workdir):
+    return partial(run_analysis,
+                   reference_path=str(workdir / "reference.npy"),
+                   output_dir=str(workdir / "outputs"),
+                   landmarker_factory=StubLandmarker)
+
+
+def test_job_manager_with_stub_detector(workdir):
+    async def scenario():
+        manager = JobManager(stub_run_job(workdir), max_workers=1, max_pending=1,
+                             executor=ThreadPoolExecutor(max_workers=1))
+        manager.start()
+        try:
+            video = write_video(workdir / "uploads" / "a.mp4")
+            job = manager.reserve("job1", "a.mp4", video)
+            assert manager.describe(job)["status"] == "queued"
+            # the reserved slot counts before the job is submitted
+            with pytest.raises(QueueFull):
+                manager.reserve("job2", "b.mp4", workdir / "uploads" / "b.mp4")
+
+            manager.submit(job)
+            result = await job.future
+            await asyncio.sleep(0)  # let the done callback run
+            return manager, job, result
+        finally:
+            manager.shutdown()
+
+    manager, job, result = asyncio.run(scenario())
+
+    assert job.status == "done"
+    assert not job.input_path.exists()
+    assert result["frames_analyzed"] == FRAMES
+    assert result["reference_frames"] == FRAMES
+    # frames without a detection are never correct: 3 of 6
+    assert result["overall_score"] == 50.0
+    assert (workdir / "outputs" / "analyzed_job1_a.mp4").exists()
+    assert (workdir / "outputs" / "chart_job1_a.png").exists()
+    assert job.id not in manager.progress
+
+    metrics = manager.metrics()
+    assert (metrics["queued"], metrics["running"], metrics["done"], metrics["failed"]) == (0, 0, 1, 0)
+    assert set(metrics["avg_stage_seconds"]) == {"detect", "score", "overlay", "chart"}
+    assert "mediapipe" not in sys.modules
+
+
+def test_discard_releases_slot(workdir):
+    manager = JobManager(stub_run_job(workdir), max_pending=1, executor=ThreadPoolExecutor(max_workers=1))
+    upload = workdir / "uploads" / "partial.mp4"
+    upload.write_bytes(b"partial")
+    job = manager.reserve("job1", "partial.mp4", upload)
+    manager.discard(job)
+    assert manager.get("job1") is None
+    assert not upload.exists()
+    manager.reserve("job2", "b.mp4", workdir / "uploads" / "b.mp4")
+    manager.shutdown()
+
+
+def test_submit_requires_start(workdir):
+    manager = JobManager(stub_run_job(workdir))
+    assert manager.executor is None
+    job = manager.reserve("job1", "a.mp4", workdir / "uploads" / "a.mp4")
+
+    async def submit():
+        manager.submit(job)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(submit())
+
+
+@pytest.fixture
+def client(workdir, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.chdir(workdir)
+    import main
+
+    monkeypatch.setattr(main, "UPLOAD_DIR", workdir / "uploads")
+    monkeypatch.setattr(main, "OUTPUT_DIR", workdir / "outputs")
+    monkeypatch.setattr(main, "MAX_PENDING_JOBS", 2)
+    monkeypatch.setattr(main, "reference_landmarks", np.load(workdir / "reference.npy", mmap_mode="r"))
+    monkeypatch.setattr(main, "job_manager", main.create_job_manager(
+        str(workdir / "reference.npy"), landmarker_factory=StubLandmarker,
+        executor=ThreadPoolExecutor(max_workers=1)))
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def upload(client, wait):
+    video = write_video(Path("clip.mp4"))
+    with open(video, "rb") as f:
+        return client.post(f"/analyze?wait={str(wait).lower()}", files={"file": ("clip.mp4", f, "video/mp4")})
+
+
+def test_analyze_without_wait_then_poll(client):
+    response = upload(client, wait=False)
+    assert response.status_code == 202
+    body = response.json()
+    job_id = body["job_id"]
+    assert body["status_url"] == f"/jobs/{job_id}"
+
+    for _ in range(200):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+    assert status["status"] == "done", status
+    assert status["result"]["frames_analyzed"] == FRAMES
+    assert status["queue_seconds"] is not None and status["run_seconds"] is not None
+
+    chart = client.get(status["result"]["chart"])
+    assert chart.status_code == 200 and chart.headers["content-type"] == "image/png"
+    assert client.get("/metrics").json()["done"] == 1
+
+
+def test_analyze_waits_for_result(client):
+    response = upload(client, wait=True)
+    assert response.status_code == 200
+    assert response.json()["overall_score"] == 50.0
+
+
+def test_analyze_rejects_when_queue_is_full(client):
+    import main
+
+    main.job_manager.reserve("held1", "x.mp4", Path("uploads/x.mp4"))
+    main.job_manager.reserve("held2", "y.mp4", Path("uploads/y.mp4"))
+    assert upload(client, wait=False).status_code == 429
+
+
+def test_unknown_job(client):
+    assert client.get("/jobs/missing").status_code == 404
@@ -5,28 +5,91 @@ from datetime import date, datetime, timezone
 import pandas as pd
 from .html_parse import SCHEMA
 
+#kiek eiluciu kaupiam atmintyje pries viena insert i listings_stg
+FLUSH_ROWS = 500
+
+#tipizuotu stulpeliu rezimui, visi kiti lieka TEXT
+TYPED_COLUMNS = {
+    "task_id": "BIGINT",
+    "ext_date": "DATE",
+    "price": "DOUBLE",
+    "price_per_month": "DOUBLE",
+    "rooms": "INTEGER",
+    "area_sqm": "DOUBLE",
+    "plot_area": "DOUBLE",
+    "floor": "INTEGER",
+    "floor_total": "INTEGER",
+    "year_of_creation": "INTEGER",
+    "entry_date": "DATE",
+    "redacted_date": "DATE",
+    "active_till_date": "DATE",
+    "favorited": "INTEGER",
+    "views": "INTEGER",
+    "distance_to_water": "DOUBLE",
+}
+
+
+STATE_COLUMNS = [
+    "listing_key", "category", "url", "card_hash", "etag", "last_modified", "redacted_date",
+    "content_hash", "first_seen", "last_seen", "last_fetched", "last_changed",
+]
+STATE_DATES = {"first_seen", "last_seen", "last_fetched", "last_changed"}
+
+
+def column_type(field: str, typed: bool) -> str:
+    return TYPED_COLUMNS.get(field, "TEXT") if typed else "TEXT"
+
+
+#sql israiska, kuri teksta is puslapio pavercia stulpelio tipu: "185 000 €" -> 185000, "65,5 m²" -> 65.5
+def cast_expr(field: str, typed: bool) -> str:
+    sql_type = column_type(field, typed)
+    col = f'CAST("{field}" AS TEXT)'
+    if sql_type == "TEXT":
+        return col
+    if sql_type == "DATE":
+        return f"TRY_CAST({col} AS DATE)"
+    number = f"replace(regexp_extract(regexp_replace({col}, '\\s', '', 'g'), '-?[0-9]+([.,][0-9]+)?'), ',', '.')"
+    if sql_type == "DOUBLE":
+        return f"TRY_CAST({number} AS DOUBLE)"
+    return f"TRY_CAST(TRY_CAST({number} AS DOUBLE) AS {sql_type})"
+
+
+#nepavykes flush: buferis ismestas, categories - kuriu kategoriju eilutes jame buvo
+class FlushError(Exception):
+    def __init__(self, message, categories):
+        super().__init__(message)
+        self.categories = categories
+
 
 class DBManager:
-    def __init__(self, db_path: str = "vilnius.db"):
+    def __init__(self, db_path: str = "vilnius.db", typed: bool = False, flush_rows: int = FLUSH_ROWS):
         self.db_path = Path(db_path)
         self.con = duckdb.connect(str(self.db_path))
         self.run_date = date.today()
         self.task_id = None
+        #typed=True: kainos, plotai, aukstai ir datos saugomi skaiciais/datomis (reikia naujos db)
+        self.typed = typed
+        self.flush_rows = flush_rows
+        #eilutes kaupiamos stulpeliais ir irasomos vienu append
+        self.buffer = {field: [] for field in SCHEMA}
+        self.buffered = 0
+        self.records = 0
 
     #iniciajuoja lenteteles jei leidziama pirma karta
     def ensure_schema(self):
        self.create_tasks_table()
        self.create_table_from_schema()
+       self.create_state_tables()
 
     #dinamiskai sugeneruoja lenteliu sql
     def create_sql_from_schema(self):
         with open("aruodas_scrape/SQL/create_listing_stg_table.sql", "w") as f:
             sql = """CREATE TABLE IF NOT EXISTS listings_stg (
             """
-            sql = sql + f"\n{SCHEMA[0]} TEXT"
+            sql = sql + f"\n{SCHEMA[0]} {column_type(SCHEMA[0], self.typed)}"
             for field in SCHEMA[1:]:
                 sql = sql + ",\n"
-                sql = sql + f"{field} TEXT"
+                sql = sql + f"{field} {column_type(field, self.typed)}"
                 
 
             sql = sql + ");"
@@ -35,10 +98,10 @@ class DBManager:
         with open("aruodas_scrape/SQL/create_listing_table.sql", "w") as f:
             sql = """CREATE TABLE IF NOT EXISTS listings (
             """
-            sql = sql + f"\n{SCHEMA[0]} TEXT"
+            sql = sql + f"\n{SCHEMA[0]} {column_type(SCHEMA[0], self.typed)}"
             for field in SCHEMA[1:]:
                 sql = sql + ",\n"
-                sql = sql + f"{field} TEXT"
+                sql = sql + f"{field} {column_type(field, self.typed)}"
                 
 
             sql = sql + ");"  
@@ -64,58 +127,108 @@ class DBManager:
             sql = f.read()
             self.con.execute(sql)
         
+    #inkrementiniam rezimui: skelbimu pirstu antspaudai ir versiju view
+    def create_state_tables(self):
+        with open("aruodas_scrape/SQL/create_listing_state_table.sql", "r") as f:
+            self.con.execute(f.read())
+        with open("aruodas_scrape/SQL/create_listing_versions_view.sql", "r") as f:
+            self.con.execute(f.read())
+
+    #listing_key -> paskutinis zinomas skelbimo irasas (datos kaip date, tusti laukai None)
+    def load_state(self):
+        cur = self.con.execute(f"SELECT {', '.join(STATE_COLUMNS)} FROM listing_state;")
+        return {row[0]: dict(zip(STATE_COLUMNS, row)) for row in cur.fetchall()}
+
+    #visi run pakeitimai vienu upsert
+    def save_state(self, states):
+        if not states:
+            return
+        df = pd.DataFrame([[state.get(c) for c in STATE_COLUMNS] for state in states.values()],
+                          columns=STATE_COLUMNS, dtype="object")
+        self.con.register("state_buffer", df)
+        try:
+            select = ", ".join(
+                f"CAST({c} AS DATE)" if c in STATE_DATES else f"CAST({c} AS TEXT)" for c in STATE_COLUMNS)
+            self.con.execute(f"INSERT OR REPLACE INTO listing_state SELECT {select} FROM state_buffer;")
+        finally:
+            self.con.unregister("state_buffer")
+
     #funkcija loginimui
     def start_task(self, category=None, pages=None):
         start_time = datetime.now(timezone.utc)
 
-        self.con.execute("""
-            INSERT INTO tasks (run_date, category, start_time, status, pages)
-            VALUES (?, ?, ?, 'running', ?);
-        """, [self.run_date, category, start_time, pages])
-
-        # paimam paskutinį įrašytą task_id
+        # task_id grazinamas is karto, kad kelios kategorijos galetu vykti kartu
         self.task_id = self.con.execute("""
-            SELECT task_id
-            FROM tasks
-            ORDER BY task_id DESC
-            LIMIT 1;
-        """).fetchone()[0]
+            INSERT INTO tasks (run_date, category, start_time, status, pages)
+            VALUES (?, ?, ?, 'running', ?)
+            RETURNING task_id;
+        """, [self.run_date, category, start_time, pages]).fetchone()[0]
+        return self.task_id
     #funkcija loginimui pabaigt
-    def finish_task(self, records=0, error=None):
+    def finish_task(self, records=0, error=None, task_id=None, pages=None):
        
         end_time = datetime.now(timezone.utc)
         status = "failed" if error else "success"
 
         self.con.execute("""
             UPDATE tasks
-            SET end_time = ?, status = ?, records = ?, error = ?
+            SET end_time = ?, status = ?, records = ?, error = ?, pages = COALESCE(?, pages)
             WHERE task_id = ?;
-        """, [end_time, status, records, error, self.task_id])
+        """, [end_time, status, records, error, pages, task_id or self.task_id])
     # apvalom nuo seno run
     #tuo paciu metu galima zvilgtelt i stg lentelel jei paskutinis runas buvo blogas
     def begin_run(self):
+        self.clear_buffer()
+        self.records = 0
         self.con.execute("""TRUNCATE TABLE listings_stg;
         """)
-    #funkcija imetimui eiluciu pagal zodyna
-    def insert_row(self, row_dict: dict, category):
+    #funkcija imetimui eiluciu pagal zodyna, i db nueina kas flush_rows eiluciu
+    def insert_row(self, row_dict: dict, category, task_id=None):
 
         
         url = row_dict.get("url")
         row_dict["listing_id"] = extract_listing_id(url)
-        row_dict["task_id"] = self.task_id
+        row_dict["task_id"] = task_id or self.task_id
         row_dict["ext_date"] = date.today()
         row_dict["category"] = category
 
-      
-        df = pd.DataFrame([row_dict])
-        self.con.register("tmp", df)
-    
-        self.con.execute("INSERT INTO listings_stg SELECT * FROM tmp;")
-        self.con.unregister("tmp")
-
-    #jei parejo be klaidu imetam viska i galutine laikymo lentele
-    def finalize(self):
-        self.con.execute("INSERT INTO listings SELECT * FROM listings_stg;")
+        for field in SCHEMA:
+            self.buffer[field].append(row_dict.get(field))
+        self.buffered += 1
+        if self.buffered >= self.flush_rows:
+            self.flush()
+
+    def clear_buffer(self):
+        for values in self.buffer.values():
+            values.clear()
+        self.buffered = 0
+
+    #visas buferis vienu INSERT ... SELECT, tipai pakeiciami duckdb viduje
+    #jei insert nepavyksta buferis vis tiek isvalomas, kad ta pati klaida nesikartotu kitoms kategorijoms
+    def flush(self):
+        if not self.buffered:
+            return
+        df = pd.DataFrame({field: pd.Series(values, dtype="object") for field, values in self.buffer.items()})
+        select = ", ".join(cast_expr(field, self.typed) for field in SCHEMA)
+        self.con.register("stg_buffer", df)
+        try:
+            self.con.execute(f"INSERT INTO listings_stg SELECT {select} FROM stg_buffer;")
+        except Exception as err:
+            categories = set(self.buffer["category"])
+            self.clear_buffer()
+            raise FlushError(str(err), categories) from err
+        finally:
+            self.con.unregister("stg_buffer")
+        self.records += self.buffered
+        self.clear_buffer()
+
+    #jei parejo be klaidu imetam viska (arba vienos kategorijos eilutes) i galutine laikymo lentele
+    def finalize(self, category=None):
+        self.flush()
+        where, params = ("WHERE category = ?", [category]) if category else ("", [])
+        records = self.con.execute(f"SELECT count(*) FROM listings_stg {where};", params).fetchone()[0]
+        self.con.execute(f"INSERT INTO listings SELECT * FROM listings_stg {where};", params)
+        return records
 
     #Close the connection
     def close(self):
@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS listing_state (
+    listing_key TEXT PRIMARY KEY,
+    category TEXT,
+    url TEXT,
+    card_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    redacted_date TEXT,
+    content_hash TEXT,
+    first_seen DATE,
+    last_seen DATE,
+    last_fetched DATE,
+    last_changed DATE
+);
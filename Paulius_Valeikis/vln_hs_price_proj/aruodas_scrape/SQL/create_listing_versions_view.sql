@@ -0,0 +1,9 @@
+CREATE OR REPLACE VIEW listing_versions AS
+SELECT
+    split_part(listing_id, '_', 1) AS listing_code,
+    CAST(ext_date AS DATE) AS valid_from,
+    LEAD(CAST(ext_date AS DATE)) OVER (
+        PARTITION BY split_part(listing_id, '_', 1) ORDER BY CAST(ext_date AS DATE)
+    ) AS valid_to,
+    l.*
+FROM listings l;
@@ -1,6 +1,7 @@
 import argparse
-from .pipeline_db import run_pipeline
-from .export import export_all, export_latest
+from .pipeline_db import URL_HEAD, run_pipeline
+from .crawler import RATE
+from .export import FORMATS, export_all, export_latest
 
 #CLI irankis visko naudojomuisi //leidzia paliesti scraperi, gauti visus sukauptus rezultatus, gauti paskutinio run rezultatus
 
@@ -17,19 +18,66 @@ def main():
         action="store_true",
         help="export only latest"
     )
+    #skaitiniai stulpeliai vietoj TEXT (naujai db)
+    parser.add_argument(
+        "--typed",
+        action="store_true",
+        help="store price, area, floors and dates as typed columns"
+    )
+    #galima nukreipti i lokalu serveri su issaugotais puslapiais
+    parser.add_argument(
+        "--base-url",
+        default=URL_HEAD,
+        help="site to crawl, e.g. a local server with saved pages"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=RATE,
+        help="max requests per second for the whole crawl"
+    )
+    #siuncia ir saugo tik pasikeitusius skelbimus
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip unchanged listings and store only changed versions"
+    )
+    parser.add_argument(
+        "--db",
+        default="vilnius.db",
+        help="duckdb file"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="csv",
+        help="export file format"
+    )
+    #exporto intervalas pagal ext_date (YYYY-MM-DD, imtinai)
+    parser.add_argument(
+        "--from",
+        dest="start",
+        help="export listings extracted on or after this date"
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        help="export listings extracted on or before this date"
+    )
     args = parser.parse_args()
 
     if args.command == "run":
         print("PIPELINE WAS STARTED") 
-        run_pipeline()
+        run_pipeline(typed=args.typed, url_head=args.base_url, rate=args.rate, db_path=args.db,
+                     incremental=args.incremental)
     #exportuoti galima kartu su --latest
     elif args.command == "export":
         if args.latest:
             print("EXPORTING LATEST")
-            export_latest()
+            export_latest(fmt=args.format, db_path=args.db)
         else:
             print("EXPORTING ALL")
-            export_all()
+            export_all(fmt=args.format, start=args.start, end=args.end, db_path=args.db)
 
 
 if __name__ == "__main__":
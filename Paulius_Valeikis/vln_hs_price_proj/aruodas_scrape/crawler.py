@@ -0,0 +1,243 @@
+import asyncio
+import time
+from datetime import timedelta
+from urllib.parse import urlparse
+from logger import logger
+from .DB_manage import FlushError
+from .html_parse import content_hash, parse_listing
+
+#bendras uzklausu limitas visoms kategorijoms (uzklausos per sekunde)
+RATE = 2.0
+BURST = 4
+DETAIL_WORKERS = 6
+QUEUE_SIZE = 200
+#inkrementiniam rezime skelbimas su nepakitusia kortele vis tiek persiunciamas kas tiek dienu
+REFRESH_DAYS = 7
+
+
+class TokenBucket:
+    #vienas limiteris visam crawleriui: rate uzklausu per sekunde, iki burst is karto
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Crawler:
+    """Producer/consumer crawl of all categories at once.
+
+    One list-page producer per category puts listing urls on a bounded queue,
+    DETAIL_WORKERS fetch and parse them, and a single writer passes parsed rows
+    to the DB. Every request waits on the shared token bucket. With a
+    parse_pool, listing pages are parsed in worker processes so the event
+    loop keeps fetching.
+
+    With incremental=True a fingerprint per listing (card hash from the list
+    page, ETag/Last-Modified, redacted_date, content hash) is kept in
+    listing_state. Listings whose card did not change are not fetched until
+    they are REFRESH_DAYS old, the rest are fetched conditionally, and only
+    rows whose content changed are written, so listings holds one version per
+    change instead of a full copy per day.
+    """
+
+    def __init__(self, extractor, parser, db, categories, url_head,
+                 detail_workers=DETAIL_WORKERS, queue_size=QUEUE_SIZE, parse_pool=None,
+                 incremental=False, refresh_days=REFRESH_DAYS):
+        self.e = extractor
+        self.h = parser
+        self.db = db
+        self.categories = categories
+        self.url_head = url_head
+        self.detail_workers = detail_workers
+        self.parse_pool = parse_pool
+        self.detail_q = asyncio.Queue(maxsize=queue_size)
+        self.row_q = asyncio.Queue(maxsize=queue_size)
+        self.pages = {}
+        self.task_ids = {}
+        self.errors = {}
+        self.incremental = incremental
+        self.refresh = timedelta(days=refresh_days)
+        self.today = db.run_date
+        self.state = {}
+        self.touched = set()
+        self.skipped = {}
+
+    #surenka kategorijos listingu nuorodas puslapis po puslapio
+    async def list_pages(self, key):
+        url = f"{self.url_head}{self.categories[key]}"
+        page_no = 1
+        page_url = f"{url}/"
+        seen = set()
+        while True:
+            try:
+                html, status = await self.e.fetch(page_url)
+                #gali sustoti jei url blogas ir bus redirectinamas
+                if status == 302:
+                    logger.info(f"last page for cattegory {key} is {page_no}/ or got redirected")
+                    break
+                if self.incremental:
+                    cards = [(self.url_head + link, card) for link, card in self.h.ext_cards(html)]
+                else:
+                    cards = [(self.url_head + link, None) for link in self.h.ext_links(html)]
+            except Exception as err:
+                logger.info(f"Exception {err}")
+                break
+            #tas pats puslapis antra karta - daugiau puslapiu nera
+            new_cards = [(link, card) for link, card in cards if link not in seen]
+            if not new_cards:
+                break
+            for link, card in new_cards:
+                seen.add(link)
+                if self.incremental and self.is_fresh(key, link, card):
+                    self.skipped[key] = self.skipped.get(key, 0) + 1
+                    continue
+                await self.detail_q.put((key, link, card))
+            page_no += 1
+            page_url = f"{url}/puslapis/{page_no}/"
+        self.pages[key] = max(0, page_no - 1)
+        if self.incremental:
+            logger.info(f"{key}: skipped {self.skipped.get(key, 0)} unchanged listings")
+
+    def listing_state(self, key, link):
+        listing_key = urlparse(link).path
+        state = self.state.get(listing_key)
+        if state is None:
+            state = self.state[listing_key] = {
+                "listing_key": listing_key, "category": key, "url": link, "first_seen": self.today,
+            }
+        self.touched.add(listing_key)
+        return state
+
+    #korteles hashas nepasikeite ir neseniai tikrinta - nesiunciam
+    def is_fresh(self, key, link, card):
+        state = self.listing_state(key, link)
+        state["last_seen"] = self.today
+        fetched = state.get("last_fetched")
+        return (state.get("card_hash") == card and fetched is not None
+                and self.today - fetched < self.refresh)
+
+    #grazina eilute tik jei skelbimo turinys pasikeite nuo paskutinio karto
+    async def fetch_changed(self, key, link, card):
+        state = self.listing_state(key, link)
+        html, status, etag, last_modified = await self.e.fetch_conditional(
+            link, state.get("etag"), state.get("last_modified"))
+        if status not in (200, 304):
+            return None
+        if status == 304:
+            state.update(card_hash=card, last_fetched=self.today)
+            return None
+        #kortele laikoma patikrinta tik sekmingai isparsinus, kitaip kitas run bandys is naujo
+        row = await self.parse(html)
+        digest = content_hash(row)
+        state.update(card_hash=card, last_fetched=self.today, etag=etag, last_modified=last_modified,
+                     redacted_date=row.get("redacted_date"))
+        if state.get("content_hash") == digest:
+            return None
+        state.update(content_hash=digest, last_changed=self.today)
+        return row
+
+    async def parse(self, html):
+        if self.parse_pool is None:
+            return self.h.ext_data(html)
+        loop = asyncio.get_running_loop()
+        row, unknown = await loop.run_in_executor(self.parse_pool, parse_listing, html)
+        self.h.unknown_labels.update(unknown)
+        return row
+
+    async def detail_worker(self):
+        while True:
+            item = await self.detail_q.get()
+            try:
+                if item is None:
+                    return
+                key, link, card = item
+                try:
+                    if self.incremental:
+                        row = await self.fetch_changed(key, link, card)
+                        if row is not None:
+                            await self.row_q.put((key, row))
+                        continue
+                    html, status = await self.e.fetch(link)
+                    #nebandom istraukineti is html is ne html
+                    if status == 200:
+                        await self.row_q.put((key, await self.parse(html)))
+                except Exception as err:
+                    logger.info(f"Exception {err} for {link}")
+            finally:
+                self.detail_q.task_done()
+
+    async def writer(self):
+        while True:
+            item = await self.row_q.get()
+            if item is None:
+                return
+            key, row = item
+            if key in self.errors:
+                continue
+            try:
+                self.db.insert_row(row, key, task_id=self.task_ids[key])
+            except FlushError as err:
+                self.flush_failed(err)
+            except Exception as err:
+                logger.error(f"Error in category {key}: {err}")
+                self.errors[key] = str(err)
+
+    #nepavykes flush klaida priskiria tik toms kategorijoms, kuriu eilutes buvo buferyje
+    def flush_failed(self, err):
+        for key in sorted(err.categories):
+            logger.error(f"Error in category {key}: {err}")
+            self.errors.setdefault(key, str(err))
+
+    def flush(self):
+        try:
+            self.db.flush()
+        except FlushError as err:
+            self.flush_failed(err)
+
+    async def run(self):
+        self.db.begin_run()
+        if self.incremental:
+            self.state = self.db.load_state()
+        for key in self.categories:
+            self.task_ids[key] = self.db.start_task(category=key)
+
+        writer = asyncio.create_task(self.writer())
+        workers = [asyncio.create_task(self.detail_worker()) for _ in range(self.detail_workers)]
+        await asyncio.gather(*(self.list_pages(key) for key in self.categories))
+        for _ in workers:
+            await self.detail_q.put(None)
+        await asyncio.gather(*workers)
+        await self.row_q.put(None)
+        await writer
+        #likusios eilutes irasomos pries finalize, kad klaida butu priskirta tik ju kategorijoms
+        self.flush()
+        #nezinomi laukai irasomi viena karta run pabaigoje
+        self.h.flush_labels()
+        #pirstu antspaudai atnaujinami vienu upsert, tik paliesti skelbimai ir ne is nepavykusiu kategoriju
+        if self.incremental:
+            self.db.save_state({k: self.state[k] for k in self.touched
+                                if self.state[k]["category"] not in self.errors})
+
+        for key in self.categories:
+            error = self.errors.get(key)
+            try:
+                if error is None:
+                    records = self.db.finalize(category=key)
+            except Exception as err:
+                logger.error(f"Error in category {key}: {err}")
+                error = str(err)
+            self.db.finish_task(records=0 if error else records, error=error,
+                                task_id=self.task_ids[key], pages=self.pages.get(key))
@@ -1,34 +1,77 @@
-
 import duckdb 
 import os
+import shutil
+from datetime import date
 
 DB = "vilnius.db"
+#vienas run = po viena task kiekvienai kategorijai
+LATEST_TASKS = 4
+FORMATS = ("csv", "parquet")
+
+
+#datos tikrinamos cia, nes COPY neleidzia parametru - i sql patenka tik tvarkinga data
+def date_filter(start=None, end=None):
+    conditions = []
+    if start:
+        conditions.append(f"CAST(ext_date AS DATE) >= DATE '{date.fromisoformat(str(start))}'")
+    if end:
+        conditions.append(f"CAST(ext_date AS DATE) <= DATE '{date.fromisoformat(str(end))}'")
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def copy_options(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    return "FORMAT parquet" if fmt == "parquet" else "FORMAT csv, HEADER"
 
-def export_all(listings_csv = "listings_all.csv", tasks_csv = "logs_all.csv", folder = "result_data"):
+
+#duckdb raso tiesiai i failus (COPY ... TO), niekas nekraunama i pandas
+#listings isskaidomi i katalogus ext_date=.../category=.../
+def export_all(listings_dir = "listings_all", tasks_csv = "logs_all.csv", folder = "result_data",
+               fmt = "csv", start = None, end = None, db_path = DB):
+
+    #datos ir formatas patikrinami pries trinant sena exporta
+    where, options = date_filter(start, end), copy_options(fmt)
 
     #jei nera folderio padarom
     os.makedirs(folder, exist_ok=True)
+    #senas exportas istrinamas, kitaip liktu particijos is ankstesnio platesnio intervalo
+    shutil.rmtree(os.path.join(folder, listings_dir), ignore_errors=True)
 
-    with duckdb.connect(DB) as con:
+    with duckdb.connect(db_path, read_only=True) as con:
         #listings
-        listings_df = con.sql("SELECT * FROM listings").df()
-        listings_df.to_csv(f"{folder}/{listings_csv}", index=False, encoding="utf-8")
+        con.execute(f"""
+            COPY (SELECT * FROM listings {where})
+            TO '{folder}/{listings_dir}'
+            ({options}, PARTITION_BY (ext_date, category));
+        """)
 
         # logs
-        tasks_df = con.sql("SELECT * FROM tasks").df()
-        tasks_df.to_csv(f"{folder}/{tasks_csv}", index=False, encoding="utf-8")
+        con.execute(f"COPY (SELECT * FROM tasks ORDER BY task_id) TO '{folder}/{tasks_csv}' (FORMAT csv, HEADER);")
 
-def export_latest(listings_csv = "listings_latest.csv", tasks_csv = "logs_latest.csv", folder = "result_data"):
+def export_latest(listings_csv = "listings_latest.csv", tasks_csv = "logs_latest.csv", folder = "result_data",
+                  fmt = "csv", db_path = DB):
 
     #jei nera folderio padarom
     os.makedirs(folder, exist_ok=True)
-    
-    with duckdb.connect(DB) as con:
+    if fmt == "parquet":
+        listings_csv = os.path.splitext(listings_csv)[0] + ".parquet"
+
+    with duckdb.connect(db_path, read_only=True) as con:
+        #paskutinio run task_id atskirai, tada listings filtruojami konstantu sarasu (duckdb praleidzia row group'us pagal min/max)
+        task_ids = [row[0] for row in con.execute(
+            "SELECT task_id FROM tasks ORDER BY task_id DESC LIMIT ?;", [LATEST_TASKS]).fetchall()]
+        #kabutese, kad tiktu ir TEXT, ir BIGINT task_id stulpeliui
+        in_list = ", ".join(f"'{int(task_id)}'" for task_id in task_ids) or "NULL"
+
         #listings
-        listings_df = con.sql("SELECT * FROM listings ls WHERE ls.task_id IN (SELECT ts.task_id FROM tasks ts ORDER BY ts.task_id DESC LIMIT 4) ").df()
-        listings_df.to_csv(f"{folder}/{listings_csv}", index=False, encoding="utf-8")
+        con.execute(f"""
+            COPY (SELECT * FROM listings WHERE task_id IN ({in_list}))
+            TO '{folder}/{listings_csv}' ({copy_options(fmt)});
+        """)
 
         #logs
-        tasks_df = con.sql("SELECT * FROM tasks ORDER BY task_id DESC LIMIT 4").df()
-        tasks_df.to_csv(f"{folder}/{tasks_csv}", index=False, encoding="utf-8")
-
+        con.execute(f"""
+            COPY (SELECT * FROM tasks WHERE task_id IN ({in_list}) ORDER BY task_id DESC)
+            TO '{folder}/{tasks_csv}' (FORMAT csv, HEADER);
+        """)
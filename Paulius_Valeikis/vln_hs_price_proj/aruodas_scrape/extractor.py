@@ -6,9 +6,18 @@ from logger import logger
 
 
 
+def _header(resp, name):
+    value = resp.headers[name]
+    if isinstance(value, bytes):
+        value = value.decode("latin1")
+    return value
+
+
 class Extractor: 
     #kad inicializuojant objekta buti aktyvi ta pati sesija ir enreiktu passinti per funkcijas
-    def __init__(self) -> None:
+    def __init__(self, limiter=None) -> None:
+        #bendras TokenBucket, kiekviena uzklausa (ir bandymas is naujo) laukia zetono
+        self.limiter = limiter
         self.session = Client()
         self.session.update(
             impersonate=Impersonate.Firefox139
@@ -20,6 +29,8 @@ class Extractor:
         )
     @retry(stop=stop_after_attempt(3))
     async def fetch(self, url):
+        if self.limiter is not None:
+            await self.limiter.acquire()
         logger.info(f"requasting url: {url}")
         
         resp = await self.session.get(url)
@@ -32,6 +43,21 @@ class Extractor:
         # print(html[:400])  # look 
         return html, resp.status
     
+    #salyginis gavimas: grazina ir etag/last-modified, 304 reiskia kad puslapis nepasikeites
+    @retry(stop=stop_after_attempt(3))
+    async def fetch_conditional(self, url, etag=None, last_modified=None):
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        logger.info(f"requasting url: {url}")
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        resp = await self.session.get(url, headers=headers)
+        html = await resp.text() if resp.status != 304 else None
+        return html, resp.status, _header(resp, "etag"), _header(resp, "last-modified")
+
     async def fetch_all(self, urls, conc):
         #limituoja requestu skaiciu vienu metu
         sem = asyncio.Semaphore(conc) 
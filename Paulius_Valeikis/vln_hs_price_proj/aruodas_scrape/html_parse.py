@@ -1,6 +1,11 @@
 
-from bs4 import BeautifulSoup
+import hashlib
+from bs4 import BeautifulSoup, Comment, NavigableString
 from urllib.parse import urlparse
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # be lxml lieka tik BeautifulSoup
+    lxml_html = None
 
 MULTI_VALUE_FIELDS = [
     "peculiars",
@@ -50,20 +55,72 @@ LT_EN_DICT = {
     }
 
 
-def translate_label(label, mapping):
+def translate_label(label, mapping, unknown=None):
     label = label.strip()
     if label in mapping:
         return mapping[label]
+    #jei duotas rinkinys, nezinomi laukai kaupiami ir irasomi veliau su write_labels
+    elif unknown is not None:
+        unknown.add(label)
+        return None
     else:
         with open("labels.txt", 'a') as f:
             f.write(f"No English key for label: {label}\n")
         return None
+
+
+def write_labels(labels, path="labels.txt"):
+    if not labels:
+        return
+    with open(path, 'a') as f:
+        for label in sorted(labels):
+            f.write(f"No English key for label: {label}\n")
+
+
+#sarašo puslapio kortele: visas tekstas korteles elemente (auksciausias skelbimo nuorodos protevis be kitu skelbimu)
+#events: ("link", href) korteles pradzioje, ("text", tekstas), ("end", None) korteles pabaigoje, dokumento tvarka
+def card_hashes(events):
+    cards = {}
+    current = None
+    for kind, value in events:
+        if kind == "link":
+            key = urlparse(value).path
+            current = cards.setdefault(key, [value, []])
+        elif kind == "end":
+            current = None
+        elif current is not None and value.strip():
+            current[1].append(value.strip())
+    return [(href, hashlib.sha1(" ".join(texts).encode("utf-8")).hexdigest())
+            for href, texts in cards.values()]
+
+
+#kortele kyla nuo nuorodos i virsu, kol tevas turi tik sio skelbimo nuorodas,
+#todel paskutine kortele nepasiima puslapiavimo ar poraštes teksto
+def card_containers(anchors, parent_of, listing_paths):
+    containers = {}
+    for a, href in anchors:
+        key = urlparse(href).path
+        el, parent = a, parent_of(a)
+        while parent is not None and listing_paths(parent) == {key}:
+            el, parent = parent, parent_of(parent)
+        containers[el] = href
+    return containers
+
+
+#skelbimo turinio hashas be kasdien kintanciu lauku (perziuros, isiminimai) ir run metaduomenu
+VOLATILE_FIELDS = {"listing_id", "task_id", "category", "ext_date", "views", "favorited"}
+
+
+def content_hash(row):
+    stable = [f"{k}={row.get(k)}" for k in SCHEMA if k not in VOLATILE_FIELDS]
+    return hashlib.sha1("\n".join(stable).encode("utf-8")).hexdigest()
     
 class Html_ext:
     def __init__(self):
         self.mvf = MULTI_VALUE_FIELDS
         self.schema = SCHEMA
         self.lten = LT_EN_DICT
+        self.unknown_labels = set()
     #is puslapio istraukia visu nuosavybiu nuorodas
     def ext_links(self, html):
         links = []
@@ -82,6 +139,33 @@ class Html_ext:
                 seen.add(unique_key)
                 links.append(a.get("href"))
         return links
+
+    #nuorodos kartu su korteles hashu (kaina, plotas ir t.t. sarašo puslapyje)
+    def ext_cards(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        anchors = [(a, a.get("href")) for a in soup.find_all("a", class_="object-image-link-big_thumbs")]
+
+        def listing_paths(el):
+            return {urlparse(a.get("href")).path for a in el.find_all("a", class_="object-image-link-big_thumbs")}
+
+        #bs4 zymes lyginamos pagal turini, todel konteineriai saugomi pagal id
+        containers = {id(el): href for el, href in
+                      card_containers(anchors, lambda el: el.parent, listing_paths).items()}
+
+        def events(node):
+            if isinstance(node, Comment):
+                return
+            if isinstance(node, NavigableString):
+                yield "text", str(node)
+                return
+            href = containers.get(id(node))
+            if href is not None:
+                yield "link", href
+            for child in node.children:
+                yield from events(child)
+            if href is not None:
+                yield "end", None
+        return card_hashes(events(soup))
     
     def ext_data_old(self, html):
     #tuscia skelbimo struktura
@@ -155,7 +239,7 @@ class Html_ext:
         extra_info = soup.select("dl > dt")
         for dt in extra_info:
             label = dt.get_text(strip=True)
-            label = translate_label(label, self.lten)
+            label = translate_label(label, self.lten, self.unknown_labels)
             if label is None:      # ⬅ skip unknown fields safely
                 continue
             dd = dt.find_next_sibling("dd")
@@ -166,9 +250,123 @@ class Html_ext:
                 value = dd.get_text(strip=True)
             listing[label] = value
         return listing
+
+    def flush_labels(self, path="labels.txt"):
+        write_labels(self.unknown_labels, path)
+        self.unknown_labels.clear()
     
 
 
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml_html is not None:
+    #is anksto sukompiliuoti XPath tiems patiems selektoriams kaip Html_ext
+    X_LINKS = etree.XPath(f"//a[{_has_class('object-image-link-big_thumbs')}]/@href")
+    X_LINK_ELEMENTS = etree.XPath(f"//a[{_has_class('object-image-link-big_thumbs')}]")
+    X_CARD_LINKS = etree.XPath(f".//a[{_has_class('object-image-link-big_thumbs')}]/@href")
+    X_HEADERS = etree.XPath(f"//div[{_has_class('advert-heading-col')} and {_has_class('title-col')}]//h1")
+    X_PRICE = etree.XPath(f"(//*[{_has_class('main-price')}])[1]")
+    X_DT = etree.XPath("//dl/dt")
+    X_DD = etree.XPath("following-sibling::dd[1]")
+    X_SPANS = etree.XPath(".//span")
+
+
+def _text(el):
+    #kaip BeautifulSoup get_text(strip=True)
+    return "".join(part.strip() for part in el.itertext())
+
+
+class Lxml_ext:
+    #tas pats kaip Html_ext, tik su lxml ir sukompiliuotais XPath; nezinomi laukai kaupiami unknown_labels
+    def __init__(self):
+        self.mvf = set(MULTI_VALUE_FIELDS)
+        self.schema = SCHEMA
+        self.lten = LT_EN_DICT
+        self.unknown_labels = set()
+
+    def ext_links(self, html):
+        links = []
+        seen = set()
+        for link in X_LINKS(lxml_html.fromstring(html)):
+            unique_key = urlparse(link).path
+            if unique_key not in seen:
+                seen.add(unique_key)
+                links.append(link)
+        return links
+
+    def ext_cards(self, html):
+        tree = lxml_html.fromstring(html)
+        containers = card_containers(
+            [(a, a.get("href")) for a in X_LINK_ELEMENTS(tree)],
+            lambda el: el.getparent(),
+            lambda el: {urlparse(link).path for link in X_CARD_LINKS(el)})
+
+        def events():
+            for action, el in etree.iterwalk(tree, events=("start", "end")):
+                if action == "start":
+                    if el in containers:
+                        yield "link", containers[el]
+                    if el.text and isinstance(el.tag, str):
+                        yield "text", el.text
+                else:
+                    if el in containers:
+                        yield "end", None
+                    if el.tail:
+                        yield "text", el.tail
+        return card_hashes(events())
+
+    def ext_data(self, html):
+        listing = dict.fromkeys(self.schema)
+        tree = lxml_html.fromstring(html)
+
+        #Yra pirmas reklaminis headeris coliving erdvem ir visokiem grupiniam pastatams
+        headers = X_HEADERS(tree)
+        basic_info = headers[1] if len(headers) > 1 else headers[0]
+
+        listing["price"] = _text(X_PRICE(tree)[0])
+        location = [x.strip() for x in _text(basic_info).split(",")]
+        if len(location) == 3:
+            listing["city"], listing["hood"], listing["street"] = location
+        elif len(location) == 2:
+            listing["city"], listing["street"] = location
+
+        for dt in X_DT(tree):
+            label = translate_label(_text(dt), self.lten, self.unknown_labels)
+            if label is None:
+                continue
+            dd = X_DD(dt)[0]
+            if label in self.mvf:
+                value = ";".join(_text(span) for span in X_SPANS(dd))
+            else:
+                value = _text(dd)
+            listing[label] = value
+        return listing
+
+    def flush_labels(self, path="labels.txt"):
+        write_labels(self.unknown_labels, path)
+        self.unknown_labels.clear()
+
+
+def make_parser():
+    return Lxml_ext() if lxml_html is not None else Html_ext()
+
+
+_worker_parser = None
+
+
+#process pool darbininkui: grazina eilute ir nezinomus laukus (juos iraso pagrindinis procesas)
+def parse_listing(html):
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = make_parser()
+    row = _worker_parser.ext_data(html)
+    unknown = set(_worker_parser.unknown_labels)
+    _worker_parser.unknown_labels.clear()
+    return row, unknown
+
+
 # def main():
 #     h = Html_ext()
 
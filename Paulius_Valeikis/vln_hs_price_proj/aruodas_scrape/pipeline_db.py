@@ -1,8 +1,8 @@
 import asyncio
-import random
+from concurrent.futures import ProcessPoolExecutor
+from .crawler import RATE, Crawler, TokenBucket
 from .extractor import Extractor
-from .html_parse import Html_ext
-from logger import logger
+from .html_parse import make_parser
 from .DB_manage import DBManager
 
 URL_HEAD = "https://m.aruodas.lt"
@@ -13,86 +13,29 @@ CATEGORIES = {
     "RENT_FLAT": "/butu-nuoma/vilniuje",
     "SELL_FLAT": "/butai/vilniuje"
     }
+#procesai html parsinimui
+PARSE_WORKERS = 2
 
-CHUNK = 10
+async def main(typed=False, url_head=URL_HEAD, rate=RATE, db_path="vilnius.db", incremental=False):
 
-#PAGALBINE funkcija procesuoti linkus gabalais
-def chunks(lst, n):
-    for i in range(0, len(lst), n):
-        #sugrazina iteruojama atkarpom lista
-        yield lst[i:i + n]
-
-async def main():
-
-    e = Extractor()
-    h = Html_ext()
-    db = DBManager()
+    limiter = TokenBucket(rate=rate)
+    e = Extractor(limiter=limiter)
+    h = make_parser()
+    db = DBManager(db_path, typed=typed)
 
     db.ensure_schema()
 
-    #kekvienaam tipui is objektu
-    for key in CATEGORIES:
-        url = f"{URL_HEAD}{CATEGORIES[key]}"
-        page_no = 1
-        all_cat_links = []
-        #pirmo  puslapio urlas
-        page_url = f"{url}/"
-        #surenkame pacias nuorodas i house listingus
-        while True:
-            
-            try:
-                html, status = await e.fetch(page_url)
-                #gali sustoti jei url blogas ir bus redirectinamas
-                if status == 302:
-                    logger.info(f"last page for cattegory {key} is {page_no}/ or got redirected")
-                    break
-                links_raw = h.ext_links(html)
-                links = [URL_HEAD + url for url in links_raw]
-                all_cat_links.extend(links)
-            except Exception as err:
-                logger.info(f"Exception {err}")
-                break
-
-            
-
-            #limiting    
-            base_delay = random.uniform(1, 2)
-            await asyncio.sleep(base_delay + random.random() * 0.5)
-
-            page_no += 1
-            page_url = f"{url}/puslapis/{page_no}/"
-        
-        total_pages = max(0, page_no - 1)
-        db.start_task(category=key, pages=total_pages)
-        db.begin_run()
-        try:
-            #breakina jei praeina sarasas be linku
-            if len(all_cat_links) > 0:
-                links_chunked = chunks(all_cat_links, CHUNK)
-                    
-                for chunk in links_chunked:
-                    # asynchronous laukiam keliu puslapiu duomenu
-                    data = await e.fetch_all(chunk, 6)
-
-                    #nebandom istraukineti is html is ne html
-                    for html, status in data:
-                        if status == 200:
-                            row = h.ext_data(html)
-                            db.insert_row(row,key)
-                db.finalize()
-            
-            db.finish_task()
-        
-        except Exception as err:
-            # log both to console and tasks table
-            logger.error(f"Error in category {key}: {err}")
-            db.finish_task(records=0, error=str(err))
-    
-    db.close()
+    #visos kategorijos vienu metu, uzklausas riboja bendras limiteris
+    try:
+        with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as pool:
+            crawler = Crawler(e, h, db, CATEGORIES, url_head, parse_pool=pool, incremental=incremental)
+            await crawler.run()
+    finally:
+        db.close()
 
 #kad cli veikia reikia synchronous funkcijos
-def run_pipeline():
-    asyncio.run(main())
+def run_pipeline(typed=False, url_head=URL_HEAD, rate=RATE, db_path="vilnius.db", incremental=False):
+    asyncio.run(main(typed=typed, url_head=url_head, rate=rate, db_path=db_path, incremental=incremental))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from aruodas_scrape.DB_manage import DBManager
+
+
+@pytest.fixture
+def sql_dir(tmp_path, monkeypatch):
+    #DBManager skaito ir perraso aruodas_scrape/SQL reliatyviai darbo katalogui, todel dirbama su kopija
+    shutil.copytree(PROJECT_DIR / "aruodas_scrape" / "SQL", tmp_path / "aruodas_scrape" / "SQL")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def db(tmp_path, sql_dir):
+    manager = DBManager(str(tmp_path / "test.db"), flush_rows=1)
+    manager.ensure_schema()
+    yield manager
+    manager.close()
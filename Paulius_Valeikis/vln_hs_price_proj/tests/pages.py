@@ -0,0 +1,50 @@
+"""Small aruodas-like list and listing pages for the parser and crawler tests"""
+
+LIST_PAGE = """<!DOCTYPE html>
+<html><head><title>Butų nuoma</title></head><body>
+<div class="list-search">
+{cards}
+</div>
+<div class="pagination"><a href="{category}/puslapis/2/">2</a></div>
+<footer>© aruodas</footer>
+</body></html>"""
+
+CARD = """  <div class="list-row">
+    <div class="list-photo"><a class="object-image-link-big_thumbs" href="{href}"><img src="x.jpg"></a></div>
+    <div class="list-adress"><h3>Vilnius, {hood}, {street}</h3></div>
+    <div class="list-item-price">{price}</div>
+    <div class="list-AreaOverall">{area} m²</div>
+  </div>"""
+
+LISTING_PAGE = """<!DOCTYPE html>
+<html><head><title>{street}</title></head><body>
+<div class="advert-heading-col title-col"><h1>Naujas projektas</h1></div>
+<div class="advert-heading-col title-col"><h1>Vilnius, {hood}, {street}</h1></div>
+<div class="price-block"><span class="main-price">{price}</span><span class="main-price">1 €/mėn.</span></div>
+<dl>
+  <dt>Kambarių sk.</dt><dd>{rooms}</dd>
+  <dt>Plotas</dt><dd>{area} m²</dd>
+  <dt>Aukštas</dt><dd> 3 </dd>
+  <dt>Ypatybės</dt><dd><span>Nauja kanalizacija</span> <span>Tualetas ir vonia atskirai</span></dd>
+  <dt>Šildymas</dt><dd>Centrinis kolektorinis</dd>
+  <dt>Nuoroda</dt><dd>www.aruodas.lt/{code}/</dd>
+  {extra}
+</dl>
+</body></html>"""
+
+
+def listing(i):
+    return {"hood": "Naujamiestis", "street": f"Gatvė {i}", "price": f"{500 + i} €",
+            "rooms": 2, "area": 40 + i, "code": f"1-{1000 + i}"}
+
+
+def card(href, i):
+    return CARD.format(href=href, **listing(i))
+
+
+def list_page(category, hrefs):
+    return LIST_PAGE.format(category=category, cards="\n".join(card(href, i) for i, href in enumerate(hrefs)))
+
+
+def listing_page(i, extra=""):
+    return LISTING_PAGE.format(extra=extra, **listing(i))
@@ -0,0 +1,114 @@
+"""Crawler.run end to end: real Extractor and parser against pages served on 127.0.0.1"""
+import asyncio
+import gc
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from aruodas_scrape.crawler import BURST, RATE, Crawler, TokenBucket
+from aruodas_scrape.extractor import Extractor
+from aruodas_scrape.html_parse import make_parser
+from pages import list_page, listing_page
+
+CATEGORIES = {"RENT_FLAT": "/butu-nuoma/vilniuje", "SELL_FLAT": "/butai/vilniuje"}
+LISTINGS = 3
+
+
+class Site(BaseHTTPRequestHandler):
+    #sarašo puslapis kiekvienai kategorijai, antras puslapis nukreipia atgal kaip aruodas
+    def do_GET(self):
+        self.server.log.append((time.monotonic(), self.path, self.headers.get("If-None-Match")))
+        for key, path in CATEGORIES.items():
+            slug = path.strip("/").replace("/", "-")
+            if self.path == f"{path}/":
+                hrefs = [f"/{slug}-{i}/" for i in range(LISTINGS)]
+                return self.send_html(list_page(path, hrefs))
+            if self.path.startswith(f"{path}/puslapis/"):
+                self.send_response(302)
+                self.send_header("Location", f"{path}/")
+                self.end_headers()
+                return
+            if self.path.startswith(f"/{slug}-"):
+                i = int(self.path.strip("/").rsplit("-", 1)[1])
+                etag = f'"{slug}-{i}-v1"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                return self.send_html(listing_page(i), etag=etag)
+        self.send_response(404)
+        self.end_headers()
+
+    def send_html(self, html, etag=None):
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    server.log = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(db, server, rate=RATE, burst=BURST, **kwargs):
+    extractor = Extractor(limiter=TokenBucket(rate=rate, burst=burst))
+    crawler = Crawler(extractor, make_parser(), db, CATEGORIES, f"http://127.0.0.1:{server.server_port}", **kwargs)
+    asyncio.run(crawler.run())
+    #rnet klientas turi buti sunaikintas pries interpretatoriaus pabaiga
+    crawler.e = None
+    del extractor
+    gc.collect()
+    return crawler
+
+
+def test_crawl_local_site(db, site):
+    crawler = crawl(db, site)
+
+    assert crawler.errors == {}
+    assert crawler.pages == {key: 1 for key in CATEGORIES}
+    rows = db.con.execute("SELECT category, count(*) FROM listings GROUP BY category;").fetchall()
+    assert dict(rows) == {key: LISTINGS for key in CATEGORIES}
+    row = db.con.execute("SELECT city, hood, street, price, rooms, peculiars FROM listings LIMIT 1;").fetchone()
+    assert row[:2] == ("Vilnius", "Naujamiestis") and row[2].startswith("Gatvė")
+    assert row[5] == "Nauja kanalizacija;Tualetas ir vonia atskirai"
+    status = db.con.execute("SELECT DISTINCT status FROM tasks;").fetchall()
+    assert status == [("success",)]
+
+    #kiekviena kategorija: sarašas, 302 antram puslapiui ir LISTINGS skelbimu
+    times = [t for t, _, _ in site.log]
+    assert len(times) == len(CATEGORIES) * (2 + LISTINGS)
+    #bet kuriame intervale ne daugiau uzklausu nei BURST + RATE * trukme (su tinklo paklaida)
+    for i in range(len(times)):
+        for j in range(i, len(times)):
+            assert j - i + 1 <= BURST + RATE * (times[j] - times[i] + 0.05)
+
+
+def test_incremental_recrawl_uses_etags(db, site):
+    crawl(db, site, rate=50, incremental=True)
+    stored = db.con.execute("SELECT count(*) FROM listings;").fetchone()[0]
+    assert stored == len(CATEGORIES) * LISTINGS
+
+    #refresh_days=0: visi skelbimai tikrinami is naujo, serveris atsako 304
+    site.log.clear()
+    crawler = crawl(db, site, rate=50, incremental=True, refresh_days=0)
+    conditional = [path for _, path, etag in site.log if etag]
+    assert len(conditional) == len(CATEGORIES) * LISTINGS
+    assert crawler.errors == {}
+    assert db.con.execute("SELECT count(*) FROM listings;").fetchone()[0] == stored
@@ -0,0 +1,191 @@
+import asyncio
+
+import duckdb
+import pytest
+
+from aruodas_scrape.crawler import Crawler
+from aruodas_scrape.DB_manage import FlushError
+
+URL_HEAD = "https://aruodas.test"
+CATEGORIES = {"a": "/a", "b": "/b", "c": "/c"}
+LISTINGS = 3
+
+
+class StubExtractor:
+    #kiekviena kategorija turi viena sarašo puslapi su LISTINGS skelbimu
+    def __init__(self):
+        self.requests = []
+
+    async def fetch(self, url):
+        self.requests.append(url)
+        path = url[len(URL_HEAD):]
+        if "/puslapis/" in path:
+            return "", 302
+        return path.strip("/"), 200
+
+
+class StubParser:
+    def __init__(self):
+        self.unknown_labels = set()
+
+    def ext_links(self, html):
+        if not html:
+            return []
+        return [f"/{html}-{i}/" for i in range(LISTINGS)]
+
+    def ext_data(self, html):
+        return {"url": f"/{html}/", "price": "100 000 €"}
+
+    def flush_labels(self):
+        pass
+
+
+class FailingConnection:
+    #duckdb rysys, kurio INSERT i listings_stg nepavyksta kai buferyje yra fail_category eiluciu
+    def __init__(self, con, fail_category):
+        self.con = con
+        self.fail_category = fail_category
+        self.buffer = None
+
+    def register(self, name, df):
+        self.buffer = df
+        return self.con.register(name, df)
+
+    def execute(self, sql, *args):
+        if sql.startswith("INSERT INTO listings_stg") and self.fail_category in set(self.buffer["category"]):
+            raise duckdb.Error("insert failed")
+        return self.con.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.con, name)
+
+
+def test_failed_flush_clears_buffer(db):
+    db.flush_rows = 2
+    db.con = FailingConnection(db.con, "b")
+    db.begin_run()
+
+    db.insert_row({"url": "/a-0/"}, "a", task_id=1)
+    with pytest.raises(FlushError) as err:
+        db.insert_row({"url": "/b-0/"}, "b", task_id=2)
+    assert err.value.categories == {"a", "b"}
+    assert db.buffered == 0
+
+    #kitas flush nebekartoja nepavykusio buferio
+    db.insert_row({"url": "/c-0/"}, "c", task_id=3)
+    db.insert_row({"url": "/c-1/"}, "c", task_id=3)
+    assert db.finalize(category="c") == 2
+
+
+def test_flush_error_only_fails_its_categories(db):
+    db.con = FailingConnection(db.con, "b")
+    crawler = Crawler(StubExtractor(), StubParser(), db, CATEGORIES, URL_HEAD, detail_workers=1)
+
+    asyncio.run(crawler.run())
+
+    assert set(crawler.errors) == {"b"}
+    status = dict(db.con.execute("SELECT category, status FROM tasks;").fetchall())
+    assert status == {"a": "success", "b": "failed", "c": "success"}
+    counts = dict(db.con.execute("SELECT category, count(*) FROM listings GROUP BY category;").fetchall())
+    assert counts == {"a": LISTINGS, "c": LISTINGS}
+
+
+class StubSite:
+    #skelbimai: kelias -> kortele, turinys (kaina), ETag; detail_status leidzia grazinti 304
+    def __init__(self, categories, listings):
+        self.cards = {f"/{key}-{i}/": {"card": "v1", "price": "100 000 €", "etag": "e1"}
+                      for key in categories for i in range(listings)}
+        self.detail_status = {}
+        self.broken = set()
+        self.requests = []
+        self.unknown_labels = set()
+
+    async def fetch(self, url):
+        self.requests.append(url)
+        path = url[len(URL_HEAD):]
+        if "/puslapis/" in path:
+            return "", 302
+        return path.strip("/"), 200
+
+    async def fetch_conditional(self, url, etag=None, last_modified=None):
+        self.requests.append(url)
+        path = url[len(URL_HEAD):]
+        listing = self.cards[path]
+        status = self.detail_status.get(path, 200)
+        if status == 304:
+            return None, 304, etag, last_modified
+        return path, 200, listing["etag"], None
+
+    #tas pats objektas atstoja ir parseri
+    def ext_cards(self, html):
+        return [(path, listing["card"]) for path, listing in self.cards.items()
+                if html and path.startswith(f"/{html}-")]
+
+    def ext_data(self, path):
+        if path in self.broken:
+            raise ValueError("unexpected layout")
+        return {"url": path, "price": self.cards[path]["price"]}
+
+    def flush_labels(self):
+        pass
+
+
+def run_incremental(db, site):
+    site.requests.clear()
+    crawler = Crawler(site, site, db, CATEGORIES, URL_HEAD, detail_workers=1, incremental=True)
+    asyncio.run(crawler.run())
+    return len(site.requests), stored(db)
+
+
+def stored(db):
+    return db.con.execute("SELECT count(*) FROM listings;").fetchone()[0]
+
+
+def test_incremental_repeat_run_only_fetches_list_pages(db):
+    site = StubSite(CATEGORIES, LISTINGS)
+    list_requests = 2 * len(CATEGORIES)  #pirmas puslapis ir 302 antram
+    listings = LISTINGS * len(CATEGORIES)
+
+    assert run_incremental(db, site) == (list_requests + listings, listings)
+    #nepasikeitusios korteles nesiunciamos ir nieko neirasoma
+    assert run_incremental(db, site) == (list_requests, listings)
+
+
+def test_incremental_changed_cards(db):
+    site = StubSite(CATEGORIES, LISTINGS)
+    run_incremental(db, site)
+    list_requests = 2 * len(CATEGORIES)
+
+    #304: kortele pasikeite, bet serveris sako, kad skelbimas ne
+    site.cards["/a-0/"]["card"] = "v2"
+    site.detail_status["/a-0/"] = 304
+    #200 su tuo paciu turiniu: turinio hashas nepasikeite, eilute neirasoma
+    site.cards["/b-0/"]["card"] = "v2"
+    site.cards["/b-0/"]["etag"] = "e2"
+    #200 su nauja kaina: nauja versija
+    site.cards["/c-0/"]["card"] = "v2"
+    site.cards["/c-0/"]["price"] = "95 000 €"
+    before = stored(db)
+
+    assert run_incremental(db, site) == (list_requests + 3, before + 1)
+    state = db.load_state()
+    assert state["/a-0/"]["card_hash"] == "v2"
+    assert state["/b-0/"]["etag"] == "e2"
+    assert run_incremental(db, site) == (list_requests, before + 1)
+
+
+def test_incremental_parse_failure_is_retried(db):
+    site = StubSite(CATEGORIES, LISTINGS)
+    run_incremental(db, site)
+    list_requests = 2 * len(CATEGORIES)
+
+    site.cards["/a-1/"]["card"] = "v2"
+    site.cards["/a-1/"]["price"] = "90 000 €"
+    site.broken.add("/a-1/")
+    before = stored(db)
+    assert run_incremental(db, site) == (list_requests + 1, before)
+    assert db.load_state()["/a-1/"]["card_hash"] == "v1"
+
+    #nepavykes parsinimas nepazymi korteles kaip patikrintos
+    site.broken.clear()
+    assert run_incremental(db, site) == (list_requests + 1, before + 1)
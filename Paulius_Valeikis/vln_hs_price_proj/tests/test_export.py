@@ -0,0 +1,92 @@
+import duckdb
+import pytest
+
+from aruodas_scrape.DB_manage import DBManager
+from aruodas_scrape.export import LATEST_TASKS, date_filter, export_all, export_latest
+
+CATEGORIES = ["RENT_HOUSE", "SELL_HOUSE", "RENT_FLAT", "SELL_FLAT"]
+RUN_DATES = ["2025-11-01", "2025-11-02"]
+ROWS = 2
+
+
+#du run'ai po viena task kiekvienai kategorijai, ROWS eiluciu kiekvienam task
+@pytest.fixture(params=[False, True], ids=["text", "typed"])
+def db_path(request, tmp_path, sql_dir):
+    path = tmp_path / "export.db"
+    db = DBManager(str(path), typed=request.param)
+    db.ensure_schema()
+    for run_date in RUN_DATES:
+        db.begin_run()
+        task_ids = []
+        for key in CATEGORIES:
+            task_id = db.start_task(category=key)
+            task_ids.append(task_id)
+            for i in range(ROWS):
+                db.insert_row({"url": f"/{key}-{i}/", "price": f"{100 + i} 000 €"}, key, task_id=task_id)
+            db.finish_task(records=ROWS, task_id=task_id)
+        db.finalize()
+        #insert_row raso siandienos data
+        db.con.execute(f"UPDATE listings SET ext_date = ? WHERE CAST(task_id AS BIGINT) IN ({', '.join(map(str, task_ids))});",
+                       [run_date])
+    db.close()
+    return str(path)
+
+
+def rows(sql, *args):
+    with duckdb.connect() as con:
+        return con.execute(sql, list(args)).fetchall()
+
+
+def test_export_all_partitioned(db_path, tmp_path):
+    out = tmp_path / "result"
+    export_all(folder=str(out), fmt="csv", db_path=db_path)
+
+    partitions = sorted(str(p.relative_to(out / "listings_all")) for p in (out / "listings_all").glob("*/*"))
+    assert partitions == [f"ext_date={d}/category={c}" for d in RUN_DATES for c in sorted(CATEGORIES)]
+    count = rows(f"SELECT count(*) FROM read_csv('{out}/listings_all/*/*/*.csv', hive_partitioning=true);")
+    assert count == [(len(RUN_DATES) * len(CATEGORIES) * ROWS,)]
+    assert rows(f"SELECT count(*) FROM read_csv('{out}/logs_all.csv');") == [(len(RUN_DATES) * len(CATEGORIES),)]
+
+
+def test_export_all_date_range_replaces_old_partitions(db_path, tmp_path):
+    out = tmp_path / "result"
+    export_all(folder=str(out), fmt="parquet", db_path=db_path)
+    export_all(folder=str(out), fmt="parquet", start=RUN_DATES[1], end=RUN_DATES[1], db_path=db_path)
+
+    assert [p.name for p in (out / "listings_all").iterdir()] == [f"ext_date={RUN_DATES[1]}"]
+    result = rows(f"""SELECT DISTINCT CAST(ext_date AS VARCHAR), count(*) OVER ()
+                      FROM read_parquet('{out}/listings_all/**/*.parquet', hive_partitioning=true);""")
+    assert result == [(RUN_DATES[1], len(CATEGORIES) * ROWS)]
+
+
+def test_export_all_rejects_bad_dates_without_touching_old_export(db_path, tmp_path):
+    out = tmp_path / "result"
+    export_all(folder=str(out), fmt="csv", db_path=db_path)
+    with pytest.raises(ValueError):
+        export_all(folder=str(out), fmt="csv", start="2025-11-01'; DROP TABLE listings; --", db_path=db_path)
+    with pytest.raises(ValueError):
+        export_all(folder=str(out), fmt="xlsx", db_path=db_path)
+    assert len(list((out / "listings_all").glob("*/*"))) == len(RUN_DATES) * len(CATEGORIES)
+
+
+def test_date_filter():
+    assert date_filter() == ""
+    assert date_filter("2025-11-01") == "WHERE CAST(ext_date AS DATE) >= DATE '2025-11-01'"
+    assert date_filter(end="2025-11-30").endswith("<= DATE '2025-11-30'")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_export_latest(db_path, tmp_path, fmt):
+    out = tmp_path / "result"
+    export_latest(folder=str(out), fmt=fmt, db_path=db_path)
+
+    listings = out / f"listings_latest.{fmt}"
+    assert listings.exists()
+    assert not (out / "listings_latest.csv").exists() or fmt == "csv"
+    reader = "read_parquet" if fmt == "parquet" else "read_csv"
+    result = rows(f"""SELECT count(*), min(CAST(task_id AS BIGINT)), max(CAST(task_id AS BIGINT)),
+                             min(CAST(ext_date AS VARCHAR)) FROM {reader}('{listings}');""")
+    total_tasks = len(RUN_DATES) * len(CATEGORIES)
+    assert result == [(LATEST_TASKS * ROWS, total_tasks - LATEST_TASKS + 1, total_tasks, RUN_DATES[1])]
+    logs = rows(f"SELECT task_id FROM read_csv('{out}/logs_latest.csv');")
+    assert [task_id for (task_id,) in logs] == list(range(total_tasks, total_tasks - LATEST_TASKS, -1))
@@ -0,0 +1,80 @@
+import pytest
+
+from aruodas_scrape.html_parse import SCHEMA, Html_ext, Lxml_ext, lxml_html
+from pages import list_page, listing_page
+
+PAGE = """<html><body>
+<div class="list">
+  <div class="card"><span>{price_0}</span>
+    <a class="object-image-link-big_thumbs" href="/1-100/">img</a><p>3 kamb., 60 m²</p></div>
+  <div class="card"><span>{price_1}</span>
+    <a class="object-image-link-big_thumbs" href="/1-200/">img</a><p>2 kamb., 45 m²</p></div>
+</div>
+<div class="pagination">{pages}</div>
+<footer>{footer}</footer>
+</body></html>"""
+
+PARSERS = [Html_ext] + ([Lxml_ext] if lxml_html is not None else [])
+
+
+def page(price_0="100 000 €", price_1="80 000 €", pages="1 2 3", footer="aruodas"):
+    return PAGE.format(price_0=price_0, price_1=price_1, pages=pages, footer=footer)
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_card_hash_is_bounded_by_card(parser):
+    base = dict(parser().ext_cards(page()))
+    assert list(base) == ["/1-100/", "/1-200/"]
+
+    #puslapiavimas ir poraste paskutines korteles hasho nekeicia
+    assert dict(parser().ext_cards(page(pages="1 2 3 4", footer="kita"))) == base
+
+    #kaina pries nuoroda priklauso tai paciai kortelei
+    changed = dict(parser().ext_cards(page(price_1="79 000 €")))
+    assert changed["/1-100/"] == base["/1-100/"]
+    assert changed["/1-200/"] != base["/1-200/"]
+
+
+def test_parsers_agree():
+    if lxml_html is None:
+        pytest.skip("lxml not installed")
+    assert Lxml_ext().ext_cards(page()) == Html_ext().ext_cards(page())
+
+
+UNKNOWN_LABEL = "<dt>Nauja ypatybė</dt><dd>Taip</dd>"
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_ext_data_reads_listing(parser, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    h = parser()
+    row = h.ext_data(listing_page(1, extra=UNKNOWN_LABEL))
+
+    #antras antraste po reklaminio projekto headerio
+    assert (row["city"], row["hood"], row["street"]) == ("Vilnius", "Naujamiestis", "Gatvė 1")
+    assert row["price"] == "501 €"
+    assert row["rooms"] == "2" and row["floor"] == "3"
+    assert row["peculiars"] == "Nauja kanalizacija;Tualetas ir vonia atskirai"
+    assert set(row) == set(SCHEMA)
+
+    #nezinomi laukai kaupiami parseryje, labels.txt rasomas tik per flush_labels
+    assert h.unknown_labels == {"Nauja ypatybė"}
+    assert not (tmp_path / "labels.txt").exists()
+    h.flush_labels()
+    assert (tmp_path / "labels.txt").read_text() == "No English key for label: Nauja ypatybė\n"
+    assert h.unknown_labels == set()
+
+
+def test_parsers_return_same_rows_and_links():
+    if lxml_html is None:
+        pytest.skip("lxml not installed")
+    html_ext, lxml_ext = Html_ext(), Lxml_ext()
+    for i in range(3):
+        html = listing_page(i, extra=UNKNOWN_LABEL)
+        assert lxml_ext.ext_data(html) == html_ext.ext_data(html)
+    assert lxml_ext.unknown_labels == html_ext.unknown_labels
+
+    #tas pats skelbimas su kitu query - viena nuoroda
+    hrefs = ["/1-100/", "/1-200/?utm=list", "/1-200/", "/1-300/"]
+    html = list_page("/butu-nuoma/vilniuje", hrefs)
+    assert lxml_ext.ext_links(html) == html_ext.ext_links(html) == ["/1-100/", "/1-200/?utm=list", "/1-300/"]